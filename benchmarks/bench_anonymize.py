@@ -0,0 +1,72 @@
+"""
+Benchmark: namnhashning med apply (per rad) mot anonymize_names (per unikt namn)
+
+Kör:
+    python -m benchmarks.bench_anonymize --rows 271116 --unique 135571 --workers 4
+"""
+import argparse
+import hashlib
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import anonymize_names
+
+
+def make_names(rows: int, unique: int, seed: int = 0) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    pool = np.array([f"Athlete {i:06d} Example-Name" for i in range(unique)], dtype=object)
+    return pd.Series(pool[rng.integers(0, unique, size=rows)], name='Name')
+
+
+def _time(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=271_116)
+    parser.add_argument('--unique', type=int, default=135_571)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    names = make_names(args.rows, args.unique)
+
+    def apply_baseline():
+        return names.apply(lambda x: hashlib.sha256(str(x).encode()).hexdigest()[:16])
+
+    baseline = apply_baseline()
+    assert anonymize_names(names).tolist() == baseline.tolist()
+
+    variants = {
+        'apply (per rad)': apply_baseline,
+        'anonymize_names': lambda: anonymize_names(names),
+        f'anonymize_names workers={args.workers}': lambda: _parallel(names, args.workers),
+    }
+
+    print(f"{args.rows} rader, {args.unique} unika namn")
+    for label, func in variants.items():
+        seconds = _time(func, args.repeat)
+        print(f"{label:<32} {seconds:8.3f} s {args.rows / seconds:14,.0f} rader/s")
+
+
+def _parallel(names: pd.Series, workers: int) -> pd.Series:
+    # Tvinga fram den parallella vägen oavsett antal unika namn
+    import src.data_loader as loader
+    previous = loader.PARALLEL_HASH_MIN_UNIQUES
+    loader.PARALLEL_HASH_MIN_UNIQUES = 0
+    try:
+        return anonymize_names(names, workers=workers)
+    finally:
+        loader.PARALLEL_HASH_MIN_UNIQUES = previous
+
+
+if __name__ == '__main__':
+    main()
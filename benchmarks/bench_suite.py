@@ -0,0 +1,182 @@
+"""
+Benchmarksvit: laddning, hashning och alla publika OlympicAnalyzer-metoder
+
+Varje fall körs på syntetisk data (benchmarks/synthetic.py) i en eller flera
+skalor. Tid är bästa av --repeat körningar; toppminne mäts med tracemalloc i
+en separat körning så att mätningen inte påverkar tiden.
+
+Kör:
+    python -m benchmarks.bench_suite --scale 1 10 --output bench.json
+    python -m benchmarks.bench_suite --scale 1 --compare bench.json --threshold 0.2
+
+Med --compare jämförs tiderna mot en tidigare körning; fall som blivit mer än
+--threshold (andel) långsammare markeras och kommandot avslutas med kod 1.
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import anonymize_names, load_and_anonymize_data, DASHBOARD_COLUMNS
+from src.data_processor import OlympicAnalyzer
+from .synthetic import write_athlete_events
+
+# Publika metoder som inte är analyser (eller som ändrar analysern)
+SKIPPED_METHODS = {'cache_info', 'cache_clear', 'append'}
+
+
+def measure(func: Callable[[], object], repeat: int = 3) -> Dict[str, float]:
+    """
+    Mäter bästa tid och toppminne (tracemalloc) för ett anrop.
+
+    Returns:
+        Dict[str, float]: {'seconds': ..., 'peak_bytes': ...}
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': best, 'peak_bytes': peak}
+
+
+def analyzer_cases(analyzer: OlympicAnalyzer, df: pd.DataFrame,
+                   prefix: str = 'analyzer') -> Dict[str, Callable[[], object]]:
+    """
+    Ett fall per publik analysmetod. Argumenten väljs efter parameternamn:
+    största landet för country_code och största sporten för sport_name,
+    övriga parametrar får sina standardvärden.
+    """
+    arguments = {
+        'country_code': df['NOC'].value_counts().index[0],
+        'sport_name': df['Sport'].value_counts().index[0],
+    }
+    cases = {}
+    for name, method in inspect.getmembers(analyzer, inspect.ismethod):
+        if name.startswith('_') or name in SKIPPED_METHODS:
+            continue
+        params = inspect.signature(method).parameters
+        kwargs = {p: arguments[p] for p in params if p in arguments}
+        if any(p.default is inspect.Parameter.empty and p.name not in kwargs for p in params.values()):
+            print(f"  hoppar över {name}: okända obligatoriska argument", file=sys.stderr)
+            continue
+        cases[f'{prefix}.{name}'] = lambda method=method, kwargs=kwargs: method(**kwargs)
+    return cases
+
+
+def run_scale(scale: float, repeat: int, seed: int, workdir: str) -> Dict[str, Dict[str, float]]:
+    """Kör alla fall för en skala och returnerar resultat per fallnamn."""
+    csv_path = os.path.join(workdir, f'athlete_events_{scale:g}x.csv')
+    write_athlete_events(csv_path, scale, seed)
+    raw = pd.read_csv(csv_path)
+
+    def load_csv():
+        return load_and_anonymize_data(csv_path, use_cache=False)
+
+    def load_cached():
+        return load_and_anonymize_data(csv_path, compact=True, columns=DASHBOARD_COLUMNS)
+
+    load_cached()  # skriver cachen
+    df = load_cached()
+    analyzer = OlympicAnalyzer(df)
+
+    cases = {
+        'load.csv': load_csv,
+        'load.cache_compact': load_cached,
+        'hash.anonymize_names': lambda: anonymize_names(raw['Name']),
+        'analyzer.__init__': lambda: OlympicAnalyzer(df),
+    }
+    cases.update(analyzer_cases(analyzer, df))
+    # Samma fall med Arrow-motorn (resultatcachen är av, så varje anrop räknar)
+    cases['analyzer[arrow].__init__'] = lambda: OlympicAnalyzer(df, backend='arrow')
+    cases.update(analyzer_cases(OlympicAnalyzer(df, backend='arrow'), df, prefix='analyzer[arrow]'))
+
+    results = {}
+    for name, func in cases.items():
+        results[name] = measure(func, repeat)
+        print(f"  {name:<40} {results[name]['seconds']:9.4f} s {results[name]['peak_bytes'] / 2**20:9.1f} MiB")
+    return results
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Jämför två resultatfiler och returnerar fall som blivit långsammare än
+    baseline * (1 + threshold).
+    """
+    regressions = []
+    for scale, cases in current['results'].items():
+        for name, result in cases.items():
+            before = baseline['results'].get(scale, {}).get(name)
+            if before is None:
+                continue
+            ratio = result['seconds'] / before['seconds'] if before['seconds'] else float('inf')
+            flag = 'REGRESSION' if ratio > 1 + threshold else ''
+            print(f"  {scale + 'x':>6} {name:<40} {before['seconds']:9.4f} -> {result['seconds']:9.4f} s "
+                  f"({ratio:5.2f}x) {flag}")
+            if flag:
+                regressions.append(f"{scale}x {name}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, nargs='+', default=[1.0], help="t.ex. 1 10 50")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="spara resultaten som JSON")
+    parser.add_argument('--compare', help="tidigare JSON-resultat att jämföra mot")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="tillåten försämring som andel (0.2 = 20 %%)")
+    args = parser.parse_args(argv)
+
+    report = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in args.scale:
+            print(f"Skala {scale:g}x")
+            report['results'][f'{scale:g}'] = run_scale(scale, args.repeat, args.seed, workdir)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Sparade {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        print(f"Jämförelse mot {args.compare} (tröskel {args.threshold:.0%})")
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(er): " + ', '.join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
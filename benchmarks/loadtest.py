@@ -0,0 +1,287 @@
+"""
+Lasttest av dashboardens callbacks
+
+Skickar `_dash-update-component`-anrop med en realistisk blandning av
+användarval (landsmeny, sportmeny, 3D-data och medaljracet) med
+valfri samtidighet, och rapporterar genomströmning samt p50/p95/p99-latens
+och svarsstorlek per callback. 3D-filtren körs i webbläsaren (clientside
+callback); servern skickar bara 3D-figurens data, en gång per sidladdning.
+
+Kör mot appen i samma process (Flask test client):
+    python -m benchmarks.loadtest --requests 500 --concurrency 8
+
+Eller mot en lokal server över HTTP:
+    gunicorn -w 4 app:app &
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --concurrency 16
+
+Blandningen ändras med t.ex. --mix country=3 sport=1 canada3d=1 race=1.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Scenario -> (komponent som användaren ändrar, andel av anropen). canada3d är
+# en sidladdning (3D-reglagen kostar inga serveranrop)
+DEFAULT_MIX = {'country': 0.45, 'sport': 0.3, 'canada3d': 0.05, 'race': 0.2}
+
+SCENARIO_TRIGGERS = {
+    'country': ['country-dropdown.value'],
+    'sport': ['sport-dropdown.value'],
+    'canada3d': ['data-version.data'],
+    'race': ['global-season-filter.value', 'global-top-n-slider.value'],
+}
+
+# Scenarier vars trigger delas av flera callbacks väljer callback på utdata
+SCENARIO_OUTPUTS = {'canada3d': 'canada-profile-data.data'}
+
+
+class InProcessTransport:
+    """Anropar app.server direkt via Flasks test client (en klient per tråd)."""
+
+    def __init__(self, server):
+        self.server = server
+        self._local = threading.local()
+
+    def _client(self):
+        if not hasattr(self._local, 'client'):
+            self._local.client = self.server.test_client()
+        return self._local.client
+
+    def get(self, path: str) -> Tuple[int, bytes]:
+        response = self._client().get(path)
+        return response.status_code, response.get_data()
+
+    def post_json(self, path: str, payload: dict) -> Tuple[int, bytes]:
+        response = self._client().post(path, json=payload)
+        return response.status_code, response.get_data()
+
+
+class HttpTransport:
+    """Anropar en körande server över HTTP."""
+
+    def __init__(self, base_url: str, timeout: float = 60.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _send(self, request) -> Tuple[int, bytes]:
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as exc:
+            return exc.code, exc.read()
+
+    def get(self, path: str) -> Tuple[int, bytes]:
+        return self._send(urllib.request.Request(self.base_url + path))
+
+    def post_json(self, path: str, payload: dict) -> Tuple[int, bytes]:
+        request = urllib.request.Request(self.base_url + path, data=json.dumps(payload).encode(),
+                                         headers={'Content-Type': 'application/json'}, method='POST')
+        return self._send(request)
+
+
+def _split_output(output: str) -> List[Dict[str, str]]:
+    # Dash skriver flera utdata som "..a.prop...b.prop.." och ett som "a.prop"
+    parts = output.strip('.').split('...') if output.startswith('..') else [output]
+    return [dict(zip(('id', 'property'), part.rsplit('.', 1))) for part in parts]
+
+
+class DashLoadTest:
+    """
+    Bygger callback-anrop från appens egna beroenden (/_dash-dependencies)
+    och aktuella komponentvärden, som webbläsaren gör.
+    """
+
+    def __init__(self, transport, seed: int = 0):
+        self.transport = transport
+        self.rng = random.Random(seed)
+        self.values: Dict[str, object] = {}
+        self.options: Dict[str, list] = {}
+        self.callbacks: Dict[str, dict] = {}
+        self.outputs: Dict[str, dict] = {}
+
+    def wait_until_ready(self, timeout: float = 600.0) -> None:
+        deadline = time.time() + timeout
+        while True:
+            try:
+                status, body = self.transport.get('/ready')
+            except OSError as exc:
+                # Servern har inte börjat lyssna än
+                status, body = 503, str(exc).encode()
+            if status == 200:
+                return
+            if status != 503 or time.time() > deadline:
+                raise RuntimeError(f"/ready svarade {status}: {body[:200]!r}")
+            time.sleep(0.5)
+
+    def discover(self) -> None:
+        """Läser callbacks och hämtar menyval/datasetversion via readiness-callbacken."""
+        status, body = self.transport.get('/_dash-dependencies')
+        if status != 200:
+            raise RuntimeError(f"/_dash-dependencies svarade {status}")
+        for dependency in json.loads(body):
+            if dependency.get('clientside_function'):
+                continue  # körs i webbläsaren
+            self.outputs[dependency['output']] = dependency
+            for item in dependency['inputs']:
+                self.callbacks[f"{item['id']}.{item['property']}"] = dependency
+
+        self.values.update({
+            'country-dropdown.value': 'CAN', 'sport-dropdown.value': 'Swimming',
+            'canada-season-filter.value': 'All', 'canada-medal-filter.value': 'medal',
+            'canada-year-range.value': [1980, 2016], 'global-season-filter.value': 'Summer',
+            'global-top-n-slider.value': 10, 'data-ready-poll.n_intervals': 1,
+            'data-version.data': None,
+        })
+        _, response = self.fire('data-ready-poll.n_intervals')
+        updates = json.loads(response)['response']
+        self.options['country'] = [o['value'] for o in updates['country-dropdown']['options']]
+        self.options['sport'] = [o['value'] for o in updates['sport-dropdown']['options']]
+        self.options['years'] = (updates['canada-year-range']['min'], updates['canada-year-range']['max'])
+        self.values['data-version.data'] = updates['data-version']['data']
+
+    def payload(self, trigger: str, values: Dict[str, object], output: Optional[str] = None) -> dict:
+        dependency = self.outputs[output] if output else self.callbacks[trigger]
+        outputs = _split_output(dependency['output'])
+        return {
+            'output': dependency['output'],
+            'outputs': outputs if dependency['output'].startswith('..') else outputs[0],
+            'inputs': [dict(item, value=values.get(f"{item['id']}.{item['property']}"))
+                       for item in dependency['inputs']],
+            'changedPropIds': [trigger],
+            'state': [dict(item, value=values.get(f"{item['id']}.{item['property']}"))
+                      for item in dependency['state']],
+        }
+
+    def fire(self, trigger: str, values: Optional[Dict[str, object]] = None,
+             output: Optional[str] = None) -> Tuple[int, bytes]:
+        return self.transport.post_json('/_dash-update-component',
+                                        self.payload(trigger, values or self.values, output))
+
+    def random_values(self, scenario: str, rng: random.Random) -> Dict[str, object]:
+        """Slumpar nya värden för scenariots komponenter (ovriga behåller sina värden)."""
+        values = dict(self.values)
+        if scenario == 'country':
+            values['country-dropdown.value'] = rng.choice(self.options['country'])
+        elif scenario == 'sport':
+            values['sport-dropdown.value'] = rng.choice(self.options['sport'])
+        elif scenario == 'race':
+            values['global-season-filter.value'] = rng.choice(['Summer', 'Winter'])
+            values['global-top-n-slider.value'] = rng.randint(5, 15)
+        return values
+
+    def run(self, requests: int, concurrency: int, mix: Dict[str, float]) -> dict:
+        """
+        Kör `requests` anrop fördelade på `concurrency` trådar.
+
+        Returns:
+            dict: Sammanställning per scenario och totalt (se summarize)
+        """
+        scenarios = list(mix)
+        weights = [mix[name] for name in scenarios]
+        plan = self.rng.choices(scenarios, weights=weights, k=requests)
+        seeds = [self.rng.random() for _ in plan]
+
+        def one(index: int):
+            rng = random.Random(seeds[index])
+            scenario = plan[index]
+            values = self.random_values(scenario, rng)
+            trigger = rng.choice(SCENARIO_TRIGGERS[scenario])
+            start = time.perf_counter()
+            status, body = self.fire(trigger, values, SCENARIO_OUTPUTS.get(scenario))
+            return scenario, time.perf_counter() - start, len(body), status
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(one, range(requests)))
+        return summarize(samples, time.perf_counter() - start, concurrency)
+
+
+def summarize(samples: List[tuple], elapsed: float, concurrency: int) -> dict:
+    """
+    Sammanställer (scenario, sekunder, bytes, status) till latenspercentiler,
+    svarsstorlek och genomströmning.
+    """
+    def stats(rows):
+        latency = np.array([row[1] for row in rows]) * 1000
+        size = np.array([row[2] for row in rows])
+        return {
+            'requests': len(rows),
+            'errors': sum(1 for row in rows if row[3] != 200),
+            'p50_ms': float(np.percentile(latency, 50)),
+            'p95_ms': float(np.percentile(latency, 95)),
+            'p99_ms': float(np.percentile(latency, 99)),
+            'mean_bytes': float(size.mean()),
+        }
+
+    by_scenario = {}
+    for row in samples:
+        by_scenario.setdefault(row[0], []).append(row)
+    return {
+        'concurrency': concurrency,
+        'elapsed_seconds': elapsed,
+        'throughput_rps': len(samples) / elapsed if elapsed else 0.0,
+        'total': stats(samples),
+        'callbacks': {name: stats(rows) for name, rows in sorted(by_scenario.items())},
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"{report['total']['requests']} anrop, samtidighet {report['concurrency']}, "
+          f"{report['elapsed_seconds']:.1f} s, {report['throughput_rps']:.1f} anrop/s")
+    print(f"{'callback':<10} {'antal':>6} {'fel':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'medel kB':>9}")
+    for name, row in list(report['callbacks'].items()) + [('totalt', report['total'])]:
+        print(f"{name:<10} {row['requests']:>6} {row['errors']:>4} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} "
+              f"{row['p99_ms']:>9.1f} {row['mean_bytes'] / 1024:>9.1f}")
+
+
+def _parse_mix(items: Optional[List[str]]) -> Dict[str, float]:
+    if not items:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in items:
+        name, _, weight = item.partition('=')
+        if name not in SCENARIO_TRIGGERS:
+            raise SystemExit(f"okänt scenario: {name} (välj bland {', '.join(SCENARIO_TRIGGERS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help="bas-URL till en körande server (annars i samma process)")
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--mix', nargs='*', help="scenario=vikt, t.ex. country=3 race=1")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="spara rapporten som JSON")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        transport = HttpTransport(args.url)
+    else:
+        from src.dashboard import app
+        transport = InProcessTransport(app.server)
+
+    test = DashLoadTest(transport, seed=args.seed)
+    test.wait_until_ready()
+    test.discover()
+    report = test.run(args.requests, args.concurrency, _parse_mix(args.mix))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    return 1 if report['total']['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Deterministisk syntetisk data som liknar athlete_events.csv
+
+Samma 15 kolumner och ungefär samma kardinaliteter som Kaggle-datan
+(~271 000 rader, ~135 000 atleter, 230 NOC, 66 sporter,
+51 spel, ~730 grenar, ~15 % medaljrader, saknade värden i Age/Height/Weight).
+`scale` multiplicerar antal rader och atleter; övriga kardinaliteter är fasta.
+
+Kör:
+    python -m benchmarks.synthetic --scale 10 --output /tmp/athlete_events_10x.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+BASE_ROWS = 271_116
+BASE_ATHLETES = 135_571
+
+COLUMNS = ['ID', 'Name', 'Sex', 'Age', 'Height', 'Weight', 'Team', 'NOC', 'Games',
+           'Year', 'Season', 'City', 'Sport', 'Event', 'Medal']
+
+# Några riktiga koder först så att dashboardens standardval (CAN) finns med
+KNOWN_NOCS = ['USA', 'FRA', 'GBR', 'ITA', 'GER', 'CAN', 'JPN', 'SWE', 'AUS', 'HUN',
+              'POL', 'SUI', 'NED', 'URS', 'CHN', 'ESP', 'NOR', 'FIN', 'RUS', 'KOR']
+N_NOCS = 230
+N_SPORTS = 66
+N_WINTER_SPORTS = 17
+EVENTS_PER_SPORT = 11
+N_CITIES = 42
+MEDAL_SHARE = 0.147
+MISSING = {'Age': 0.035, 'Height': 0.222, 'Weight': 0.232}
+
+
+def _games() -> pd.DataFrame:
+    summer = [1896, 1900, 1904, 1906, 1908, 1912] + list(range(1920, 1937, 4)) + list(range(1948, 2017, 4))
+    winter = list(range(1924, 1937, 4)) + list(range(1948, 1993, 4)) + list(range(1994, 2015, 4))
+    games = pd.DataFrame({
+        'Year': summer + winter,
+        'Season': ['Summer'] * len(summer) + ['Winter'] * len(winter),
+    })
+    games['Games'] = games['Year'].astype(str) + ' ' + games['Season']
+    games['City'] = [f"City {i % N_CITIES:02d}" for i in range(len(games))]
+    return games
+
+
+def _noc_codes() -> list:
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    codes = list(KNOWN_NOCS)
+    i = 0
+    while len(codes) < N_NOCS:
+        code = letters[i // 676 % 26] + letters[i // 26 % 26] + letters[i % 26]
+        if code not in codes:
+            codes.append(code)
+        i += 37
+    return codes
+
+
+def make_athlete_events(scale: float = 1.0, seed: int = 0) -> pd.DataFrame:
+    """
+    Skapar en syntetisk DataFrame med samma schema som athlete_events.csv.
+
+    Args:
+        scale (float): Storlek relativt originalet (1 = ~271 000 rader)
+        seed (int): Seed - samma (scale, seed) ger identisk data
+
+    Returns:
+        pd.DataFrame: Syntetisk data med kolumnerna i COLUMNS
+    """
+    rng = np.random.default_rng(seed)
+    rows = max(int(BASE_ROWS * scale), 1)
+    athletes = max(int(BASE_ATHLETES * scale), 1)
+
+    # Atleter: kön, land (få stora länder, lång svans) och kroppsmått
+    nocs = np.array(_noc_codes(), dtype=object)
+    noc_weights = 1.0 / np.arange(1, N_NOCS + 1) ** 1.1
+    athlete_noc = rng.choice(N_NOCS, size=athletes, p=noc_weights / noc_weights.sum())
+    athlete_female = rng.random(athletes) < 0.27
+    athlete_height = np.where(athlete_female, rng.normal(168, 8, athletes), rng.normal(179, 9, athletes)).round()
+    athlete_weight = (athlete_height - 100 + rng.normal(-5, 9, athletes)).round()
+
+    # Rader: varje rad är en atlet i en gren vid ett spel, fler rader i senare spel.
+    # Varje atlet förekommer minst en gång (om rows >= athletes)
+    athlete = np.sort(np.r_[np.arange(min(athletes, rows)), rng.integers(0, athletes, max(rows - athletes, 0))])
+    games = _games()
+    game_weights = (games['Year'].to_numpy() - 1880.0) ** 2
+    game = rng.choice(len(games), size=rows, p=game_weights / game_weights.sum())
+    season = games['Season'].to_numpy()[game]
+
+    # Sporter: de sista N_WINTER_SPORTS är vintersporter, grenar hör till en sport
+    winter = season == 'Winter'
+    sport = np.where(winter,
+                     N_SPORTS - N_WINTER_SPORTS + rng.integers(0, N_WINTER_SPORTS, rows),
+                     rng.integers(0, N_SPORTS - N_WINTER_SPORTS, rows))
+    event = sport * EVENTS_PER_SPORT + rng.integers(0, EVENTS_PER_SPORT, rows)
+
+    year = games['Year'].to_numpy()[game]
+    female = athlete_female[athlete]
+    age = rng.normal(25.5, 5.5, rows).round().clip(10, 70)
+
+    medal = np.full(rows, None, dtype=object)
+    medal_rows = rng.random(rows) < MEDAL_SHARE
+    medal[medal_rows] = rng.choice(np.array(['Gold', 'Silver', 'Bronze'], dtype=object), size=int(medal_rows.sum()))
+
+    noc = nocs[athlete_noc[athlete]]
+    team_variant = rng.random(rows) < 0.04
+    team = np.where(team_variant,
+                    noc.astype(str) + '-' + rng.integers(1, 6, rows).astype(str),
+                    'Team ' + noc.astype(str))
+
+    df = pd.DataFrame({
+        'ID': athlete + 1,
+        'Name': pd.Series(athlete).map(lambda i: f"Athlete {i:07d} Synthetic"),
+        'Sex': np.where(female, 'F', 'M'),
+        'Age': age,
+        'Height': athlete_height[athlete],
+        'Weight': athlete_weight[athlete],
+        'Team': team,
+        'NOC': noc,
+        'Games': games['Games'].to_numpy()[game],
+        'Year': year,
+        'Season': season,
+        'City': games['City'].to_numpy()[game],
+        'Sport': pd.Series(sport).map(lambda i: f"Sport {i:02d}"),
+        'Event': pd.Series(event).map(lambda i: f"Sport {i // EVENTS_PER_SPORT:02d} Event {i:03d}"),
+        'Medal': medal,
+    })
+    for column, share in MISSING.items():
+        df.loc[rng.random(rows) < share, column] = np.nan
+    return df[COLUMNS]
+
+
+def write_athlete_events(path: str, scale: float = 1.0, seed: int = 0) -> str:
+    """Skriver syntetisk data som CSV (samma format som Kaggle-filen)."""
+    make_athlete_events(scale, seed).to_csv(path, index=False)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='athlete_events_synthetic.csv')
+    args = parser.parse_args()
+    write_athlete_events(args.output, args.scale, args.seed)
+    print(f"Skrev {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,21 @@
+# Gunicorn-konfiguration, läses automatiskt av `gunicorn app:app`
+# Documentation: https://docs.gunicorn.org/en/stable/settings.html#server-hooks
+import os
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'athlete_events.csv')
+
+
+def on_starting(server):
+    """
+    Med OLYMPICS_SHARED_DATA=1 bygger master-processen ett minnesmappat
+    kolumnlager en gång. Workers ärver OLYMPICS_SHARED_STORE och ansluter
+    skrivskyddat, så minnet per worker växer inte med antalet workers.
+    """
+    if os.environ.get('OLYMPICS_SHARED_DATA') != '1' or os.environ.get('OLYMPICS_SHARED_STORE'):
+        return
+
+    from src.data_loader import build_shared_store
+
+    store_path = build_shared_store(DATA_PATH)
+    os.environ['OLYMPICS_SHARED_STORE'] = store_path
+    server.log.info("Delat kolumnlager: %s", store_path)
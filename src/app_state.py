@@ -0,0 +1,99 @@
+# Python standard library threading för bakgrundsladdning
+# Documentation: https://docs.python.org/3/library/threading.html
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class DataState:
+    """
+    Laddningsstatus för dashboardens data
+
+    Datan laddas i en bakgrundstråd så att WSGI-appen kan svara direkt
+    (t.ex. på hälsokontroller). Callbacks frågar `ready` och returnerar
+    platshållare tills laddningen är klar.
+    """
+
+    def __init__(self):
+        self.status = 'pending'
+        self.step = 'Väntar'
+        self.progress = 0.0
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.values: Dict[str, Any] = {}
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.status == 'ready'
+
+    def __getattr__(self, name: str) -> Any:
+        # Laddade objekt (df, analyzer, ...) nås som attribut: state.analyzer
+        values = self.__dict__.get('values', {})
+        if name in values:
+            return values[name]
+        raise AttributeError(name)
+
+    def update(self, step: str, progress: float) -> None:
+        """
+        Rapporterar laddningens framsteg
+
+        Args:
+            step (str): Beskrivning av nuvarande steg
+            progress (float): Andel klart, 0.0-1.0
+        """
+        self.step = step
+        self.progress = progress
+
+    def load(self, loader: Callable[['DataState'], Dict[str, Any]]) -> None:
+        """
+        Kör laddningen i nuvarande tråd
+
+        Args:
+            loader: Funktion som tar emot state (för update()) och returnerar
+                en dict med de laddade objekten
+        """
+        self.status = 'loading'
+        self.started_at = time.time()
+        try:
+            self.values = loader(self)
+            self.update('Klar', 1.0)
+            self.status = 'ready'
+        except Exception as exc:
+            self.error = f"{type(exc).__name__}: {exc}"
+            self.status = 'error'
+        finally:
+            self.finished_at = time.time()
+            self._done.set()
+
+    def start(self, loader: Callable[['DataState'], Dict[str, Any]]) -> threading.Thread:
+        """
+        Startar laddningen i en daemon-tråd (bara en gång)
+
+        Returns:
+            threading.Thread: Laddningstråden
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.load, args=(loader,),
+                                                name='data-loader', daemon=True)
+                self._thread.start()
+        return self._thread
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Väntar tills laddningen är klar (eller misslyckats)."""
+        return self._done.wait(timeout)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Status för /ready-endpointen."""
+        end = self.finished_at or time.time()
+        return {
+            'status': self.status,
+            'step': self.step,
+            'progress': round(self.progress, 2),
+            'error': self.error,
+            'elapsed_seconds': round(end - self.started_at, 2) if self.started_at else None,
+        }
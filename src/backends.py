@@ -0,0 +1,258 @@
+# Frågemotorer för OlympicAnalyzer: pandas (standard) och Apache Arrow
+# Documentation: https://arrow.apache.org/docs/python/compute.html
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+# Ett urval lagrade rader: en slice (t.ex. ett lands block) eller positioner.
+# Urvalets ordning är radernas ursprungliga ordning, som value_counts följer
+Rows = Union[slice, np.ndarray]
+
+
+def _plain_dtype(dtype):
+    # Kategoriska kolumner (kompakt schema) redovisas med sina vanliga värden
+    return dtype.categories.dtype if isinstance(dtype, pd.CategoricalDtype) else dtype
+
+
+def _positions(rows: Rows, length: int) -> np.ndarray:
+    if isinstance(rows, slice):
+        return np.arange(length)[rows]
+    return rows
+
+
+class QueryBackend:
+    """
+    Gränssnitt för de radfrågor OlympicAnalyzer ställer mot datan
+
+    Analysern äger radordningen (sorterad på NOC, se _cluster_rows) och
+    skickar urval som slices eller positioner; motorn filtrerar, räknar och
+    aggregerar. Alla svar är pandas-objekt med samma dtypes, index och
+    ordning oavsett motor, så att resultaten går att jämföra exakt.
+    """
+
+    name = ''
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Args:
+            df (pd.DataFrame): Analyserns lagrade ram (sorterad på NOC)
+        """
+        self.index = df.index
+        self.dtypes = df.dtypes
+
+    def append(self, df: pd.DataFrame, rows: pd.DataFrame, order: np.ndarray) -> None:
+        """
+        Uppdaterar motorn efter OlympicAnalyzer.append utan att bygga om den
+
+        Args:
+            df (pd.DataFrame): Analyserns nya lagrade ram
+            rows (pd.DataFrame): De nya raderna, med ramens dtypes
+            order (np.ndarray): Ramens rader som positioner i de befintliga
+                raderna följda av rows
+        """
+        self.index = df.index
+        self.dtypes = df.dtypes
+
+    def select(self, rows: Rows, not_null: Sequence[str] = (),
+               equals: Optional[Dict[str, object]] = None) -> np.ndarray:
+        """
+        Rader i urvalet där kolumnerna i not_null har värden och kolumnerna i
+        equals har angivet värde
+
+        Returns:
+            np.ndarray: Positioner (lagrad ordning) för raderna som matchar
+        """
+        raise NotImplementedError
+
+    def values(self, rows: Rows, column: str) -> pd.Series:
+        """En kolumns värden för urvalet, med ramens index och dtype."""
+        raise NotImplementedError
+
+    def value_counts(self, rows: Rows, column: str) -> pd.Series:
+        """
+        Antal per värde som pandas value_counts på vanliga värden: fallande
+        antal, lika antal i den ordning värdet först förekom, utan saknade värden.
+        """
+        raise NotImplementedError
+
+    def cube_cells(self, rows: Rows, positions: np.ndarray, keys: Sequence[str]) -> pd.DataFrame:
+        """
+        Medaljkubens celler för urvalet: antal medaljrader per kombination av
+        keys och minsta ursprungliga position ('first'), sorterat på 'first'.
+
+        Args:
+            rows (Rows): Urval av lagrade rader
+            positions (np.ndarray): Ursprunglig position för varje rad i urvalet
+            keys (Sequence[str]): Kubens dimensioner (måste innehålla 'Medal')
+        """
+        raise NotImplementedError
+
+
+class PandasBackend(QueryBackend):
+    """Frågor med pandas masker, value_counts och groupby (en tråd)."""
+
+    name = 'pandas'
+
+    def __init__(self, df: pd.DataFrame):
+        super().__init__(df)
+        self.df = df
+
+    def append(self, df, rows, order):
+        super().append(df, rows, order)
+        self.df = df
+
+    def select(self, rows, not_null=(), equals=None):
+        positions = _positions(rows, len(self.df))
+        mask = np.ones(len(positions), dtype=bool)
+        for col in not_null:
+            mask &= self.df[col].iloc[rows].notna().to_numpy()
+        for col, value in (equals or {}).items():
+            mask &= (self.df[col].iloc[rows] == value).to_numpy(dtype=bool, na_value=False)
+        return positions[mask]
+
+    def values(self, rows, column):
+        return self.df[column].iloc[rows]
+
+    def value_counts(self, rows, column):
+        values = self.df[column].iloc[rows]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(values.cat.categories.dtype)
+        return values.value_counts()
+
+    def cube_cells(self, rows, positions, keys):
+        frame = self.df[list(keys)].iloc[rows]
+        mask = frame['Medal'].notna().to_numpy()
+        cube = (
+            frame[mask].assign(_pos=positions[mask])
+            .groupby(list(keys), observed=True, sort=False)['_pos']
+            .agg(['size', 'min'])
+            .rename(columns={'size': 'count', 'min': 'first'})
+            .reset_index()
+            .sort_values('first', ignore_index=True)
+        )
+        for col in keys:
+            if isinstance(cube[col].dtype, pd.CategoricalDtype):
+                cube[col] = cube[col].astype(cube[col].cat.categories.dtype)
+        return cube
+
+
+class ArrowBackend(QueryBackend):
+    """
+    Frågor mot en Arrow-tabell i minnet med pyarrow.compute
+
+    Filter, take och value_counts körs i Arrows C++-kärnor utan att gå via
+    pandas; aggregeringen av medaljkuben (hash group by) körs på flera
+    trådar (Arrows trådpool, se pyarrow.set_cpu_count). Kategoriska kolumner
+    blir dictionary-kolumner, så koderna delas med pandas-ramen.
+    """
+
+    name = 'arrow'
+
+    def __init__(self, df: pd.DataFrame, use_threads: bool = True):
+        super().__init__(df)
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        self._pa, self._pc = pa, pc
+        self.use_threads = use_threads
+        self.table = pa.Table.from_pandas(df, preserve_index=False).combine_chunks()
+
+    def append(self, df, rows, order):
+        super().append(df, rows, order)
+        pa = self._pa
+        # Bara de nya raderna konverteras från pandas; take ordnar om i Arrow
+        # och slår ihop dictionary-kolumnernas ordlistor
+        new = pa.Table.from_pandas(rows[self.table.column_names], preserve_index=False)
+        table = pa.concat_tables([self.table, new], promote_options='permissive')
+        self.table = table.take(pa.array(order)).combine_chunks()
+
+    def _column(self, rows: Rows, column: str):
+        values = self.table.column(column)
+        if isinstance(rows, slice):
+            start, stop, _ = rows.indices(len(values))
+            return values.slice(start, max(stop - start, 0))
+        return values.take(self._pa.array(rows))
+
+    def _to_pandas(self, values, column: str, plain: bool = False):
+        # Arrow -> pandas-array med samma dtype som kolumnen har i pandas-ramen
+        dtype = self.dtypes[column]
+        if isinstance(values.type, self._pa.DictionaryType):
+            values = values.cast(values.type.value_type)
+            dtype = _plain_dtype(dtype)
+        elif plain:
+            dtype = _plain_dtype(dtype)
+        return pd.array(values.to_numpy(zero_copy_only=False), dtype=dtype)
+
+    def select(self, rows, not_null=(), equals=None):
+        pc = self._pc
+        positions = _positions(rows, self.table.num_rows)
+        mask = None
+        conditions = [pc.is_valid(self._column(rows, col)) for col in not_null]
+        conditions += [pc.fill_null(pc.equal(self._column(rows, col), value), False)
+                       for col, value in (equals or {}).items()]
+        for condition in conditions:
+            mask = condition if mask is None else pc.and_(mask, condition)
+        if mask is None:
+            return positions
+        return positions[mask.to_numpy(zero_copy_only=False)]
+
+    def values(self, rows, column):
+        positions = _positions(rows, self.table.num_rows)
+        return pd.Series(self._to_pandas(self._column(rows, column), column),
+                         index=self.index[positions], name=column)
+
+    def value_counts(self, rows, column):
+        pc = self._pc
+        # value_counts ger värdena i den ordning de först förekommer; en stabil
+        # sortering på fallande antal ger sedan samma ordning som pandas
+        counts = pc.value_counts(self._column(rows, column))
+        values, counts = counts.field('values'), counts.field('counts')
+        valid = pc.is_valid(values)
+        values, counts = values.filter(valid), counts.filter(valid)
+        order = pc.array_sort_indices(counts, order='descending')
+        index = pd.Index(self._to_pandas(values.take(order), column, plain=True), name=column)
+        return pd.Series(counts.take(order).to_numpy().astype('int64'), index=index, name='count')
+
+    def cube_cells(self, rows, positions, keys):
+        pc = self._pc
+        keys = list(keys)
+        table = self.table.select(keys)
+        table = table.slice(*rows.indices(table.num_rows)[:2]) if isinstance(rows, slice) \
+            else table.take(self._pa.array(rows))
+        table = table.append_column('_pos', self._pa.array(positions, type=self._pa.int64()))
+        # Som pandas groupby: rader med saknade nycklar ingår inte
+        mask = pc.is_valid(table['Medal'])
+        for key in keys:
+            mask = pc.and_(mask, pc.is_valid(table[key]))
+        cells = (
+            table.filter(mask)
+            .group_by(keys, use_threads=self.use_threads)
+            .aggregate([('_pos', 'count'), ('_pos', 'min')])
+            .sort_by('_pos_min')
+        )
+        cube = pd.DataFrame({key: self._to_pandas(cells[key], key, plain=True) for key in keys})
+        cube['count'] = cells['_pos_count'].to_numpy().astype('int64')
+        cube['first'] = cells['_pos_min'].to_numpy().astype('int64')
+        return cube
+
+
+BACKENDS = {'pandas': PandasBackend, 'arrow': ArrowBackend}
+
+
+def make_backend(name: str, df: pd.DataFrame) -> QueryBackend:
+    """
+    Skapar en frågemotor för analyserns ram
+
+    Args:
+        name (str): 'pandas' eller 'arrow'
+        df (pd.DataFrame): Analyserns lagrade ram
+
+    Returns:
+        QueryBackend: Motorn
+
+    Raises:
+        ValueError: Om motorn är okänd
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Okänd frågemotor: {name} (välj bland {', '.join(BACKENDS)})")
+    return BACKENDS[name](df)
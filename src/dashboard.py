@@ -1,39 +1,233 @@
 # Plotly Dash
-from dash import Dash, html, dcc, Input, Output
-import dash_bootstrap_components as dbc  # NYTT: Bootstrap komponenter
+import dash
+from dash import Dash, html, dcc, Input, Output, State
 
-# Data och visualisering
-import plotly.express as px
-import plotly.graph_objects as go
+# Bootstrap-komponenter, data och visualisering - dash_bootstrap_components,
+# plotly, pandas och matplotlib importeras först när de behövs (se serve_layout,
+# _load_data och render-funktionerna) för snabb kallstart
 
-# Matplotlib integration
-import matplotlib
-matplotlib.use('Agg')  # VIKTIGT: Sätter backend till icke-interaktiv för webbserver
-import matplotlib.pyplot as plt
-import io
-import base64
+# Flask för att servera de statiska Matplotlib-bilderna och /ready
+from flask import Response, abort, jsonify, request
 
 # Egna moduler (behåll dessa som de är)
-from .data_loader import load_and_anonymize_data
-from .data_processor import OlympicAnalyzer
+from .app_state import DataState
+from . import metrics
+from .response_encoding import install_compression
+import functools
 import os
-import pandas as pd
+import threading
+import time
 
-# Initiera app med Bootstrap-tema (Välj t.ex. LUX, FLATLY, eller BOOTSTRAP)
-app = Dash(__name__, external_stylesheets=[dbc.themes.LUX])
+# Initiera app med Bootstrap-tema (Välj t.ex. LUX, FLATLY, eller BOOTSTRAP).
+# Samma adress som dbc.themes.LUX, utan att importera dash_bootstrap_components
+BOOTSTRAP_THEME = "https://cdn.jsdelivr.net/npm/bootswatch@5.3.3/dist/lux/bootstrap.min.css"
+app = Dash(__name__, external_stylesheets=[BOOTSTRAP_THEME])
 app.title = "Olympic Games Analysis"
 
+# Prometheus-mätvärden på /metrics, opt-in med DASHBOARD_METRICS=1 (instrumenteringen
+# kostar tid i varje callback och analysanrop, och /metrics ska inte exponeras oavsiktligt)
+metrics.REGISTRY.enabled = os.environ.get('DASHBOARD_METRICS', '0') == '1'
+metrics.install_flask(app.server)
+
+# gzip/brotli-komprimering av svaren enligt Accept-Encoding (DASHBOARD_COMPRESSION=0 stänger av).
+# Installeras efter metrics så att sparade bytes räknas per callback
+if os.environ.get('DASHBOARD_COMPRESSION', '1') != '0':
+    install_compression(app.server, min_size=int(os.environ.get('DASHBOARD_COMPRESSION_MIN_BYTES', '1024')))
+
 # --- DATA LOAD ---
-data_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'athlete_events.csv')
-df = load_and_anonymize_data(data_path)
-analyzer = OlympicAnalyzer(df)
+data_path = os.environ.get(
+    'OLYMPICS_DATA_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'athlete_events.csv')
+)
+shared_store = os.environ.get('OLYMPICS_SHARED_STORE')
+# Frågemotor för analysern: 'pandas' eller 'arrow' (se backends.py)
+query_backend = os.environ.get('OLYMPICS_BACKEND', 'pandas')
+
+# Standardvärden för tidsreglaget innan datan är laddad
+DEFAULT_YEAR_RANGE = (1896, 2016)
+
+# Max antal punkter per år och säsong i 3D-figuren (alla medaljörer visas alltid)
+PROFILE_MAX_POINTS = int(os.environ.get('DASHBOARD_3D_MAX_POINTS', '400'))
+
+# Pollintervall efter laddningen, för att upptäcka nya spel (0 = sluta polla)
+DATA_POLL_INTERVAL_MS = int(os.environ.get('DASHBOARD_DATA_POLL_MS', '30000'))
+
+# Kompakt figur-JSON: spårens tal avrundas till så många decimaler och
+# animationsrutor upprepar inte oförändrade data (DASHBOARD_COMPACT_FIGURES=0 stänger av)
+COMPACT_FIGURES = os.environ.get('DASHBOARD_COMPACT_FIGURES', '1') != '0'
+FIGURE_PRECISION = int(os.environ.get('DASHBOARD_FIGURE_PRECISION', '3'))
+
+
+def _load_data(state):
+    """
+    Laddar data och bygger analysern. Körs i en bakgrundstråd (se state.start).
+    """
+    state.update('Importerar bibliotek', 0.05)
+    from .data_loader import load_and_anonymize_data, attach_shared_store, DASHBOARD_COLUMNS
+    from .data_processor import OlympicAnalyzer
+
+    state.update('Läser data', 0.15)
+    load_start = time.perf_counter()
+    if shared_store:
+        # Delat, minnesmappat lager byggt av gunicorns master (se gunicorn.conf.py).
+        # Alla workers delar samma sidor, ingen privat kopia av ramen.
+        df = attach_shared_store(shared_store, columns=DASHBOARD_COLUMNS)
+    else:
+        # Kompakt schema och bara de kolumner dashboarden använder - håller nere RAM per worker
+        df = load_and_anonymize_data(data_path, compact=True, columns=DASHBOARD_COLUMNS)
+
+    metrics.record_dataset(df, time.perf_counter() - load_start, df.attrs.get('load_source', 'csv'))
+    # Datasetets version, densamma i alla workers (se sync_dataset)
+    fingerprint, applied_deltas = df.attrs.get('fingerprint', ''), df.attrs.get('deltas', 0)
+
+    state.update('Bygger analys', 0.6)
+    from .result_cache import copy_on_write
+    # Resultatcache: användare väljer samma länder och sporter om och om igen.
+    # Ett delat lager (redan sorterat på NOC) används alltid utan kopia, så att
+    # minnet per worker inte växer. Skrivskyddat läge kräver Copy-on-Write -
+    # alltid i pandas >= 3, i 2.x med PANDAS_COPY_ON_WRITE=1 vid start
+    analyzer = OlympicAnalyzer(df, cache_entries=512, cache_bytes=64 * 1024 * 1024, copy=not shared_store,
+                               read_only=copy_on_write(), backend=query_backend)
+    # Bara analyserns ram behålls, den inlästa (osorterade) ramen kan släppas
+    df = analyzer.df
+
+    state.update('Förbereder 3D-data', 0.8)
+    # Underlaget för klientsidans 3D-figur (se canada_profile_data)
+    for season in ('Summer', 'Winter'):
+        analyzer.profile_frames('CAN', season=season, max_points=PROFILE_MAX_POINTS)
+
+    state.update('Förbereder cachar', 0.9)
+    # Boxplotstatistik för alla länder (Matplotlib-bilden ritas ur den)
+    analyzer.boxplot_stats('NOC')
+    from .figure_cache import FigureCache
+    from .static_plots import StaticPlotRenderer
+
+    return {
+        'df': df,
+        'analyzer': analyzer,
+        # Serialiserade figurer per (callback, indata, datasetversion)
+        'figure_cache': FigureCache(compact=COMPACT_FIGURES, precision=FIGURE_PRECISION),
+        # Matplotlib-bilder renderas i en begränsad pool och cachas som PNG
+        'static_plots': StaticPlotRenderer(max_workers=int(os.environ.get('DASHBOARD_RENDER_WORKERS', '2'))),
+        'noc_options': analyzer.countries,
+        'sport_options': analyzer.sports,
+        'year_range': analyzer.year_range,
+        'fingerprint': fingerprint,
+        'applied_deltas': applied_deltas,
+    }
+
+
+state = DataState()
+state.start(_load_data)
+if os.environ.get('DASHBOARD_EAGER_LOAD') == '1':
+    # Vänta på datan vid import, t.ex. för skript och notebooks
+    state.wait()
+
+
+# Bara en tråd i taget lägger till nya spel; läsare tar ingen lås (se sync_dataset)
+_sync_lock = threading.Lock()
+
+
+def sync_dataset():
+    """
+    Lägger till spel som lagts till med append_delta, i vilken process som helst
+
+    Cachens manifest listar alla delfiler. När det ändras läser den här
+    processen bara de delfiler den inte redan har och lägger till dem i sin
+    analyser, så att alla workers får samma rader och samma fingeravtryck.
+    Oförändrat manifest kostar ett os.stat. Om källfilen bytts ut går det
+    inte att uppdatera inkrementellt - då krävs en omstart.
+
+    Returns:
+        bool: True om nya rader lades till
+    """
+    if not state.ready:
+        return False
+    from .data_loader import cache_paths, dataset_fingerprint, load_deltas, DASHBOARD_COLUMNS
+
+    try:
+        mtime = os.stat(cache_paths(data_path)['manifest']).st_mtime_ns
+    except OSError:
+        return False
+    if mtime == state.values.get('manifest_mtime'):
+        return False
+    with _sync_lock:
+        if mtime == state.values.get('manifest_mtime'):
+            return False
+        # Sätts först, så att en trasig delfil inte läses om vid varje anrop
+        state.values['manifest_mtime'] = mtime
+        applied = state.applied_deltas
+        frames, manifest = load_deltas(data_path, start=applied, columns=DASHBOARD_COLUMNS)
+        deltas = manifest.get('deltas', [])
+        if dataset_fingerprint({**manifest, 'deltas': deltas[:applied]}) != state.fingerprint:
+            return False
+        # Nya rader läggs till i en kopia medan förfrågningar läser den gamla
+        # analysern; allt byts sedan i en enda tilldelning av state.values
+        analyzer = state.analyzer.snapshot()
+        for frame in frames:
+            analyzer.append(frame)
+        state.values = {**state.values, 'analyzer': analyzer, 'df': analyzer.df,
+                        'noc_options': analyzer.countries, 'sport_options': analyzer.sports,
+                        'year_range': analyzer.year_range, 'fingerprint': dataset_fingerprint(manifest),
+                        'applied_deltas': len(deltas)}
+        return bool(frames)
+
+
+@app.server.before_request
+def _sync_before_request():
+    try:
+        sync_dataset()
+    except (OSError, ValueError, KeyError) as exc:
+        app.server.logger.warning("Kunde inte lägga till nya spel: %s", exc)
+
+
+def append_games(delta_path):
+    """
+    Lägger till nya spel (rader i samma format som athlete_events.csv) utan
+    att ladda om
+
+    Deltan anonymiseras och sparas bredvid cachen (append_delta) och läses in
+    här direkt (sync_dataset). Övriga workers ser det ändrade manifestet vid
+    nästa anrop och lägger till samma rader. Med ett delat lager byggs det
+    om, så att workers som startas om får raderna från början. Menyerna och
+    tidsreglaget följer med via data-version (datasetets fingeravtryck) vid
+    nästa poll.
+
+    Args:
+        delta_path (str): CSV eller Parquet med de nya raderna
+
+    Returns:
+        str: Datasetets nya fingeravtryck
+    """
+    if not state.ready:
+        raise RuntimeError("Datan är inte laddad än")
+    from .data_loader import append_delta, build_shared_store
+    append_delta(data_path, delta_path)
+    sync_dataset()
+    if shared_store:
+        build_shared_store(data_path, shared_store)
+    return state.fingerprint
+
+
+def placeholder_figure(text="Laddar data..."):
+    # Ren dict i stället för go.Figure: plotlys validering slår upp numpy/pandas
+    # i sys.modules och kan se halvt importerade moduler medan laddningstråden kör
+    return {'data': [], 'layout': {'annotations': [{'text': text, 'showarrow': False}],
+                                   'xaxis': {'visible': False}, 'yaxis': {'visible': False}}}
+
+
+def _not_ready_text():
+    return f"Fel vid laddning: {state.error}" if state.status == 'error' else "Laddar data..."
 
-year_min = int(df['Year'].min())
-year_max = int(df['Year'].max())
-year_marks = {year: str(year) for year in range(year_min, year_max + 1, 8)}
+
+@app.server.route('/ready')
+def ready():
+    """Readiness-endpoint: 200 när datan är laddad, annars 503 med framsteg."""
+    return jsonify(state.as_dict()), 200 if state.ready else 503
 
 # --- HJÄLPFUNKTIONER FÖR LAYOUT ---
 def draw_section_header(title, desc):
+    import dash_bootstrap_components as dbc
     return dbc.Row([
         dbc.Col([
             html.H2(title, className="display-6"),
@@ -52,202 +246,273 @@ def draw_card(content, title=None, **card_kwargs):
     defaults = {"className": "h-100 shadow-sm"}
     # Merge defaults with provided kwargs (kwargs override defaults)
     defaults.update(card_kwargs)
+    import dash_bootstrap_components as dbc
     return dbc.Card([
         dbc.CardHeader(title) if title else None,
         dbc.CardBody(content)
     ], **defaults)
 
 # --- LAYOUT ---
-app.layout = dbc.Container([
-    
-    # Huvudrubrik
-    dbc.Row([
-        dbc.Col(html.H1("Olympiska Spelen - Analys Dashboard", className="text-center my-5"), width=12)
-    ]),
-
-    # SEKTION 1: KANADA 3D (Behåll Plotly för interaktivitet)
-    draw_section_header("Spotlight: Kanada i 3D", 
-                        "Utforska idrottares fysiska profiler. Välj säsong och dra i tidsreglaget."),
-    
-    dbc.Row([
-        # Kontrollpanel (Vänster)
-        dbc.Col([
-            draw_card([
-                html.Label("Välj säsong", className="fw-bold"),
-                dcc.RadioItems(
-                    id='canada-season-filter',
-                    options=[
-                        {'label': ' Alla spel', 'value': 'All'},
-                        {'label': ' Sommarspel', 'value': 'Summer'},
-                        {'label': ' Vinterspel', 'value': 'Winter'}
-                    ],
-                    value='All',
-                    labelStyle={'display': 'block', 'margin-bottom': '5px'}
-                ),
-                html.Hr(),
-                html.Label("Filter", className="fw-bold"),
-                dcc.RadioItems(
-                    id='canada-medal-filter',
-                    options=[
-                        {'label': ' Alla deltagare', 'value': 'all'},
-                        {'label': ' Endast medaljörer', 'value': 'medal'}
-                    ],
-                    value='medal',
-                    labelStyle={'display': 'block', 'margin-bottom': '5px'}
-                ),
-                html.Hr(),
-                html.Label("Tidsperiod"),
-                dcc.RangeSlider(
-                    id='canada-year-range',
-                    min=year_min, max=year_max,
-                    value=[max(1980, year_min), year_max], # Starta lite senare för prestanda
-                    marks=None,
-                    tooltip={'placement': 'bottom', 'always_visible': True}
-                ),
-                html.Small("X=Ålder, Y=Längd, Z=Vikt", className="text-muted mt-2")
-            ], "Inställningar")
-        ], width=12, lg=3, className="mb-3"),
-
-        # Graf (Höger)
-        dbc.Col([
-            draw_card(dcc.Graph(id='canada-3d-profile', style={'height': '60vh'}), "3D Visualisering")
-        ], width=12, lg=9, className="mb-3")
-    ], className="mb-5"),
-
-    # SEKTION 2: LAND-ANALYS & MATPLOTLIB
-    draw_section_header("Uppgift 1 & Extra: Landstatistik & Matplotlib", 
-                        "Statistik för specifika länder (Plotly) och statisk fördjupning (Matplotlib)."),
-
-    dbc.Row([
-        dbc.Col([
-            html.Label("Välj land:", className="fw-bold"),
-            dcc.Dropdown(
-                id='country-dropdown',
-                options=[{'label': noc, 'value': noc} for noc in sorted(df['NOC'].unique())],
-                value='CAN',
-                clearable=False
-            )
-        ], width=12, md=6, className="mb-4")
-    ]),
-
-    # Plotly Grid
-    dbc.Row([
-        dbc.Col(draw_card(dcc.Graph(id='medals-by-sport')), width=12, md=6, className="mb-3"),
-        dbc.Col(draw_card(dcc.Graph(id='medals-per-year')), width=12, md=6, className="mb-3"),
-    ]),
-    dbc.Row([
-        dbc.Col(draw_card(dcc.Graph(id='age-histogram')), width=12, md=4, className="mb-3"),
-        dbc.Col(draw_card(dcc.Graph(id='medal-types')), width=12, md=4, className="mb-3"),
-        dbc.Col(draw_card(dcc.Graph(id='gender-distribution')), width=12, md=4, className="mb-3"),
-        
-        # --- HÄR ÄR MATPLOTLIB-GRAFEN ---
-        dbc.Col(draw_card([
-            html.H5("Matplotlib: Längd vs Vikt (Boxplot)", className="card-title"),
-            # Här injicerar vi bilden
-            html.Img(id='matplotlib-static-plot', style={'width': '100%', 'height': 'auto'})
-        ]), width=12, md=4, className="mb-3"),
-    ], className="mb-5"),
-
-    # SEKTION 3: SPORT-ANALYS
-    draw_section_header("Uppgift 2: Sportstatistik", "Detaljerad analys per sport."),
-    
-    dbc.Row([
-        dbc.Col([
-            html.Label("Välj sport:", className="fw-bold"),
-            dcc.Dropdown(
-                id='sport-dropdown',
-                options=[{'label': s, 'value': s} for s in sorted(df['Sport'].unique())],
-                value='Swimming',
-                clearable=False
-            )
-        ], width=12, md=6, className="mb-4")
-    ]),
-
-    dbc.Row([
-        dbc.Col(draw_card(dcc.Graph(id='sport-medals')), width=12, md=6, className="mb-3"),
-        dbc.Col(draw_card(dcc.Graph(id='sport-ages')), width=12, md=6, className="mb-3"),
-    ]),
-    dbc.Row([
-        dbc.Col(draw_card(dcc.Graph(id='sport-gender')), width=12, md=6, className="mb-3"),
-        dbc.Col(draw_card(dcc.Graph(id='sport-medal-types')), width=12, md=6, className="mb-3"),
-    ], className="mb-5"),
-
-    # SEKTION 4: GLOBALT RACE
-    draw_section_header("Global Medaljracet", "Animerad tidsresa."),
-    
-    dbc.Row([
-        dbc.Col(draw_card([
-            dbc.Row([
-                dbc.Col([
-                    html.Label("Säsong"),
+@functools.lru_cache(maxsize=None)
+def serve_layout():
+    """
+    Bygger sidans layout vid första sidladdningen i stället för vid import, så
+    att dash_bootstrap_components inte laddas förrän den behövs. Layouten beror
+    inte på datan (valen fylls i av update_data_status) och byggs bara en gång.
+    """
+    import dash_bootstrap_components as dbc
+    return dbc.Container([
+
+        # Huvudrubrik
+        dbc.Row([
+            dbc.Col(html.H1("Olympiska Spelen - Analys Dashboard", className="text-center my-5"), width=12)
+        ]),
+
+        # Laddningsstatus: pollar tills datan är klar, fyller sedan i valen och
+        # sätter data-version så att alla grafer ritas om. Efter laddningen pollas
+        # glesare så att nya spel (append_games) når redan öppna sidor
+        dcc.Interval(id='data-ready-poll', interval=1000),
+        dcc.Store(id='data-version'),
+        dbc.Alert(id='data-status', children="Laddar data...", color='info', className="text-center"),
+
+        # SEKTION 1: KANADA 3D (Behåll Plotly för interaktivitet)
+        draw_section_header("Spotlight: Kanada i 3D", 
+                            "Utforska idrottares fysiska profiler. Välj säsong och dra i tidsreglaget."),
+
+        dbc.Row([
+            # Kontrollpanel (Vänster)
+            dbc.Col([
+                draw_card([
+                    html.Label("Välj säsong", className="fw-bold"),
                     dcc.RadioItems(
-                        id='global-season-filter',
-                        options=[{'label': 'Sommar', 'value': 'Summer'}, {'label': 'Vinter', 'value': 'Winter'}],
-                        value='Summer',
-                        inline=True,
-                        inputStyle={"margin-left": "10px"}
-                    )
-                ], width=6),
-                dbc.Col([
-                    html.Label("Antal länder"),
-                    dcc.Slider(id='global-top-n-slider', min=5, max=15, step=1, value=10)
-                ], width=6)
-            ])
-        ], className="mb-3"), width=12)
-    ]),
-    
-    dbc.Row([
-        dbc.Col(draw_card(dcc.Graph(id='global-medal-race')), width=12)
-    ], className="mb-5")
-
-], fluid=True) # Fluid=True gör att containern fyller bredden snyggt
+                        id='canada-season-filter',
+                        options=[
+                            {'label': ' Alla spel', 'value': 'All'},
+                            {'label': ' Sommarspel', 'value': 'Summer'},
+                            {'label': ' Vinterspel', 'value': 'Winter'}
+                        ],
+                        value='All',
+                        labelStyle={'display': 'block', 'margin-bottom': '5px'}
+                    ),
+                    html.Hr(),
+                    html.Label("Filter", className="fw-bold"),
+                    dcc.RadioItems(
+                        id='canada-medal-filter',
+                        options=[
+                            {'label': ' Alla deltagare', 'value': 'all'},
+                            {'label': ' Endast medaljörer', 'value': 'medal'}
+                        ],
+                        value='medal',
+                        labelStyle={'display': 'block', 'margin-bottom': '5px'}
+                    ),
+                    html.Hr(),
+                    html.Label("Tidsperiod"),
+                    dcc.RangeSlider(
+                        id='canada-year-range',
+                        min=DEFAULT_YEAR_RANGE[0], max=DEFAULT_YEAR_RANGE[1],
+                        value=[1980, DEFAULT_YEAR_RANGE[1]], # Starta lite senare för prestanda
+                        marks=None,
+                        tooltip={'placement': 'bottom', 'always_visible': True}
+                    ),
+                    html.Small("X=Ålder, Y=Längd, Z=Vikt", className="text-muted mt-2")
+                ], "Inställningar")
+            ], width=12, lg=3, className="mb-3"),
+
+            # Graf (Höger)
+            dbc.Col([
+                draw_card(dcc.Graph(id='canada-3d-profile', style={'height': '60vh'}), "3D Visualisering"),
+                # Profilen i kolumnform - filtreras och ritas i webbläsaren
+                dcc.Store(id='canada-profile-data')
+            ], width=12, lg=9, className="mb-3")
+        ], className="mb-5"),
+
+        # SEKTION 2: LAND-ANALYS & MATPLOTLIB
+        draw_section_header("Uppgift 1 & Extra: Landstatistik & Matplotlib", 
+                            "Statistik för specifika länder (Plotly) och statisk fördjupning (Matplotlib)."),
+
+        dbc.Row([
+            dbc.Col([
+                html.Label("Välj land:", className="fw-bold"),
+                dcc.Dropdown(
+                    id='country-dropdown',
+                    options=[{'label': 'CAN', 'value': 'CAN'}],
+                    value='CAN',
+                    clearable=False
+                )
+            ], width=12, md=6, className="mb-4")
+        ]),
+
+        # Plotly Grid
+        dbc.Row([
+            dbc.Col(draw_card(dcc.Graph(id='medals-by-sport')), width=12, md=6, className="mb-3"),
+            dbc.Col(draw_card(dcc.Graph(id='medals-per-year')), width=12, md=6, className="mb-3"),
+        ]),
+        dbc.Row([
+            dbc.Col(draw_card(dcc.Graph(id='age-histogram')), width=12, md=4, className="mb-3"),
+            dbc.Col(draw_card(dcc.Graph(id='medal-types')), width=12, md=4, className="mb-3"),
+            dbc.Col(draw_card(dcc.Graph(id='gender-distribution')), width=12, md=4, className="mb-3"),
+
+            # --- HÄR ÄR MATPLOTLIB-GRAFEN ---
+            dbc.Col(draw_card([
+                html.H5("Matplotlib: Längd vs Vikt (Boxplot)", className="card-title"),
+                # Här injicerar vi bilden
+                html.Img(id='matplotlib-static-plot', style={'width': '100%', 'height': 'auto'})
+            ]), width=12, md=4, className="mb-3"),
+        ], className="mb-5"),
+
+        # SEKTION 3: SPORT-ANALYS
+        draw_section_header("Uppgift 2: Sportstatistik", "Detaljerad analys per sport."),
+
+        dbc.Row([
+            dbc.Col([
+                html.Label("Välj sport:", className="fw-bold"),
+                dcc.Dropdown(
+                    id='sport-dropdown',
+                    options=[{'label': 'Swimming', 'value': 'Swimming'}],
+                    value='Swimming',
+                    clearable=False
+                )
+            ], width=12, md=6, className="mb-4")
+        ]),
+
+        dbc.Row([
+            dbc.Col(draw_card(dcc.Graph(id='sport-medals')), width=12, md=6, className="mb-3"),
+            dbc.Col(draw_card(dcc.Graph(id='sport-ages')), width=12, md=6, className="mb-3"),
+        ]),
+        dbc.Row([
+            dbc.Col(draw_card(dcc.Graph(id='sport-gender')), width=12, md=6, className="mb-3"),
+            dbc.Col(draw_card(dcc.Graph(id='sport-medal-types')), width=12, md=6, className="mb-3"),
+        ], className="mb-5"),
+
+        # SEKTION 4: GLOBALT RACE
+        draw_section_header("Global Medaljracet", "Animerad tidsresa."),
+
+        dbc.Row([
+            dbc.Col(draw_card([
+                dbc.Row([
+                    dbc.Col([
+                        html.Label("Säsong"),
+                        dcc.RadioItems(
+                            id='global-season-filter',
+                            options=[{'label': 'Sommar', 'value': 'Summer'}, {'label': 'Vinter', 'value': 'Winter'}],
+                            value='Summer',
+                            inline=True,
+                            inputStyle={"margin-left": "10px"}
+                        )
+                    ], width=6),
+                    dbc.Col([
+                        html.Label("Antal länder"),
+                        dcc.Slider(id='global-top-n-slider', min=5, max=15, step=1, value=10)
+                    ], width=6)
+                ])
+            ], className="mb-3"), width=12)
+        ]),
+
+        dbc.Row([
+            dbc.Col(draw_card(dcc.Graph(id='global-medal-race')), width=12)
+        ], className="mb-5")
+
+    ], fluid=True) # Fluid=True gör att containern fyller bredden snyggt
+
+
+
+# Dash bygger annars en valideringslayout genom att anropa funktionen direkt vid
+# tilldelningen. Layouten är densamma vid varje sidladdning, så webbläsaren kan
+# validera callbacks mot den riktiga layouten och funktionen anropas först vid
+# första requesten
+_suppress = app.config.suppress_callback_exceptions
+app.config.suppress_callback_exceptions = True
+app.layout = serve_layout
+app.config.suppress_callback_exceptions = _suppress
 
 
 # --- CALLBACKS ---
 
+@app.callback(
+    [Output('country-dropdown', 'options'),
+     Output('sport-dropdown', 'options'),
+     Output('canada-year-range', 'min'),
+     Output('canada-year-range', 'max'),
+     Output('canada-year-range', 'value'),
+     Output('data-ready-poll', 'disabled'),
+     Output('data-ready-poll', 'interval'),
+     Output('data-status', 'children'),
+     Output('data-status', 'is_open'),
+     Output('data-version', 'data')],
+    Input('data-ready-poll', 'n_intervals'),
+    State('data-version', 'data')
+)
+@metrics.timed_callback
+def update_data_status(_, current_version=None):
+    if not state.ready:
+        status = state.as_dict()
+        text = _not_ready_text() if state.error else f"Laddar data... {status['step']} ({status['progress']:.0%})"
+        no_update = [dash.no_update] * 5
+        return no_update + [state.status == 'error', dash.no_update, text, True, dash.no_update]
+
+    # Fingeravtrycket är detsamma i alla workers, oavsett vilken som svarar
+    version = state.fingerprint
+    if version == current_version:
+        # Inget nytt sedan förra pollen
+        return [dash.no_update] * 10
+
+    year_min, year_max = state.year_range
+    return ([{'label': noc, 'value': noc} for noc in state.noc_options],
+            [{'label': s, 'value': s} for s in state.sport_options],
+            year_min, year_max, [max(1980, year_min), year_max],
+            DATA_POLL_INTERVAL_MS == 0, DATA_POLL_INTERVAL_MS or dash.no_update, "", False, version)
+
+
 # Ny callback för Matplotlib
 @app.callback(
     Output('matplotlib-static-plot', 'src'),
-    Input('country-dropdown', 'value')
+    [Input('country-dropdown', 'value'), Input('data-version', 'data')]
 )
-def update_matplotlib_plot(country):
+@metrics.timed_callback
+def update_matplotlib_plot(country, data_version=None):
     """
-    Genererar en statisk Matplotlib-figur och returnerar den som en bildsträng.
-    Vi visualiserar fördelning av Vikt och Längd för det valda landet.
+    Returnerar URL:en till en statisk Matplotlib-figur för det valda landet.
+    Bilden renderas och cachas av /static-plots/<land>.png, så svaret från
+    callbacken är bara en kort sträng i stället för en base64-kodad PNG.
     """
-    # Filtrera data
-    country_df = df[df['NOC'] == country].dropna(subset=['Height', 'Weight'])
-    
-    if country_df.empty:
+    if not state.ready or state.analyzer.country_report(country).body.loc['count', 'Height'] == 0:
         return "" # Ingen bild om data saknas
 
-    # 1. Skapa Matplotlib figuren
-    fig, ax1 = plt.subplots(figsize=(6, 5))
-    
-    # Data to plot
-    data_to_plot = [country_df['Height'], country_df['Weight']]
-    
-    # Skapa en boxplot
-    parts = ax1.boxplot(data_to_plot, patch_artist=True, 
-                        labels=['Längd (cm)', 'Vikt (kg)'])
-    
-    # Styling (Matplotlib style)
-    colors = ['#2A9D8F', '#E9C46A']
-    for patch, color in zip(parts['boxes'], colors):
-        patch.set_facecolor(color)
-    
-    ax1.set_title(f'Fysisk fördelning: {country}')
-    ax1.grid(True, linestyle='--', alpha=0.7)
-    
-    # 2. Spara figuren till en buffer (i minnet)
-    buf = io.BytesIO()
-    plt.tight_layout()
-    plt.savefig(buf, format="png")
-    plt.close(fig) # Stäng figuren för att spara minne
-    
-    # 3. Konvertera till base64-sträng
-    data = base64.b64encode(buf.getbuffer()).decode("utf8")
-    return f"data:image/png;base64,{data}"
+    # Fingeravtrycket i URL:en är detsamma i alla workers och ändras med datan,
+    # så webbläsaren kan cacha bilden tills datan ändras
+    return app.get_relative_path(f"/static-plots/{country}.png?v={state.fingerprint}")
+
+
+def _render_country_png(country):
+    """
+    Vi visualiserar fördelning av Vikt och Längd för det valda landet,
+    ritad ur analyserns förberäknade boxplotstatistik.
+    """
+    from .static_plots import render_body_boxplot
+
+    stats = state.analyzer.boxplot_stats('NOC')
+    if country not in stats.index.get_level_values(0):
+        return None
+    return render_body_boxplot(country, stats.loc[country])
+
+
+@app.server.route('/static-plots/<country>.png')
+def serve_static_plot(country):
+    if not state.ready:
+        abort(503)
+    if country not in state.noc_options:
+        # Okända länder cachas inte, annars kan godtyckliga URL:er fylla cachen
+        abort(404)
+    png = state.static_plots.get_png((country, state.fingerprint), lambda: _render_country_png(country))
+    if png is None:
+        abort(404)
+    response = Response(png, mimetype='image/png')
+    if request.args.get('v') == state.fingerprint:
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        # Annan (eller ingen) version i URL:en - bilden får inte cachas under den
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 
 # --- BEFINTLIGA CALLBACKS (Oförändrade förutom inputs om namn ändrats) ---
@@ -258,11 +523,34 @@ def update_matplotlib_plot(country):
      Output('age-histogram', 'figure'),
      Output('medal-types', 'figure'),
      Output('gender-distribution', 'figure')],
-    Input('country-dropdown', 'value')
+    [Input('country-dropdown', 'value'), Input('data-version', 'data')]
 )
-def update_country_plots(country):
+@metrics.timed_callback
+def update_country_plots(country, data_version=None):
+    if not state.ready: return tuple(placeholder_figure(_not_ready_text()) for _ in range(5))
+    return state.figure_cache.get_or_render('country', (country,), state.analyzer.data_version,
+                                            lambda: _render_country_plots(country))
+
+def _age_histogram_figure(histogram, color):
+    """Stapeldiagram över antal per åldersintervall (se OlympicAnalyzer.age_histogram)."""
+    edges = state.analyzer.age_bin_edges
+    width = int(edges[1] - edges[0])
+    starts = histogram.index.to_numpy()
+    labels = [f"{start}-{start + width - 1}" if width > 1 else str(start) for start in starts]
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Bar(x=starts + width / 2, y=histogram.to_numpy(), width=width, customdata=labels,
+                           marker_color=color, hovertemplate='Ålder %{customdata}<br>Antal %{y}<extra></extra>'))
+    fig.update_layout(title='Åldersfördelning', template='plotly_white', bargap=0.05, showlegend=False,
+                      xaxis_title='Ålder', yaxis_title='Antal', margin=dict(l=0, r=0, t=40, b=0))
+    return fig
+
+def _render_country_plots(country):
+    import plotly.express as px
+    # Alla landsaggregat i ett anrop (delas med Matplotlib-callbacken via resultatcachen)
+    report = state.analyzer.country_report(country)
+
     # Top sports
-    top_sports = analyzer.top_sports_by_medals(country)
+    top_sports = report.top_sports
     top_sports_df = top_sports.reset_index()
     top_sports_df.columns = ['Sport', 'Medals']
     fig1 = px.bar(top_sports_df, x='Medals', y='Sport', orientation='h',
@@ -270,7 +558,7 @@ def update_country_plots(country):
     fig1.update_layout(yaxis={'categoryorder':'total ascending'}, margin=dict(l=0, r=0, t=40, b=0))
     
     # Medals per Olympics
-    medals_year = analyzer.medals_per_olympics(country)
+    medals_year = report.medals_per_year
     medals_year_df = medals_year.reset_index()
     medals_year_df.columns = ['Year', 'Medals']
     fig2 = px.line(medals_year_df, x='Year', y='Medals', markers=True,
@@ -278,20 +566,17 @@ def update_country_plots(country):
     fig2.update_traces(line_color='#264653')
     fig2.update_layout(margin=dict(l=0, r=0, t=40, b=0))
     
-    # Age histogram
-    ages = analyzer.age_distribution(country)
-    fig3 = px.histogram(ages, nbins=20, title='Åldersfördelning', 
-                        template='plotly_white', color_discrete_sequence=['#2A9D8F'])
-    fig3.update_layout(showlegend=False, margin=dict(l=0, r=0, t=40, b=0))
+    # Age histogram (förberäknade intervall, ett 20-tal staplar i stället för alla åldrar)
+    fig3 = _age_histogram_figure(report.age_histogram, '#2A9D8F')
     
     # Medal types
-    medal_stats = analyzer.get_medal_statistics(country)
+    medal_stats = report.medal_types
     fig4 = px.pie(values=medal_stats.values, names=medal_stats.index, title='Medaljtyper',
                   color_discrete_map={'Gold': '#FFD700', 'Silver': '#C0C0C0', 'Bronze': '#CD7F32'})
     fig4.update_layout(margin=dict(l=0, r=0, t=40, b=0))
     
     # Gender distribution
-    gender_stats = analyzer.gender_distribution(country)
+    gender_stats = report.gender
     fig5 = px.pie(values=gender_stats.values, names=gender_stats.index, title='Könsfördelning',
                   color_discrete_map={'M': '#4ECDC4', 'F': '#FF6B6B'})
     fig5.update_layout(margin=dict(l=0, r=0, t=40, b=0))
@@ -303,12 +588,21 @@ def update_country_plots(country):
      Output('sport-ages', 'figure'),
      Output('sport-gender', 'figure'),
      Output('sport-medal-types', 'figure')],
-    Input('sport-dropdown', 'value')
+    [Input('sport-dropdown', 'value'), Input('data-version', 'data')]
 )
-def update_sport_plots(sport):
-    if not sport: return go.Figure(), go.Figure(), go.Figure(), go.Figure()
-    
-    analysis = analyzer.sport_analysis(sport)
+@metrics.timed_callback
+def update_sport_plots(sport, data_version=None):
+    if not state.ready: return tuple(placeholder_figure(_not_ready_text()) for _ in range(4))
+    if not sport:
+        import plotly.graph_objects as go
+        return go.Figure(), go.Figure(), go.Figure(), go.Figure()
+    return state.figure_cache.get_or_render('sport', (sport,), state.analyzer.data_version,
+                                            lambda: _render_sport_plots(sport))
+
+def _render_sport_plots(sport):
+    import plotly.express as px
+
+    analysis = state.analyzer.sport_analysis(sport)
     
     # Medal distribution
     mc = analysis['medal_countries'].head(10)
@@ -316,9 +610,7 @@ def update_sport_plots(sport):
     fig1.update_layout(yaxis={'categoryorder':'total ascending'}, margin=dict(l=0, r=0, t=40, b=0))
 
     # Age
-    fig2 = px.histogram(analysis['age_distribution'], nbins=20, title='Åldersfördelning',
-                        color_discrete_sequence=['#E76F51'], template='plotly_white')
-    fig2.update_layout(margin=dict(l=0, r=0, t=40, b=0))
+    fig2 = _age_histogram_figure(state.analyzer.sport_age_histogram(sport), '#E76F51')
 
     # Gender
     gs = analysis['gender_split']
@@ -334,50 +626,179 @@ def update_sport_plots(sport):
     
     return fig1, fig2, fig3, fig4
 
+# Medaljkategorier i 3D-figuren: namn, punktstorlek och färg
+PROFILE_MEDALS = ['Gold', 'Silver', 'Bronze', 'Ingen medalj']
+PROFILE_SIZES = [15, 12, 10, 6]
+PROFILE_COLORS = ['#FFD700', '#C0C0C0', '#CD7F32', '#264653']
+
+
+def _compact_numbers(values):
+    # Heltal skrivs utan decimaler i JSON, övriga avrundas till en decimal
+    import numpy as np
+    values = values.to_numpy(dtype='float64')
+    if np.array_equal(values, np.round(values)):
+        return values.astype('int64').tolist()
+    return np.round(values, 1).tolist()
+
+
+def canada_profile_data(country='CAN'):
+    """
+    Landets atletprofil i kolumnform för klientsidans 3D-figur
+
+    Skickas till webbläsaren en gång per datasetversion. Varje (år, säsong)
+    gallras till PROFILE_MAX_POINTS punkter (alla medaljörer behålls), så
+    säsongs-, medalj- och årsfiltret kan göras helt i webbläsaren.
+    Textkolumner skickas som koder in i listorna seasons, medals och events.
+
+    Args:
+        country (str): NOC-kod
+
+    Returns:
+        dict: Kolumner (year, season, medal, age, height, weight, event) som listor
+    """
+    import pandas as pd
+
+    parts = []
+    for season in ('Summer', 'Winter'):
+        parts += state.analyzer.profile_frames(country, season=season, max_points=PROFILE_MAX_POINTS).values()
+    columns = ['Year', 'Season', 'Medal', 'Age', 'Height', 'Weight', 'Event']
+    profile = pd.concat(parts)[columns] if parts else pd.DataFrame(columns=columns)
+    profile = profile.sort_values('Year', kind='stable')
+
+    event_codes, events = pd.factorize(profile['Event'].astype(object))
+    medals = profile['Medal'].astype(object).map({name: i for i, name in enumerate(PROFILE_MEDALS)})
+    return {
+        'year': profile['Year'].astype('int64').tolist(),
+        'season': profile['Season'].astype(object).map({'Summer': 0, 'Winter': 1}).astype('int64').tolist(),
+        'medal': medals.fillna(PROFILE_MEDALS.index('Ingen medalj')).astype('int64').tolist(),
+        'age': _compact_numbers(profile['Age']),
+        'height': _compact_numbers(profile['Height']),
+        'weight': _compact_numbers(profile['Weight']),
+        'event': event_codes.tolist(),
+        'events': [str(event) for event in events],
+        'seasons': ['Summer', 'Winter'],
+        'medals': PROFILE_MEDALS,
+        'sizes': PROFILE_SIZES,
+        'colors': PROFILE_COLORS,
+        # Samma skalning av punktstorleken som plotly.express (sizemode='area')
+        'sizeref': 2.0 * max(PROFILE_SIZES) / 40 ** 2,
+    }
+
+
 @app.callback(
-    Output('canada-3d-profile', 'figure'),
-    [Input('canada-season-filter', 'value'), Input('canada-medal-filter', 'value'), Input('canada-year-range', 'value')]
+    Output('canada-profile-data', 'data'),
+    Input('data-version', 'data')
 )
-def update_canada_3d(season, medal_filter, year_range):
-    medal_only = medal_filter == 'medal'
-    # NOTERA: Här antar jag att analyzer-funktionen finns. Om inte, hantera felet.
-    try:
-        profile_df = analyzer.country_athlete_profile('CAN', season=season, medal_only=medal_only)
-    except Exception:
-        # Fallback om metoden inte finns exakt som anropat
-        return go.Figure()
+@metrics.timed_callback
+def update_canada_profile_data(data_version=None):
+    if not state.ready: return None
+    return state.figure_cache.get_or_render('canada-profile', ('CAN',), state.analyzer.data_version,
+                                            lambda: canada_profile_data('CAN'))
 
-    if year_range:
-        profile_df = profile_df[(profile_df['Year'] >= year_range[0]) & (profile_df['Year'] <= year_range[1])]
 
-    if profile_df.empty:
-        fig = go.Figure()
-        fig.add_annotation(text="Ingen data", showarrow=False)
-        return fig
-
-    size_map = {'Gold': 15, 'Silver': 12, 'Bronze': 10, 'Ingen medalj': 6}
-    medal_disp = profile_df['Medal'].fillna('Ingen medalj')
-    profile_df['Size'] = medal_disp.map(size_map).fillna(5)
-    
-    color_map = {'Gold': '#FFD700', 'Silver': '#C0C0C0', 'Bronze': '#CD7F32', 'Ingen medalj': '#264653'}
-    
-    fig = px.scatter_3d(
-        profile_df, x='Age', y='Height', z='Weight',
-        color=medal_disp, size='Size', hover_name='Event',
-        color_discrete_map=color_map,
-        title="Kanadensiska Atleter (3D)",
-        animation_frame='Year'
-    )
-    fig.update_layout(margin=dict(l=0, r=0, t=40, b=0), scene_camera=dict(eye=dict(x=1.5, y=1.5, z=1)))
-    return fig
+# Filtrering och figur för 3D-sektionen körs i webbläsaren: säsong, medaljfilter
+# och tidsreglaget kostar varken server-CPU eller nätverk
+app.clientside_callback(
+    """
+    function(season, medalFilter, yearRange, data) {
+        var empty = function(text) {
+            return {data: [], layout: {annotations: [{text: text, showarrow: false}],
+                                       xaxis: {visible: false}, yaxis: {visible: false}}};
+        };
+        if (!data) { return empty('Laddar data...'); }
+        var low = yearRange ? yearRange[0] : -Infinity;
+        var high = yearRange ? yearRange[1] : Infinity;
+        var noMedal = data.medals.length - 1;
+        var byYear = {};
+        var used = data.medals.map(function() { return false; });
+        for (var i = 0; i < data.year.length; i++) {
+            var year = data.year[i];
+            var medal = data.medal[i];
+            if (year < low || year > high) { continue; }
+            if (season && season !== 'All' && data.seasons[data.season[i]] !== season) { continue; }
+            if (medalFilter === 'medal' && medal === noMedal) { continue; }
+            if (!byYear[year]) {
+                byYear[year] = data.medals.map(function() { return {x: [], y: [], z: [], text: []}; });
+            }
+            var group = byYear[year][medal];
+            group.x.push(data.age[i]);
+            group.y.push(data.height[i]);
+            group.z.push(data.weight[i]);
+            group.text.push(data.events[data.event[i]]);
+            used[medal] = true;
+        }
+        var years = Object.keys(byYear).map(Number).sort(function(a, b) { return a - b; });
+        if (!years.length) { return empty('Ingen data'); }
+
+        var traces = function(year) {
+            var result = [];
+            data.medals.forEach(function(name, medal) {
+                if (!used[medal]) { return; }
+                var group = byYear[year][medal];
+                result.push({
+                    type: 'scatter3d', mode: 'markers', name: name, legendgroup: name,
+                    x: group.x, y: group.y, z: group.z, hovertext: group.text,
+                    hovertemplate: '<b>%{hovertext}</b><br><br>Age=%{x}<br>Height=%{y}<br>Weight=%{z}<extra></extra>',
+                    marker: {color: data.colors[medal], size: data.sizes[medal], sizemode: 'area',
+                             sizeref: data.sizeref, symbol: 'circle'}
+                });
+            });
+            return result;
+        };
+        var frames = years.map(function(year) { return {name: String(year), data: traces(year)}; });
+        var step = {mode: 'immediate', frame: {duration: 0, redraw: true}, transition: {duration: 0}};
+        return {
+            data: frames[0].data,
+            frames: frames,
+            layout: {
+                title: {text: 'Kanadensiska Atleter (3D)'},
+                margin: {l: 0, r: 0, t: 40, b: 0},
+                legend: {title: {text: 'Medalj'}},
+                scene: {xaxis: {title: {text: 'Age'}}, yaxis: {title: {text: 'Height'}},
+                        zaxis: {title: {text: 'Weight'}}, camera: {eye: {x: 1.5, y: 1.5, z: 1}}},
+                sliders: [{
+                    active: 0, len: 0.9, x: 0.1, pad: {b: 10, t: 60}, currentvalue: {prefix: 'Year='},
+                    steps: years.map(function(year) {
+                        return {label: String(year), method: 'animate', args: [[String(year)], step]};
+                    })
+                }],
+                updatemenus: [{
+                    type: 'buttons', direction: 'left', showactive: false, x: 0.1, y: 0,
+                    xanchor: 'right', yanchor: 'top', pad: {r: 10, t: 70},
+                    buttons: [
+                        {label: '&#9654;', method: 'animate',
+                         args: [null, {mode: 'immediate', fromcurrent: true,
+                                       frame: {duration: 500, redraw: true}, transition: {duration: 500}}]},
+                        {label: '&#9724;', method: 'animate', args: [[null], step]}
+                    ]
+                }]
+            }
+        };
+    }
+    """,
+    Output('canada-3d-profile', 'figure'),
+    [Input('canada-season-filter', 'value'), Input('canada-medal-filter', 'value'),
+     Input('canada-year-range', 'value'), Input('canada-profile-data', 'data')]
+)
 
 @app.callback(
     Output('global-medal-race', 'figure'),
-    [Input('global-season-filter', 'value'), Input('global-top-n-slider', 'value')]
+    [Input('global-season-filter', 'value'), Input('global-top-n-slider', 'value'), Input('data-version', 'data')]
 )
-def update_global_race(season, top_n):
+@metrics.timed_callback
+def update_global_race(season, top_n, data_version=None):
+    if not state.ready: return placeholder_figure(_not_ready_text())
+    # Rankningen är förberäknad i analysern; figuren (med alla animationsrutor)
+    # cachas per (säsong, top_n) så att reglaget inte kostar någon aggregering
+    return state.figure_cache.get_or_render('race', (season, top_n), state.analyzer.data_version,
+                                            lambda: _render_global_race(season, top_n))
+
+def _render_global_race(season, top_n):
+    import plotly.express as px
+    import plotly.graph_objects as go
+
     try:
-        data = analyzer.global_medal_race(season=season, top_n=top_n)
+        data = state.analyzer.global_medal_race(season=season, top_n=top_n)
     except:
         return go.Figure()
         
@@ -389,5 +810,29 @@ def update_global_race(season, top_n):
                       margin=dict(l=0, r=0, t=40, b=0))
     return fig
 
+def warm_figure_cache(background=True):
+    """
+    Förrenderar landets och sportens figurer för alla val i dropdown-menyerna,
+    samt medaljracet för alla säsonger och lägen på top_n-reglaget.
+    Slås på med miljövariabeln DASHBOARD_WARM_CACHE=1.
+    """
+    state.wait()
+    if not state.ready:
+        return None
+    # Alla landsrapporter och sporternas åldershistogram i ett svep, figurerna läser dem ur resultatcachen
+    state.analyzer.country_reports()
+    state.analyzer.age_histograms('Sport')
+    jobs = [lambda season=season, top_n=top_n: update_global_race(season, top_n)
+            for season in ('Summer', 'Winter') for top_n in range(5, 16)]
+    jobs += [lambda noc=noc: update_country_plots(noc) for noc in state.noc_options]
+    jobs += [lambda sport=sport: update_sport_plots(sport) for sport in state.sport_options]
+    return state.figure_cache.warm_up(jobs, background=background)
+
+
+if os.environ.get('DASHBOARD_WARM_CACHE') == '1':
+    # Körs i egen tråd eftersom den väntar på att datan laddats klart
+    threading.Thread(target=warm_figure_cache, kwargs={'background': False},
+                     name='figure-cache-warmup', daemon=True).start()
+
 if __name__ == '__main__':
     app.run_server(debug=True, port=8050)
\ No newline at end of file
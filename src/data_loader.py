@@ -6,40 +6,691 @@ import pandas as pd
 # Python standard library hashlib for SHA-256 hashing
 # Documentation: https://docs.python.org/3/library/hashlib.html
 import hashlib
+import json
 import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
 
-def load_and_anonymize_data(filepath: str) -> pd.DataFrame:
+# NumPy for numerical operations
+# Documentation: https://numpy.org/doc/
+# Version: 1.26.2
+import numpy as np
+
+# Parallell hashning lönar sig först när det finns många unika namn
+PARALLEL_HASH_MIN_UNIQUES = 200_000
+
+# Version för cacheformatet. Höj när kolumner eller anonymisering ändras,
+# så att gamla cachefiler ignoreras och byggs om från CSV.
+CACHE_SCHEMA_VERSION = 2
+
+# Explicit dtype-schema för den kompakta ramen. Strängkolumner med låg
+# kardinalitet blir kategorier, numeriska kolumner krymps till minsta typ
+# som rymmer värdena (Year 1896-2016, ID < 2^31, mått med några decimaler).
+CATEGORY_COLUMNS = ['Sex', 'Team', 'NOC', 'Games', 'Season', 'City', 'Sport', 'Event', 'Medal', 'Name_hash']
+COMPACT_NUMERIC_DTYPES = {
+    'ID': 'int32',
+    'Age': 'float32',
+    'Height': 'float32',
+    'Weight': 'float32',
+    'Year': 'int16',
+}
+
+# Kolumner som dashboarden och OlympicAnalyzer faktiskt använder
+DASHBOARD_COLUMNS = ['Sex', 'Age', 'Height', 'Weight', 'NOC', 'Year', 'Season', 'Sport', 'Event', 'Medal', 'Name_hash']
+
+# Rader per block vid strömmande inläsning (ingest_csv). Styr toppminnet.
+INGEST_CHUNK_ROWS = 200_000
+
+# Fasta dtypes vid blockvis läsning, så att alla block får samma schema
+# (annars kan t.ex. ett block utan medaljer tolka Medal som float)
+_CSV_FLOAT_COLUMNS = ['Age', 'Height', 'Weight']
+_CSV_INT_COLUMNS = ['ID', 'Year']
+
+
+def _hash_names(names: Sequence) -> List[str]:
+    # SHA-256 hashing for GDPR-compliant anonymization
+    # Reference: Python hashlib documentation - https://docs.python.org/3/library/hashlib.html
+    return [hashlib.sha256(str(x).encode()).hexdigest()[:16] for x in names]
+
+
+def anonymize_names(series: pd.Series, workers: Optional[int] = None) -> pd.Series:
+    """
+    Hashar namn med SHA-256 (första 16 tecknen), en gång per unikt namn
+
+    Samma idrottare förekommer en gång per gren de deltagit i, så namnen
+    faktoriseras till heltalskoder, varje unikt namn hashas en gång och
+    resultatet mappas tillbaka via koderna. Resultatet är identiskt med
+    `series.apply(lambda x: hashlib.sha256(str(x).encode()).hexdigest()[:16])`.
+
+    Args:
+        series (pd.Series): Kolumn med namn
+        workers (int | None): Antal processer för hashningen. Används bara
+            när antalet unika namn är minst PARALLEL_HASH_MIN_UNIQUES.
+
+    Returns:
+        pd.Series: Hashade namn med samma index som indata
+    """
+    codes, uniques = pd.factorize(series)
+    uniques = uniques.tolist()
+    if not uniques:
+        # Tom serie eller bara saknade värden - inget att deduplicera
+        return series.apply(lambda x: _hash_names([x])[0])
+
+    if workers and workers > 1 and len(uniques) >= PARALLEL_HASH_MIN_UNIQUES:
+        chunk_size = -(-len(uniques) // workers)
+        chunks = [uniques[i:i + chunk_size] for i in range(0, len(uniques), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            digests = [digest for part in pool.map(_hash_names, chunks) for digest in part]
+    else:
+        digests = _hash_names(uniques)
+
+    # Index-konstruktionen ger samma dtype som apply() skulle ha gett
+    hashed = pd.Series(pd.Index(digests).take(codes, allow_fill=True),
+                       index=series.index, name=series.name)
+
+    # Saknade värden (kod -1) hashas som str(x), precis som tidigare ('nan', 'None')
+    missing = codes == -1
+    if missing.any():
+        hashed[missing] = _hash_names(series[missing])
+
+    return hashed
+
+
+def _categorize(df: pd.DataFrame) -> pd.DataFrame:
+    columns = [col for col in CATEGORY_COLUMNS if col in df.columns and df[col].dtype != 'category']
+    if not columns:
+        return df
+    return df.astype({col: 'category' for col in columns})
+
+
+def _expand(df: pd.DataFrame) -> pd.DataFrame:
+    # Tillbaka till samma dtypes som pd.read_csv ger (strängar, int64, float64)
+    dtypes = {}
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            dtypes[col] = df[col].cat.categories.dtype
+        elif col in COMPACT_NUMERIC_DTYPES:
+            wide = 'float64' if df[col].dtype.kind == 'f' else 'int64'
+            if df[col].dtype != wide:
+                dtypes[col] = wide
+    return df.astype(dtypes) if dtypes else df
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Konverterar en DataFrame till det kompakta dtype-schemat
+
+    Strängkolumner i CATEGORY_COLUMNS blir kategorier och numeriska kolumner
+    krymps enligt COMPACT_NUMERIC_DTYPES. Kolumner som saknas hoppas över.
+
+    Args:
+        df (pd.DataFrame): DataFrame med olympisk data
+
+    Returns:
+        pd.DataFrame: Ny DataFrame med kompakta dtypes
+    """
+    df = _categorize(df)
+    numeric = {col: dtype for col, dtype in COMPACT_NUMERIC_DTYPES.items() if col in df.columns}
+    return df.astype(numeric) if numeric else df
+
+
+def memory_report(df: pd.DataFrame, compact: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Minnesanvändning per kolumn före och efter det kompakta schemat
+
+    Args:
+        df (pd.DataFrame): DataFrame som den laddas från CSV
+        compact (pd.DataFrame | None): Kompakt version, beräknas om den saknas
+
+    Returns:
+        pd.DataFrame: Kolumnerna before, after (bytes), saved och ratio,
+            med en rad per kolumn och en totalrad ('Total')
+    """
+    if compact is None:
+        compact = compact_frame(df)
+
+    report = pd.DataFrame({
+        'before': df.memory_usage(index=False, deep=True),
+        'after': compact.memory_usage(index=False, deep=True),
+    }).fillna(0).astype('int64')
+    report.loc['Total'] = report.sum()
+    report['saved'] = report['before'] - report['after']
+    report['ratio'] = (report['after'] / report['before']).round(3)
+    return report
+
+
+def cache_paths(filepath: str) -> Dict[str, str]:
+    """
+    Sökvägar till den kolumnära cachen som ligger bredvid CSV-filen
+
+    Args:
+        filepath (str): Sökväg till CSV-filen
+
+    Returns:
+        dict: 'data' (Parquet-fil) och 'manifest' (JSON med fingeravtryck)
+    """
+    stem = os.path.splitext(filepath)[0]
+    return {
+        'data': stem + '.anon.parquet',
+        'manifest': stem + '.anon.json',
+    }
+
+
+def _file_sha256(filepath: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_fingerprint(filepath: str) -> Dict[str, object]:
+    """
+    Fingeravtryck för källfilen: storlek, mtime och SHA-256 av innehållet
+
+    Args:
+        filepath (str): Sökväg till CSV-filen
+
+    Returns:
+        dict: Fingeravtryck som lagras i cachens manifest
+    """
+    stat = os.stat(filepath)
+    return {
+        'schema_version': CACHE_SCHEMA_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': _file_sha256(filepath),
+    }
+
+
+def _read_manifest(path: str) -> Optional[dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json_atomic(path: str, payload: dict) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(payload, fh)
+    os.replace(tmp_path, path)
+
+
+def _cache_is_valid(filepath: str, manifest: Optional[dict], manifest_path: Optional[str] = None) -> bool:
+    """
+    Snabb kontroll mot storlek och mtime. Om bara mtime skiljer (t.ex. efter
+    en ny deploy som kopierat samma fil) jämförs innehållets SHA-256.
+    """
+    if not manifest or manifest.get('schema_version') != CACHE_SCHEMA_VERSION:
+        return False
+
+    stat = os.stat(filepath)
+    if manifest.get('size') != stat.st_size:
+        return False
+    if manifest.get('mtime_ns') == stat.st_mtime_ns:
+        return True
+    if manifest.get('sha256') != _file_sha256(filepath):
+        return False
+
+    # Samma innehåll men ny mtime - uppdatera manifestet så nästa laddning går snabbt
+    try:
+        _write_json_atomic(manifest_path or cache_paths(filepath)['manifest'],
+                           {**manifest, 'mtime_ns': stat.st_mtime_ns})
+    except OSError:
+        pass
+    return True
+
+
+def _read_cache(filepath: str, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+    paths = cache_paths(filepath)
+    if not os.path.exists(paths['data']):
+        return None
+    if not _cache_is_valid(filepath, _read_manifest(paths['manifest'])):
+        return None
+    try:
+        # Parquet är kolumnärt - bara de begärda kolumnerna läses från disk
+        return pd.read_parquet(paths['data'], columns=columns)
+    except (ImportError, OSError, ValueError):
+        return None
+
+
+def _write_cache(filepath: str, df: pd.DataFrame) -> None:
+    """
+    Skriver den anonymiserade DataFrame:n till cachen. Fel ignoreras -
+    cachen är en optimering och får aldrig stoppa laddningen.
+
+    Strängkolumner lagras som kategorier (förlustfritt), numeriska kolumner
+    med full precision. Krympningen till COMPACT_NUMERIC_DTYPES görs vid läsning.
+    """
+    df = _categorize(df)
+    paths = cache_paths(filepath)
+    # Tillagda delfiler (append_delta) är redan anonymiserade och hör inte till CSV-filen - behåll dem
+    deltas = (_read_manifest(paths['manifest']) or {}).get('deltas', [])
+    # Skriv till temporära filer och byt atomärt, flera gunicorn-workers kan skriva samtidigt
+    tmp_data = f"{paths['data']}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp_data, index=False)
+        os.replace(tmp_data, paths['data'])
+        _write_json_atomic(paths['manifest'], {**source_fingerprint(filepath), 'deltas': deltas})
+    except (ImportError, OSError, ValueError):
+        if os.path.exists(tmp_data):
+            os.remove(tmp_data)
+
+
+def _delta_file(filepath: str, index: int) -> str:
+    return os.path.splitext(cache_paths(filepath)['data'])[0] + f'.delta-{index:03d}.parquet'
+
+
+def dataset_fingerprint(manifest: Optional[dict]) -> str:
+    """
+    Kort fingeravtryck för datasetet som ett manifest beskriver: källfilens
+    SHA-256 och de tillagda delfilernas, i den ordning de lades till
+
+    Till skillnad från OlympicAnalyzer.data_version, som räknas per process,
+    är fingeravtrycket detsamma i alla processer som läst samma data.
+
+    Args:
+        manifest (dict | None): Cachens eller det delade lagrets manifest
+
+    Returns:
+        str: 16 hexadecimala tecken
+    """
+    manifest = manifest or {}
+    digest = hashlib.sha256(str(manifest.get('sha256')).encode())
+    for delta in manifest.get('deltas', []):
+        digest.update(delta['sha256'].encode())
+    return digest.hexdigest()[:16]
+
+
+def load_deltas(filepath: str, start: int = 0,
+                columns: Optional[List[str]] = None) -> Tuple[List[pd.DataFrame], dict]:
+    """
+    Delfiler som lagts till med append_delta, enligt cachens manifest
+
+    Args:
+        filepath (str): Sökväg till bas-CSV:n
+        start (int): Hoppa över så många delfiler (de som redan lästs)
+        columns (list | None): Läs bara dessa kolumner
+
+    Returns:
+        tuple: (delfilernas rader i den ordning de lades till, manifestet)
+    """
+    paths = cache_paths(filepath)
+    manifest = _read_manifest(paths['manifest']) or {}
+    folder = os.path.dirname(paths['data'])
+    frames = [_expand(pd.read_parquet(os.path.join(folder, delta['file']), columns=columns))
+              for delta in manifest.get('deltas', [])[start:]]
+    return frames, manifest
+
+
+def append_delta(filepath: str, delta_path: str, workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Lägger till nya rader (t.ex. 2020 och 2024 års spel) till det sparade datasetet
+
+    Delfilen (CSV, eller Parquet om filändelsen är .parquet) anonymiseras
+    med samma hashning som basdatan och sparas som en egen Parquet-fil
+    bredvid cachen, listad i cachens manifest. Efterföljande
+    load_and_anonymize_data returnerar basdatan följd av alla delfiler, utan
+    att basfilen läses om. Returnerar de anonymiserade raderna, så att en
+    redan laddad OlympicAnalyzer kan uppdateras med OlympicAnalyzer.append.
+
+    Args:
+        filepath (str): Sökväg till bas-CSV:n
+        delta_path (str): Sökväg till CSV eller Parquet (.parquet) med nya
+            rader i samma format som bas-CSV:n
+        workers (int | None): Antal processer för namnhashningen
+
+    Returns:
+        pd.DataFrame: Delfilens rader, anonymiserade, med basdatans kolumnordning
+
+    Raises:
+        FileNotFoundError: Om någon av filerna inte hittas
+        KeyError: Om delfilen saknar kolumner som basdatan har
+        ValueError: Om samma delfil redan lagts till
+    """
+    import pyarrow.parquet as pq
+
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"Filen hittades inte: {filepath}")
+    if not os.path.exists(delta_path):
+        raise FileNotFoundError(f"Filen hittades inte: {delta_path}")
+
+    # Bascachen måste finnas och vara giltig; bara manifestet kontrolleras och
+    # kolumnerna läses ur Parquet-schemat (basdatan laddas aldrig)
+    paths = cache_paths(filepath)
+    manifest = _read_manifest(paths['manifest'])
+    if not os.path.exists(paths['data']) or not _cache_is_valid(filepath, manifest):
+        ingest_csv(filepath, workers=workers)
+        manifest = _read_manifest(paths['manifest'])
+    base_columns = pq.read_schema(paths['data']).names
+    deltas = manifest.get('deltas', [])
+
+    digest = _file_sha256(delta_path)
+    if any(delta['sha256'] == digest for delta in deltas):
+        raise ValueError(f"Delfilen är redan tillagd: {delta_path}")
+
+    if os.path.splitext(delta_path)[1].lower() == '.parquet':
+        delta = _expand(pd.read_parquet(delta_path))
+    else:
+        delta = pd.read_csv(delta_path)
+    # En redan anonymiserad delfil (Name_hash i stället för Name) tas emot som den är
+    if 'Name' in delta.columns:
+        delta['Name_hash'] = anonymize_names(delta['Name'], workers=workers)
+        delta = delta.drop(columns=['Name'])
+    missing = [col for col in base_columns if col not in delta.columns]
+    if missing:
+        raise KeyError(f"Kolumnerna saknas i delfilen: {missing}")
+    delta = delta[base_columns]
+
+    target = _delta_file(filepath, len(deltas))
+    tmp_data = f"{target}.{os.getpid()}.tmp"
+    try:
+        _categorize(delta).to_parquet(tmp_data, index=False)
+        os.replace(tmp_data, target)
+    finally:
+        if os.path.exists(tmp_data):
+            os.remove(tmp_data)
+    deltas = deltas + [{'file': os.path.basename(target), 'source': os.path.basename(delta_path),
+                        'sha256': digest, 'rows': len(delta)}]
+    _write_json_atomic(paths['manifest'], {**manifest, 'deltas': deltas})
+    return delta
+
+
+class IngestReport(NamedTuple):
+    """Resultat från ingest_csv."""
+    path: str
+    rows: int
+    chunks: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.rows:,} rader i {self.chunks} block på {self.seconds:.1f} s "
+                f"({self.rows_per_second:,.0f} rader/s) -> {self.path}")
+
+
+def _ingest_schema(header: List[str]):
+    import pyarrow as pa
+
+    fields = []
+    for col in [c for c in header if c != 'Name'] + ['Name_hash']:
+        if col in _CSV_INT_COLUMNS:
+            fields.append(pa.field(col, pa.int64()))
+        elif col in _CSV_FLOAT_COLUMNS:
+            fields.append(pa.field(col, pa.float64()))
+        elif col in CATEGORY_COLUMNS:
+            fields.append(pa.field(col, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(col, pa.string()))
+    return pa.schema(fields)
+
+
+def ingest_csv(filepath: str, chunksize: int = INGEST_CHUNK_ROWS,
+               progress: Optional[Callable[[int, int, int], None]] = None,
+               workers: Optional[int] = None) -> IngestReport:
+    """
+    Strömmande inläsning: läser CSV-filen blockvis, anonymiserar varje block
+    och lägger till det i den kolumnära cachen (Parquet, en row group per block)
+
+    Toppminnet styrs av chunksize i stället för filens storlek, eftersom
+    bara ett block i taget finns i minnet. Schemat är fast (se _ingest_schema)
+    så att alla block skrivs likadant, och resultatet är samma cachefil som
+    load_and_anonymize_data läser.
+
+    Args:
+        filepath (str): Sökväg till CSV-filen
+        chunksize (int): Antal rader per block
+        progress (callable | None): Anropas efter varje block med
+            (rader hittills, lästa bytes, filens storlek i bytes)
+        workers (int | None): Antal processer för namnhashningen
+
+    Returns:
+        IngestReport: Antal rader och block, tid och rader per sekund
+
+    Raises:
+        FileNotFoundError: Om filen inte hittas
+        KeyError: Om kolumnen Name saknas
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"Filen hittades inte: {filepath}")
+
+    start = time.perf_counter()
+    total_bytes = os.path.getsize(filepath)
+    header = list(pd.read_csv(filepath, nrows=0).columns)
+    if 'Name' not in header:
+        raise KeyError("Kolumnen Name saknas i datasetet")
+    schema = _ingest_schema(header)
+    dtypes = {col: (str if col not in _CSV_INT_COLUMNS + _CSV_FLOAT_COLUMNS else
+                    'float64' if col in _CSV_FLOAT_COLUMNS else 'int64') for col in header}
+
+    paths = cache_paths(filepath)
+    tmp_data = f"{paths['data']}.{os.getpid()}.tmp"
+    rows = chunks = 0
+    try:
+        with open(filepath, 'rb') as fh, pq.ParquetWriter(tmp_data, schema) as writer:
+            for chunk in pd.read_csv(fh, chunksize=chunksize, dtype=dtypes):
+                chunk['Name_hash'] = anonymize_names(chunk['Name'], workers=workers)
+                chunk = chunk.drop(columns=['Name'])
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                rows += len(chunk)
+                chunks += 1
+                if progress is not None:
+                    progress(rows, fh.tell(), total_bytes)
+        deltas = (_read_manifest(paths['manifest']) or {}).get('deltas', [])
+        os.replace(tmp_data, paths['data'])
+        _write_json_atomic(paths['manifest'], {**source_fingerprint(filepath), 'deltas': deltas})
+    finally:
+        if os.path.exists(tmp_data):
+            os.remove(tmp_data)
+
+    return IngestReport(paths['data'], rows, chunks, time.perf_counter() - start)
+
+
+def load_and_anonymize_data(filepath: str, use_cache: bool = True,
+                            workers: Optional[int] = None, compact: bool = False,
+                            columns: Optional[List[str]] = None,
+                            chunksize: Optional[int] = None) -> pd.DataFrame:
     """
     Laddar data och anonymiserar idrottarnas namn med SHA256-hash
     
     Krav: Anonymisera kolumnen med idrottarnas namn med hashfunktionen
     Detta följer GDPR-principer för personuppgiftshantering.
+
+    Resultatet sparas i en kolumnär cache (Parquet) bredvid CSV-filen,
+    nycklad på filens storlek, mtime, innehållshash och CACHE_SCHEMA_VERSION.
+    Rader som lagts till med append_delta följer efter basdatan.
+    Vilken väg som användes anges i df.attrs['load_source'] ('cache', 'csv'
+    eller 'stream' när cachen byggdes med ingest_csv). Med cachen anger
+    df.attrs['fingerprint'] och df.attrs['deltas'] vilken version av
+    datasetet som lästes (se dataset_fingerprint) och antal delfiler.
     
     Args:
         filepath (str): Sökväg till CSV-filen
+        use_cache (bool): Läs från och skriv till den kolumnära cachen
+        workers (int | None): Antal processer för namnhashningen (se anonymize_names)
+        compact (bool): Returnera ramen med det kompakta dtype-schemat (se compact_frame)
+        columns (list | None): Ladda bara dessa kolumner, t.ex. DASHBOARD_COLUMNS
+        chunksize (int | None): Bygg en saknad cache strömmande med ingest_csv
+            (toppminne styrt av blockstorleken) i stället för att läsa hela filen.
+            Kräver use_cache=True.
         
     Returns:
         pd.DataFrame: DataFrame med anonymiserade namn (hashade)
         
     Raises:
         FileNotFoundError: Om filen inte hittas
+        KeyError: Om någon av de begärda kolumnerna saknas
+        ValueError: Om chunksize anges utan use_cache
     """
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"Filen hittades inte: {filepath}")
+    if chunksize is not None and not use_cache:
+        raise ValueError("chunksize kräver use_cache=True (blocken skrivs till cachen)")
 
-    df = pd.read_csv(filepath)
-    
-    # Anonymisera namn - UNIK HASH FÖR VARJE NAMN
-    # Använder SHA256 för säker hashning, tar första 16 tecken för läsbarhet
-    # SHA-256 hashing for GDPR-compliant anonymization
-    # Reference: Python hashlib documentation - https://docs.python.org/3/library/hashlib.html
-    df['Name_hash'] = df['Name'].apply(
-        lambda x: hashlib.sha256(str(x).encode()).hexdigest()[:16]
-    )
-    
-    # Ta bort originalnamn för GDPR-säkerhet
-    df = df.drop(columns=['Name'])
-    
+    df = _read_cache(filepath, columns) if use_cache else None
+    source = 'cache'
+
+    if df is None and chunksize is not None:
+        import pyarrow.parquet as pq
+
+        report = ingest_csv(filepath, chunksize=chunksize, workers=workers)
+        stored_columns = pq.read_schema(report.path).names
+        missing = [col for col in (columns or []) if col not in stored_columns]
+        if missing:
+            raise KeyError(f"Kolumnerna saknas i datasetet: {missing}")
+        df = _read_cache(filepath, columns)
+        source = 'stream'
+
+    if df is None:
+        source = 'csv'
+        df = pd.read_csv(filepath)
+
+        # Anonymisera namn - UNIK HASH FÖR VARJE NAMN
+        # Använder SHA256 för säker hashning, tar första 16 tecken för läsbarhet
+        df['Name_hash'] = anonymize_names(df['Name'], workers=workers)
+
+        # Ta bort originalnamn för GDPR-säkerhet
+        df = df.drop(columns=['Name'])
+
+        if use_cache:
+            _write_cache(filepath, df)
+
+        if columns is not None:
+            missing = [col for col in columns if col not in df.columns]
+            if missing:
+                raise KeyError(f"Kolumnerna saknas i datasetet: {missing}")
+            df = df[list(columns)]
+
+    deltas, manifest = load_deltas(filepath, columns=columns) if use_cache else ([], None)
+    if deltas:
+        df = pd.concat([_expand(df)] + deltas, ignore_index=True)
+
+    df = compact_frame(df) if compact else _expand(df)
+    df.attrs['load_source'] = source
+    if manifest is not None:
+        df.attrs['fingerprint'] = dataset_fingerprint(manifest)
+        df.attrs['deltas'] = len(manifest.get('deltas', []))
+    return df
+
+
+def shared_store_path(filepath: str) -> str:
+    """
+    Katalog för det minnesmappade kolumnlagret som hör till en CSV-fil
+
+    Args:
+        filepath (str): Sökväg till CSV-filen
+
+    Returns:
+        str: Sökväg till katalogen (<namn>.shared)
+    """
+    return os.path.splitext(filepath)[0] + '.shared'
+
+
+def build_shared_store(filepath: str, store_path: Optional[str] = None, force: bool = False) -> str:
+    """
+    Skriver den anonymiserade, kompakta ramen som ett minnesmappbart kolumnlager
+
+    Körs en gång (i gunicorns master-process eller som ett byggsteg). Varje
+    kolumn blir en .npy-fil - numeriska kolumner som de är, kategoriska som
+    heltalskoder med kategorierna i manifest.json. Raderna skrivs sorterade
+    på NOC, så att OlympicAnalyzer kan använda dem utan att sortera om.
+
+    Args:
+        filepath (str): Sökväg till CSV-filen
+        store_path (str | None): Katalog för lagret, standard shared_store_path()
+        force (bool): Bygg om även om lagret matchar källfilens fingeravtryck
+
+    Returns:
+        str: Sökväg till lagret
+    """
+    store_path = store_path or shared_store_path(filepath)
+    manifest_path = os.path.join(store_path, 'manifest.json')
+    deltas = (_read_manifest(cache_paths(filepath)['manifest']) or {}).get('deltas', [])
+    manifest = _read_manifest(manifest_path)
+    if (not force and _cache_is_valid(filepath, manifest, manifest_path)
+            and manifest.get('deltas', []) == deltas):
+        return store_path
+
+    df = load_and_anonymize_data(filepath, compact=True)
+    df = df.sort_values('NOC', kind='stable', ignore_index=True)
+
+    tmp_path = f"{store_path}.{os.getpid()}.tmp"
+    os.makedirs(tmp_path, exist_ok=True)
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            np.save(os.path.join(tmp_path, f'{col}.npy'), values.cat.codes.to_numpy())
+            columns[col] = {'kind': 'category', 'categories': values.cat.categories.tolist()}
+        else:
+            np.save(os.path.join(tmp_path, f'{col}.npy'), values.to_numpy())
+            columns[col] = {'kind': 'numeric'}
+
+    with open(os.path.join(tmp_path, 'manifest.json'), 'w', encoding='utf-8') as fh:
+        json.dump({**source_fingerprint(filepath), 'deltas': deltas, 'rows': len(df), 'columns': columns}, fh)
+
+    # Byt katalog. Workers som redan mappat det gamla lagret behåller sina
+    # mappningar - borttagna filer finns kvar tills sista mappningen stängs.
+    old_path = f"{store_path}.{os.getpid()}.old"
+    if os.path.exists(store_path):
+        os.replace(store_path, old_path)
+    os.replace(tmp_path, store_path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return store_path
+
+
+def attach_shared_store(store_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Ansluter till ett kolumnlager skrivet av build_shared_store, skrivskyddat
+
+    Kolumnerna minnesmappas (np.load med mmap_mode='r') och läggs i en
+    DataFrame utan kopiering, så alla processer som ansluter delar samma
+    sidor i sidcachen. Bara kategorinamnen hålls privat i varje process.
+
+    Args:
+        store_path (str): Katalog med lagret
+        columns (list | None): Anslut bara dessa kolumner
+
+    Returns:
+        pd.DataFrame: Kompakt, skrivskyddad DataFrame sorterad på NOC
+
+    Raises:
+        FileNotFoundError: Om lagret saknas
+        KeyError: Om någon av de begärda kolumnerna saknas
+    """
+    manifest = _read_manifest(os.path.join(store_path, 'manifest.json'))
+    if manifest is None:
+        raise FileNotFoundError(f"Inget kolumnlager i: {store_path}")
+
+    stored = manifest['columns']
+    columns = list(stored) if columns is None else list(columns)
+    missing = [col for col in columns if col not in stored]
+    if missing:
+        raise KeyError(f"Kolumnerna saknas i lagret: {missing}")
+
+    data = {}
+    for col in columns:
+        # np.asarray ger en vanlig ndarray-vy av np.memmap, utan kopiering
+        values = np.asarray(np.load(os.path.join(store_path, f'{col}.npy'), mmap_mode='r'))
+        if stored[col]['kind'] == 'category':
+            categories = pd.Index(stored[col]['categories'])
+            values = pd.Categorical.from_codes(values, categories=categories, validate=False)
+        data[col] = values
+
+    df = pd.DataFrame(data, copy=False)
+    df.attrs['load_source'] = 'shared'
+    df.attrs['fingerprint'] = dataset_fingerprint(manifest)
+    df.attrs['deltas'] = len(manifest.get('deltas', []))
     return df
 
 
@@ -7,9 +7,440 @@ import pandas as pd
 # Documentation: https://numpy.org/doc/
 # Version: 1.26.2
 import numpy as np
-from typing import Dict, Optional, Union
+import copy
+import functools
+import inspect
+from typing import Dict, Iterable, NamedTuple, Optional, Union
 
+from .backends import QueryBackend, make_backend
+from .metrics import instrument_methods
+from .result_cache import CacheInfo, ResultCache, copy_on_write, detach
 
+
+def _plain(values: pd.Series) -> pd.Series:
+    """Kategoriska kolumner (kompakt schema) tillbaka till sina vanliga värden."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.astype(values.cat.categories.dtype)
+    return values
+
+
+def _value_counts(values: pd.Series) -> pd.Series:
+    """
+    value_counts som ger samma resultat oavsett om kolumnen är kategorisk.
+
+    På en kategorisk kolumn tar value_counts med kategorier utan träffar och
+    ordnar lika antal efter kategoriordning i stället för förekomstordning.
+    """
+    return _plain(values).value_counts()
+
+
+# Dimensioner i den förberäknade medaljkuben
+MEDAL_CUBE_KEYS = ['NOC', 'Sport', 'Year', 'Season', 'Medal']
+
+# Dimensioner i idrottarnas medaljceller (underlag för topplistorna)
+ATHLETE_CELL_KEYS = ['Name_hash', 'NOC', 'Sport', 'Year', 'Medal']
+
+# Medaljtyper i topplistorna, och uppdelningar som topplistorna förberäknas för
+MEDAL_TYPES = ['Gold', 'Silver', 'Bronze']
+LEADERBOARD_DIMENSIONS = ('NOC', 'Sport', 'Decade', 'All')
+
+# Största top_n som topplistorna förberäknas för
+LEADERBOARD_MAX_TOP_N = 25
+
+# Största top_n som medaljracet förberäknas för (dashboardens reglage går 5-15)
+RACE_MAX_TOP_N = 15
+
+# Säsongsval som medaljracet förberäknas för
+RACE_SEASONS = ('All', 'Summer', 'Winter')
+
+# Ungefärligt antal åldersintervall i de förberäknade histogrammen
+AGE_BINS = 20
+
+# Kolumner i boxplot_stats, och max antal (unika) extremvärden per grupp och kolumn
+BOXPLOT_COLUMNS = ['Height', 'Weight', 'Age']
+BOXPLOT_MAX_FLIERS = 50
+
+# Rader i CountryReport.body, samma som DataFrame.describe()
+BODY_STATS = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+
+class CountryReport(NamedTuple):
+    """Alla landsaggregat för ett land (se OlympicAnalyzer.country_report)."""
+    noc: str
+    top_sports: pd.Series        # som top_sports_by_medals (top 10)
+    medals_per_year: pd.Series   # som medals_per_olympics
+    medal_types: pd.Series       # som get_medal_statistics
+    ages: pd.Series              # som age_distribution
+    age_histogram: pd.Series     # som age_histogram
+    gender: pd.Series            # som gender_distribution
+    body: pd.DataFrame           # describe() för Height och Weight, rader där båda finns
+
+
+def _body_stats(height: pd.Series, weight: pd.Series) -> pd.DataFrame:
+    body = pd.DataFrame({'Height': height, 'Weight': weight}, dtype='float64')
+    return body.describe().reindex(BODY_STATS)
+
+
+def _read_only(values: np.ndarray) -> np.ndarray:
+    # Arrayer som delas mellan anrop (cachade tabeller, attribut) skrivskyddas,
+    # eftersom varken detach eller en grund kopia av ramen kopierar dem
+    values.flags.writeable = False
+    return values
+
+
+def _age_bin_edges(ages: pd.Series, bins: int = AGE_BINS) -> np.ndarray:
+    """
+    Fasta intervallgränser för åldrar: heltalsbredd som ger ungefär `bins`
+    intervall mellan yngsta och äldsta ålder. Intervallen är [vänster, höger).
+    Den returnerade arrayen är skrivskyddad.
+    """
+    if ages.notna().sum() == 0:
+        return _read_only(np.arange(bins + 1, dtype='int64'))
+    low, high = int(np.floor(ages.min())), int(np.floor(ages.max()))
+    width = max(1, -(-(high - low + 1) // bins))
+    return _read_only(low + width * np.arange(-(-(high - low + 1) // width) + 1, dtype='int64'))
+
+
+def _box_stats(keys: pd.Series, values: pd.Series, whis: float = 1.5,
+               max_fliers: int = BOXPLOT_MAX_FLIERS) -> pd.DataFrame:
+    """
+    Boxplotstatistik per grupp i ett svep, med samma definitioner som
+    matplotlib.cbook.boxplot_stats: kvartiler med linjär interpolation,
+    morrhår vid det yttersta värdet inom whis * IQR från kvartilerna och
+    extremvärden utanför morrhåren.
+
+    Raderna sorteras en gång på (grupp, värde); kvartiler, morrhår och
+    extremvärden läses sedan ur varje grupps sammanhängande block.
+    Extremvärdena sparas som unika värden, högst max_fliers per grupp
+    (jämnt fördelade), eftersom lika värden ritas ovanpå varandra.
+    """
+    values = values.to_numpy(dtype='float64', na_value=np.nan)
+    codes, groups = pd.factorize(keys, sort=True)
+    valid = (codes >= 0) & ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+    order = np.lexsort((values, codes))
+    codes, values = codes[order], values[order]
+
+    counts = np.bincount(codes, minlength=len(groups))
+    present = counts > 0
+    counts = counts[present]
+    groups = np.asarray(groups, dtype=object)[present]
+    row_group = (np.cumsum(present) - 1)[codes]
+    starts = np.r_[0, np.cumsum(counts)[:-1]].astype('int64')
+
+    def quantile(q):
+        position = starts + q * (counts - 1)
+        low = np.floor(position).astype('int64')
+        high = np.minimum(low + 1, starts + counts - 1)
+        return values[low] + (values[high] - values[low]) * (position - low)
+
+    q1, med, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+    iqr = q3 - q1
+    # Värdena är sorterade inom gruppen: antal under nedre gränsen ger
+    # första värdet innanför, antal upp till övre gränsen det sista
+    below = np.bincount(row_group, weights=values < (q1 - whis * iqr)[row_group],
+                        minlength=len(counts)).astype('int64')
+    upto = np.bincount(row_group, weights=values <= (q3 + whis * iqr)[row_group],
+                       minlength=len(counts)).astype('int64')
+    whislo = np.where(below < counts, values[np.minimum(starts + below, len(values) - 1)], q1)
+    whislo = np.minimum(whislo, q1)
+    whishi = np.where(upto > 0, values[np.maximum(starts + upto - 1, 0)], q3)
+    whishi = np.maximum(whishi, q3)
+    mean = np.bincount(row_group, weights=values, minlength=len(counts)) / counts
+
+    outside = (values < whislo[row_group]) | (values > whishi[row_group])
+    # Unika extremvärden: hoppa över ett värde som är lika med föregående i samma grupp
+    repeated = np.r_[False, (values[1:] == values[:-1]) & (row_group[1:] == row_group[:-1])]
+    flier_rows = np.flatnonzero(outside & ~repeated)
+    flier_counts = np.bincount(row_group[flier_rows], minlength=len(counts))
+    fliers = []
+    for part in np.split(values[flier_rows], np.cumsum(flier_counts)[:-1]):
+        if len(part) > max_fliers:
+            part = part[np.linspace(0, len(part) - 1, max_fliers).round().astype('int64')]
+        fliers.append(_read_only(part))
+
+    return pd.DataFrame({
+        'count': counts.astype('int64'), 'mean': mean, 'q1': q1, 'med': med, 'q3': q3,
+        'whislo': whislo, 'whishi': whishi, 'fliers': fliers,
+    }, index=pd.Index(groups, name=keys.name))
+
+
+def _merge_cells(cells: pd.DataFrame, delta: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """Slår ihop befintliga kubceller med celler för nya rader (summa av antal, minsta 'first')."""
+    return (
+        pd.concat([cells, delta], ignore_index=True)
+        .groupby(keys, sort=False)
+        .agg(count=('count', 'sum'), first=('first', 'min'))
+        .reset_index()
+        .sort_values('first', ignore_index=True)
+    )
+
+
+def _rank_athletes(cells: pd.DataFrame, by: str, top_n: Optional[int]) -> Dict[Optional[str], pd.DataFrame]:
+    """
+    Rangordnar idrottare per grupp (land, sport, decennium eller alla) ur
+    idrottarnas medaljceller, en gång på totalt antal och en gång per
+    medaljtyp. Ordningen är som value_counts: fallande antal, lika antal i
+    den ordning idrottaren först tog en sådan medalj.
+
+    Returns:
+        dict: medaljtyp (None = totalt) -> tabell sorterad på grupp och plats,
+            med kolumnerna by, Name_hash, Medals, Gold, Silver och Bronze
+    """
+    if by == 'Decade':
+        keys = cells['Year'] // 10 * 10
+    elif by == 'All':
+        keys = pd.Series('All', index=cells.index)
+    else:
+        keys = cells[by]
+    group_codes, groups = pd.factorize(keys, sort=True)
+    athlete_codes, athletes = pd.factorize(cells['Name_hash'])
+    medal_codes = pd.Categorical(cells['Medal'], categories=MEDAL_TYPES).codes.astype('int64')
+
+    # Ett par per (grupp, idrottare); antal och första position per par och medaljtyp
+    pairs, pair_keys = pd.factorize(group_codes.astype('int64') * len(athletes) + athlete_codes)
+    slots = pairs * len(MEDAL_TYPES) + medal_codes
+    valid = medal_codes >= 0
+    size = len(pair_keys) * len(MEDAL_TYPES)
+    counts = np.bincount(slots[valid], weights=cells['count'].to_numpy()[valid], minlength=size)
+    counts = counts.astype('int64').reshape(-1, len(MEDAL_TYPES))
+    firsts = np.full(size, np.iinfo('int64').max)
+    np.minimum.at(firsts, slots[valid], cells['first'].to_numpy()[valid])
+    firsts = firsts.reshape(-1, len(MEDAL_TYPES))
+    pair_groups, pair_athletes = pair_keys // len(athletes), pair_keys % len(athletes)
+
+    tables = {}
+    for medal in [None] + MEDAL_TYPES:
+        if medal is None:
+            count, first = counts.sum(axis=1), firsts.min(axis=1)
+        else:
+            count, first = counts[:, MEDAL_TYPES.index(medal)], firsts[:, MEDAL_TYPES.index(medal)]
+        rows = np.flatnonzero(count > 0)
+        rows = rows[np.lexsort((first[rows], -count[rows], pair_groups[rows]))]
+        if top_n is not None:
+            # Plats inom gruppen: position minus gruppens första position
+            codes = pair_groups[rows]
+            starts = np.r_[0, np.flatnonzero(codes[1:] != codes[:-1]) + 1]
+            place = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+            rows = rows[place < top_n]
+        table = pd.DataFrame({by: groups.take(pair_groups[rows]), 'Name_hash': athletes.take(pair_athletes[rows]),
+                              'Medals': counts[rows].sum(axis=1)})
+        for index, name in enumerate(MEDAL_TYPES):
+            table[name] = counts[rows, index]
+        tables[medal] = table
+    return tables
+
+
+def _cube_counts(cells: pd.DataFrame, key: str, sort_index: bool = False) -> pd.Series:
+    """
+    Summerar kubceller per nyckel med samma ordning som value_counts:
+    fallande antal, lika antal i den ordning värdet först förekom i raderna.
+    Kräver att cellerna är sorterade på 'first' (se _build_medal_cube).
+
+    Med sort_index=True sorteras på nyckeln i stället, som groupby(key).size().
+    """
+    codes, uniques = pd.factorize(cells[key], sort=sort_index)
+    counts = np.bincount(codes, weights=cells['count'].to_numpy(), minlength=len(uniques)).astype('int64')
+    if sort_index:
+        return pd.Series(counts, index=pd.Index(uniques, name=key))
+    result = pd.Series(counts, index=pd.Index(uniques, name=key), name='count')
+    return result.sort_values(ascending=False, kind='stable')
+
+
+def _cached(method):
+    """
+    Memoiserar en analysmetod i analyserns ResultCache (om den är påslagen).
+    Nyckeln är metodnamnet plus argumenten med ifyllda standardvärden, så
+    top_sports_by_medals('CAN') och top_sports_by_medals('CAN', 10) delar post.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._result_cache is None:
+            return method(self, *args, **kwargs)
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        key = (method.__name__,) + tuple(bound.arguments.values())[1:]
+        return self._result_cache.get_or_compute(key, lambda: method(self, *args, **kwargs))
+
+    return wrapper
+
+
+def _group_offsets(keys: pd.Series) -> Dict[object, tuple]:
+    """
+    Start- och slutposition för varje nyckel i en kolumn där lika värden
+    ligger i sammanhängande block (t.ex. efter sortering).
+    """
+    codes, uniques = pd.factorize(keys)
+    if len(codes) == 0:
+        return {}
+    starts = np.r_[0, np.flatnonzero(codes[1:] != codes[:-1]) + 1]
+    stops = np.r_[starts[1:], len(codes)]
+    return {
+        uniques[code]: (int(start), int(stop))
+        for code, start, stop in zip(codes[starts], starts, stops)
+        if code != -1
+    }
+
+
+def _insert_rows(offsets: Dict[object, tuple], keys, length: int) -> tuple:
+    """
+    Infogar nya rader i ett lager där lika nycklar ligger i sammanhängande
+    block i sorteringsordning (saknade nycklar först, se _stable_argsort):
+    varje ny rad hamnar sist i sin nyckels block, eller där ett nytt block
+    hör hemma. Bara de nya raderna och blockens offsets gås igenom.
+
+    Args:
+        offsets (dict): Blockens (start, stop) från _group_offsets
+        keys: De nya radernas nycklar, med lagrets dtype
+        length (int): Antal rader i lagret
+
+    Returns:
+        tuple: (de nya radernas ordning, infogningspunkt per rad i den ordningen
+            för np.insert, blockens offsets efter infogningen)
+    """
+    codes, uniques = pd.factorize(keys, sort=True)
+    order = _stable_argsort(codes)
+    codes = codes[order]
+    # Nya nycklars plats bland de befintliga, med samma sortering som lagret
+    ranks, _ = pd.factorize(pd.array(list(offsets) + list(uniques), dtype=keys.dtype), sort=True)
+    known_ranks, new_ranks = ranks[:len(offsets)], ranks[len(offsets):]
+    starts, stops = np.array(list(offsets.values()), dtype='int64').reshape(-1, 2).T
+
+    def block_after(rank):
+        following = starts[known_ranks > rank]
+        return int(following.min()) if len(following) else length
+
+    unique_points = [offsets[key][1] if key in offsets else block_after(rank)
+                     for key, rank in zip(uniques, new_ranks)]
+    # Kod -1 (saknad nyckel) tar sista elementet: början på första blocket
+    points = np.array(unique_points + [block_after(-1)], dtype='int64')[codes]
+
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    firsts = np.searchsorted(codes, np.arange(len(uniques)))
+    # Befintliga block flyttas fram av alla rader som infogas i eller före blockets början
+    shifted = starts + np.searchsorted(points, starts, side='right')
+    merged = {key: (int(moved), int(moved + stop - start))
+              for key, moved, start, stop in zip(offsets, shifted, starts, stops)}
+    for code, key in enumerate(uniques):
+        if key in merged:
+            start, stop = merged[key]
+            merged[key] = (start, stop + int(counts[code]))
+        else:
+            start = int(points[firsts[code]] + firsts[code])
+            merged[key] = (start, start + int(counts[code]))
+    return order, points, merged
+
+
+def _widen_age_bin_edges(edges: np.ndarray, ages: pd.Series) -> np.ndarray:
+    """
+    Utökar intervallgränserna med hela intervall av samma bredd tills de
+    täcker `ages`. Befintliga intervall ändras inte.
+    """
+    ages = ages.dropna()
+    if ages.empty:
+        return edges
+    width = edges[1] - edges[0]
+    low, high = int(np.floor(ages.min())), int(np.floor(ages.max()))
+    below = max(0, -(-(edges[0] - low) // width))
+    above = max(0, (high - edges[-1]) // width + 1)
+    if not below and not above:
+        return edges
+    return _read_only(edges[0] + width * np.arange(-below, len(edges) + above, dtype='int64'))
+
+
+def _stable_argsort(codes: np.ndarray) -> np.ndarray:
+    """
+    Stabil argsort för heltalskoder. Små koder görs om till int16 så att
+    NumPy väljer radix sort (linjär tid) i stället för timsort.
+    """
+    if len(codes) and codes.max() < np.iinfo(np.int16).max:
+        codes = codes.astype(np.int16)
+    return np.argsort(codes, kind='stable')
+
+
+def _combine(existing: pd.Series, values: pd.Series):
+    """
+    Befintlig kolumn följd av nya värden, med den befintliga kolumnens dtype.
+    För kategoriska kolumner återanvänds befintliga koder (inga uppslag över
+    alla rader); nya kategorier sorteras in om kategorierna var sorterade,
+    annars läggs de till sist.
+    """
+    if isinstance(existing.dtype, pd.CategoricalDtype):
+        plain = _plain(values)
+        categories = existing.cat.categories
+        codes = existing.cat.codes.to_numpy()
+        indexer = categories.get_indexer(plain)
+        unknown = (indexer == -1) & plain.notna().to_numpy()
+        if unknown.any():
+            extra = pd.Index(plain[unknown].unique())
+            if categories.is_monotonic_increasing:
+                # Nya kategorier sorteras in med binärsökning, och varje befintlig
+                # kategori flyttas fram med antalet nya som hamnar före den
+                extra = extra.sort_values()
+                points = categories.searchsorted(extra)
+                moved = np.arange(len(categories)) + np.searchsorted(points, np.arange(len(categories)), side='right')
+                placed = points + np.arange(len(extra))
+                order = np.empty(len(categories) + len(extra), dtype='int64')
+                order[moved], order[placed] = np.arange(len(categories)), len(categories) + np.arange(len(extra))
+                # Omkodning via en tabell i kategoriernas storlek (-1 = saknas består)
+                remap = np.r_[moved, -1]
+                codes, indexer = remap[codes], remap[indexer]
+                indexer[unknown] = placed[extra.get_indexer(plain[unknown])]
+                categories = categories.append(extra).take(order)
+            else:
+                indexer[unknown] = len(categories) + extra.get_indexer(plain[unknown])
+                categories = categories.append(extra)
+        codes = np.r_[codes, indexer]
+        return pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(categories), validate=False)
+    return pd.concat([existing, values.astype(existing.dtype)], ignore_index=True).array
+
+
+def _stratified_sample(frame: pd.DataFrame, budget: int, strata: str,
+                       keep: pd.Series, seed: int = 0) -> pd.DataFrame:
+    """
+    Gallrar en ram till högst `budget` rader med stratifierat urval.
+
+    Rader där `keep` är sant behålls alltid (även om de ensamma överskrider
+    budgeten). Resterande platser fördelas proportionellt mellan värdena i
+    kolumnen `strata` (största rest-metoden), och urvalet inom varje stratum
+    är deterministiskt för ett givet seed. Radordningen bevaras.
+
+    Args:
+        frame (pd.DataFrame): Ram att gallra
+        budget (int): Max antal rader
+        strata (str): Kolumn att stratifiera på, t.ex. 'Sport'
+        keep (pd.Series): Boolesk mask för rader som alltid ska vara med
+        seed (int): Seed för slumpgeneratorn
+
+    Returns:
+        pd.DataFrame: Urvalet
+    """
+    if len(frame) <= budget:
+        return frame
+    kept = keep.to_numpy(dtype=bool)
+    rest = np.flatnonzero(~kept)
+    quota = budget - int(kept.sum())
+    chosen = kept.copy()
+    if quota > 0 and len(rest):
+        codes, uniques = pd.factorize(frame[strata].to_numpy()[rest], use_na_sentinel=False)
+        sizes = np.bincount(codes, minlength=len(uniques))
+        shares = sizes * quota / len(rest)
+        alloc = np.floor(shares).astype('int64')
+        leftover = quota - int(alloc.sum())
+        if leftover > 0:
+            alloc[np.argsort(alloc - shares, kind='stable')[:leftover]] += 1
+        rng = np.random.default_rng(seed)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.r_[0, np.cumsum(sizes)]
+        for code, take in enumerate(alloc):
+            members = order[bounds[code]:bounds[code + 1]]
+            chosen[rest[rng.choice(members, size=min(take, len(members)), replace=False)]] = True
+    return frame[chosen]
+
+
+@instrument_methods
 class OlympicAnalyzer:
     """
     Välstrukturerad OOP-lösning för olympisk dataanalys
@@ -18,15 +449,319 @@ class OlympicAnalyzer:
     Denna klass tillhandahåller modulära metoder för olika typer av analyser.
     """
     
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, check_cube: bool = False,
+                 cache_entries: int = 0, cache_bytes: Optional[int] = None,
+                 copy: bool = True, backend: str = 'pandas', read_only: bool = False):
         """
         Initierar analysern med en DataFrame
+
+        Medaljkuben (antal medaljer per NOC, Sport, Year, Season och Medal)
+        byggs en gång här. Medaljmetoderna svarar sedan genom att summera
+        kubens celler i stället för att skanna alla rader.
         
         Args:
             df (pd.DataFrame): DataFrame med olympisk data
+            check_cube (bool): Jämför varje kubsvar med den radvisa
+                beräkningen och kasta AssertionError om de skiljer sig
+            cache_entries (int): Max antal memoiserade resultat (LRU), 0 = ingen cache
+            cache_bytes (int | None): Max storlek på resultatcachen i bytes
+            copy (bool): Kopiera ramen. Med copy=False används en ram som redan
+                är sorterad på NOC (t.ex. ett delat, minnesmappat lager) som den är.
+            backend (str): Frågemotor för radfrågorna, 'pandas' eller 'arrow'
+                (Arrow-tabell i minnet med flertrådade kärnor, se backends.py)
+            read_only (bool): Skrivskyddat läge utan kopior: en ram som redan är
+                sorterad på NOC delas med anroparen i stället för att kopieras.
+                Copy-on-Write gör att ändringar på någon av sidorna aldrig syns
+                på den andra, och resultaten kan inte ändra analyserns data.
+
+        Raises:
+            ValueError: Om frågemotorn är okänd, eller read_only utan Copy-on-Write
+                (pandas >= 3, eller pd.options.mode.copy_on_write = True i 2.x)
+        """
+        if read_only and not copy_on_write():
+            raise ValueError("read_only kräver pandas Copy-on-Write (pd.options.mode.copy_on_write = True)")
+        self.read_only = read_only
+        self.check_cube = check_cube
+        # Räknas upp när datan ändras - används som nyckel av cachar utanför analysern
+        self.data_version = 0
+        self._result_cache = ResultCache(cache_entries, cache_bytes) if cache_entries > 0 else None
+        self._cluster_rows(df, copy)
+        self.backend: QueryBackend = make_backend(backend, self.df)
+        self._build_medal_cube()
+        self._build_race_tables()
+        # Idrottarnas medaljceller och topplistor byggs vid första anropet (se leaderboard)
+        self._athlete_cells: Optional[pd.DataFrame] = None
+        self._leaderboards: Optional[dict] = None
+
+    def _cluster_rows(self, df: pd.DataFrame, copy: bool = True) -> None:
+        """
+        Lagrar raderna sorterade (stabilt) på NOC, så att varje land är ett
+        sammanhängande block som kan returneras som en slice utan kopiering.
+        Radernas index och inbördes ordning inom ett land behålls.
+        """
+        codes, _ = pd.factorize(df['NOC'], sort=True)
+        if len(codes) and (np.diff(codes) >= 0).all():
+            order = np.arange(len(df))
+            if self.read_only:
+                # Egen ram som delar datan med anroparens, Copy-on-Write kopierar vid skrivning
+                self.df = df.copy(deep=False)
+            else:
+                self.df = df.copy() if copy else df
+        else:
+            order = _stable_argsort(codes)
+            self.df = df.take(order)
+
+        # Ursprunglig position per lagrad rad - används för value_counts-ordning
+        self._source_position = order
+        self._index_rows()
+
+    def _index_rows(self) -> None:
+        """
+        Offset-tabell per NOC, och för Sport en permutation: radpositioner
+        grupperade per sport, i ursprunglig radordning, med offsets per sport.
+        """
+        self._noc_offsets = _group_offsets(self.df['NOC'])
+        # Lagrade positioner i ursprunglig ordning, sedan stabilt grupperade per sport
+        by_source = np.empty_like(self._source_position)
+        by_source[self._source_position] = np.arange(len(by_source))
+        sport_codes, _ = pd.factorize(self.df['Sport'].take(by_source), sort=True)
+        self._sport_positions = by_source[_stable_argsort(sport_codes)]
+        self._sport_offsets = _group_offsets(self.df['Sport'].take(self._sport_positions))
+        years = self.df['Year']
+        self.year_range = (int(years.min()), int(years.max())) if len(years) else None
+        # Samma intervall för alla länder och sporter, så histogrammen går att jämföra
+        self.age_bin_edges = _age_bin_edges(self.df['Age'])
+        # Boxplottabeller per gruppering, byggs vid första anropet (se boxplot_stats)
+        self._boxplot_tables: Dict[str, pd.DataFrame] = {}
+
+    @property
+    def countries(self) -> list:
+        """Alla NOC-koder i datan, sorterade."""
+        return sorted(self._noc_offsets)
+
+    @property
+    def sports(self) -> list:
+        """Alla sporter i datan, sorterade."""
+        return sorted(self._sport_offsets)
+
+    def append(self, rows: pd.DataFrame) -> None:
+        """
+        Lägger till nya rader (t.ex. ett nytt OS) utan att bygga om från alla rader
+
+        Raderna sorteras in sist i sina NOC-block och får ursprungliga positioner
+        efter befintliga rader, så resultaten blir desamma som för en analyser
+        byggd på basdatan följd av de nya raderna. Offset-tabellerna per NOC och
+        sport uppdateras med de nya raderna i stället för att byggas om, och
+        frågemotorn får bara de nya raderna (se QueryBackend.append). Åldrarnas
+        intervallgränser behålls och utökas med hela intervall bara om nya
+        åldrar hamnar utanför dem, så histogrammen kan få andra intervall än hos
+        en nybyggd analyser. Medaljkuben uppdateras genom att aggregera bara de
+        nya medaljraderna och slå ihop dem med kubens celler; medaljracet räknas
+        om från kuben och topplistorna från idrottarnas medaljceller, som
+        uppdateras på samma sätt. Resultatcachen töms och data_version räknas
+        upp. En ram från ett delat lager (copy=False) blir privat här.
+
+        Analysern ändras på plats, ett fält i taget. Om andra trådar läser
+        samtidigt: uppdatera en kopia från snapshot() och byt referens.
+
+        Args:
+            rows (pd.DataFrame): Nya rader med samma kolumner som analyserns data,
+                t.ex. från data_loader.append_delta
+
+        Raises:
+            KeyError: Om någon av analyserns kolumner saknas i rows
+        """
+        missing = [col for col in self.df.columns if col not in rows.columns]
+        if missing:
+            raise KeyError(f"Kolumnerna saknas i de nya raderna: {missing}")
+        if len(rows) == 0:
+            return
+
+        base_rows = len(self.df)
+        positions = np.arange(base_rows, base_rows + len(rows))
+        combined = {col: _combine(self.df[col], rows[col]) for col in self.df.columns}
+        new_frame = pd.DataFrame({col: values[base_rows:] for col, values in combined.items()}, index=positions)
+
+        # Nya rader läggs sist i sitt lands block (de har högst ursprunglig position)
+        order, points, noc_offsets = _insert_rows(self._noc_offsets, new_frame['NOC'], base_rows)
+        take = np.insert(np.arange(base_rows), points, base_rows + order)
+        index = np.insert(self.df.index.to_numpy(), points, positions[order])
+        had_ages = self.df['Age'].notna().any()
+        self.df = pd.DataFrame({col: values.take(take) for col, values in combined.items()}, index=index)
+        self._source_position = np.insert(self._source_position, points, positions[order])
+        self._noc_offsets = noc_offsets
+        # Lagrad position för varje ny rad, i ursprunglig ordning
+        new_rows = np.empty(len(rows), dtype='int64')
+        new_rows[order] = points + np.arange(len(rows))
+
+        # Sportpermutationen: befintliga positioner flyttas fram med antalet
+        # rader infogade före dem, nya rader läggs sist i sin sports grupp
+        shifted = self._sport_positions + np.searchsorted(points, self._sport_positions, side='right')
+        order, points, self._sport_offsets = _insert_rows(self._sport_offsets, new_frame['Sport'], len(shifted))
+        self._sport_positions = np.insert(shifted, points, new_rows[order])
+
+        years = new_frame['Year']
+        if self.year_range is None:
+            self.year_range = (int(years.min()), int(years.max()))
+        else:
+            self.year_range = (min(self.year_range[0], int(years.min())), max(self.year_range[1], int(years.max())))
+        self.age_bin_edges = (_widen_age_bin_edges(self.age_bin_edges, new_frame['Age']) if had_ages
+                              else _age_bin_edges(new_frame['Age']))
+        self._boxplot_tables = {}
+        self.backend.append(self.df, new_frame, take)
+
+        # Kuben: aggregera bara de nya medaljraderna och slå ihop med befintliga celler
+        delta_cube = self.backend.cube_cells(new_rows, positions, MEDAL_CUBE_KEYS)
+        self._set_medal_cube(_merge_cells(self._medal_cube, delta_cube, MEDAL_CUBE_KEYS))
+        self._build_race_tables()
+        # Topplistorna: samma sak för idrottarnas medaljceller (om de är byggda),
+        # listorna byggs om från cellerna vid nästa anrop
+        if self._athlete_cells is not None:
+            delta_cells = self.backend.cube_cells(new_rows, positions, ATHLETE_CELL_KEYS)
+            self._athlete_cells = _merge_cells(self._athlete_cells, delta_cells, ATHLETE_CELL_KEYS)
+        self._leaderboards = None
+
+        self.data_version += 1
+        self.cache_clear()
+
+    def snapshot(self) -> 'OlympicAnalyzer':
+        """
+        Kopia av analysern som kan uppdateras (append) medan andra trådar läser
+        originalet
+
+        Ramar, offset-tabeller och kuben delas tills append ersätter dem (de
+        ändras aldrig på plats), frågemotorn kopieras och resultatcachen är ny
+        och tom, så att läsare av originalet aldrig ser ett halvt uppdaterat
+        tillstånd eller fyller kopians cache.
+
+        Returns:
+            OlympicAnalyzer: Den nya analysern
+        """
+        clone = copy.copy(self)
+        clone.backend = copy.copy(self.backend)
+        clone._boxplot_tables = dict(self._boxplot_tables)
+        if self._result_cache is not None:
+            clone._result_cache = ResultCache(self._result_cache.max_entries, self._result_cache.max_bytes)
+        return clone
+
+    def cache_info(self) -> Optional[CacheInfo]:
         """
-        self.df = df.copy()
+        Räknare för resultatcachen (träffar, missar, utkastade poster, bytes)
+
+        Returns:
+            CacheInfo | None: None om cachen inte är påslagen
+        """
+        return self._result_cache.info() if self._result_cache is not None else None
+
+    def cache_clear(self) -> None:
+        """Tömmer resultatcachen, t.ex. när den underliggande datan ändrats."""
+        if self._result_cache is not None:
+            self._result_cache.clear()
+
+    def country_rows(self, country_code: str) -> pd.DataFrame:
+        """
+        Alla rader för ett land som en sammanhängande slice (ingen kopiering)
+
+        Args:
+            country_code (str): NOC-kod för landet
+
+        Returns:
+            pd.DataFrame: Landets rader i ursprunglig ordning
+        """
+        return self.df.iloc[self._country_slice(country_code)]
+
+    def sport_rows(self, sport_name: str) -> pd.DataFrame:
+        """
+        Alla rader för en sport via sportpermutationen
+
+        Args:
+            sport_name (str): Namn på sporten
+
+        Returns:
+            pd.DataFrame: Sportens rader i ursprunglig ordning
+        """
+        return self.df.take(self._sport_selection(sport_name))
+
+    def _country_slice(self, country_code: str) -> slice:
+        start, stop = self._noc_offsets.get(country_code, (0, 0))
+        return slice(start, stop)
+
+    def _sport_selection(self, sport_name: str) -> np.ndarray:
+        start, stop = self._sport_offsets.get(sport_name, (0, 0))
+        return self._sport_positions[start:stop]
+
+    def _build_medal_cube(self) -> None:
+        # 'first' = ursprunglig radposition för cellens första medalj, behövs för value_counts-ordningen
+        self._set_medal_cube(self.backend.cube_cells(slice(None), self._source_position, MEDAL_CUBE_KEYS))
+
+    def _set_medal_cube(self, cube: pd.DataFrame) -> None:
+        self._medal_cube = cube
+        # Stabil sortering på NOC behåller 'first'-ordningen inom varje land
+        codes, _ = pd.factorize(cube['NOC'], sort=True)
+        self._cube_by_noc = cube.take(_stable_argsort(codes))
+        # Offsets per land; cellerna skivas ut först när landet efterfrågas
+        self._cube_offsets = _group_offsets(self._cube_by_noc['NOC'])
+
+    def _build_race_tables(self) -> None:
+        """
+        Rangordnar medaljtabellen per år en gång för varje säsong, upp till
+        RACE_MAX_TOP_N länder per år. global_medal_race tar sedan bara ett
+        prefix (Rank <= top_n) ur tabellen.
+        """
+        self._race_tables = {
+            season: self._race_table(season, RACE_MAX_TOP_N) for season in RACE_SEASONS
+        }
+
+    def _race_table(self, season: Optional[str], top_n: int) -> pd.DataFrame:
+        cells = self._medal_cube
+        if season and season != 'All':
+            cells = cells[cells['Season'] == season]
+
+        medal_table = (
+            cells.groupby(['Year', 'NOC'])['count']
+            .sum()
+            .reset_index(name='Medals')
+        )
+        return self._rank_medal_table(medal_table, top_n)
+
+    def _leaderboard_index(self) -> dict:
+        """
+        Topplistor upp till LEADERBOARD_MAX_TOP_N per land, sport, decennium
+        och totalt, byggda ur idrottarnas medaljceller (antal per idrottare,
+        land, sport, år och medaljtyp). Byggs en gång och efter append.
+
+        Returns:
+            dict: (by, medaljtyp) -> (tabell indexerad på Name_hash, offsets per grupp)
+
+        Raises:
+            KeyError: Om datan saknar kolumnen Name_hash
+        """
+        if self._leaderboards is None:
+            if 'Name_hash' not in self.df.columns:
+                raise KeyError("Topplistorna kräver kolumnen Name_hash")
+            if self._athlete_cells is None:
+                self._athlete_cells = self.backend.cube_cells(slice(None), self._source_position, ATHLETE_CELL_KEYS)
+            leaderboards = {}
+            for by in LEADERBOARD_DIMENSIONS:
+                for medal, table in _rank_athletes(self._athlete_cells, by, LEADERBOARD_MAX_TOP_N).items():
+                    leaderboards[by, medal] = (table.drop(columns=by).set_index('Name_hash'), _group_offsets(table[by]))
+            self._leaderboards = leaderboards
+        return self._leaderboards
+
+    def _country_cells(self, country_code: str) -> pd.DataFrame:
+        start, stop = self._cube_offsets.get(country_code, (0, 0))
+        return self._cube_by_noc.iloc[start:stop]
+
+    def _check(self, cube_result, scan):
+        # scan är den radvisa implementationen och körs bara när check_cube är på
+        if self.check_cube:
+            if isinstance(cube_result, pd.DataFrame):
+                pd.testing.assert_frame_equal(cube_result, scan())
+            else:
+                pd.testing.assert_series_equal(cube_result, scan())
+        return cube_result
     
+    @_cached
     def top_sports_by_medals(self, country_code: str, top_n: int = 10) -> pd.Series:
         """
         Sporter med flest medaljer för ett land
@@ -38,14 +773,19 @@ class OlympicAnalyzer:
         Returns:
             pd.Series: Sorterad serie med sporter och medaljantal
         """
+        result = _cube_counts(self._country_cells(country_code), 'Sport').head(top_n)
+        return self._check(result, lambda: self._scan_top_sports_by_medals(country_code, top_n))
+
+    def _scan_top_sports_by_medals(self, country_code: str, top_n: int = 10) -> pd.Series:
         # Boolean indexing for efficient data filtering
         # Reference: Pandas documentation - https://pandas.pydata.org/docs/user_guide/indexing.html#boolean-indexing
         country_data = self.df[
             (self.df['NOC'] == country_code) & 
             (self.df['Medal'].notna())
         ]
-        return country_data['Sport'].value_counts().head(top_n)
+        return _value_counts(country_data['Sport']).head(top_n)
     
+    @_cached
     def medals_per_olympics(self, country_code: str) -> pd.Series:
         """
         Antal medaljer per olympiad för ett land
@@ -56,11 +796,16 @@ class OlympicAnalyzer:
         Returns:
             pd.Series: Serie med år som index och medaljantal som värden
         """
+        result = _cube_counts(self._country_cells(country_code), 'Year', sort_index=True)
+        return self._check(result, lambda: self._scan_medals_per_olympics(country_code))
+
+    def _scan_medals_per_olympics(self, country_code: str) -> pd.Series:
         return self.df[
             (self.df['NOC'] == country_code) & 
             (self.df['Medal'].notna())
         ].groupby('Year').size()
     
+    @_cached
     def age_distribution(self, country_code: str) -> pd.Series:
         """
         Åldersfördelning för ett lands idrottare
@@ -71,11 +816,88 @@ class OlympicAnalyzer:
         Returns:
             pd.Series: Serie med åldrar
         """
-        return self.df[
-            (self.df['NOC'] == country_code) & 
-            (self.df['Age'].notna())
-        ]['Age']
+        rows = self.backend.select(self._country_slice(country_code), not_null=['Age'])
+        return self.backend.values(rows, 'Age')
+
+    def _age_bins(self, ages: np.ndarray) -> np.ndarray:
+        # Intervallnummer per ålder (åldrar utanför gränserna hamnar i kantintervallen)
+        edges = self.age_bin_edges
+        bins = (ages - edges[0]) // (edges[1] - edges[0])
+        return np.clip(bins, 0, len(edges) - 2).astype('int64')
+
+    def _age_histogram(self, ages: pd.Series) -> pd.Series:
+        counts = np.bincount(self._age_bins(ages.to_numpy(dtype='float64')), minlength=len(self.age_bin_edges) - 1)
+        return pd.Series(counts.astype('int64'), index=pd.Index(self.age_bin_edges[:-1], name='Age'), name='count')
+
+    @_cached
+    def age_histogram(self, country_code: str) -> pd.Series:
+        """
+        Åldersfördelning för ett land som antal per åldersintervall
+
+        Intervallen är desamma för alla länder och sporter (age_bin_edges),
+        så ett diagram behöver bara ett 20-tal värden i stället för alla åldrar.
+
+        Args:
+            country_code (str): NOC-kod för landet
+
+        Returns:
+            pd.Series: Antal per intervall, indexerat på intervallets vänstra gräns
+        """
+        return self._age_histogram(self.age_distribution(country_code))
+
+    @_cached
+    def sport_age_histogram(self, sport_name: str) -> pd.Series:
+        """
+        Åldersfördelning för en sport som antal per åldersintervall
+
+        Args:
+            sport_name (str): Namn på sporten
+
+        Returns:
+            pd.Series: Antal per intervall, indexerat på intervallets vänstra gräns
+        """
+        rows = self.backend.select(self._sport_selection(sport_name), not_null=['Age'])
+        return self._age_histogram(self.backend.values(rows, 'Age'))
+
+    def age_histograms(self, by: str = 'NOC') -> pd.DataFrame:
+        """
+        Åldershistogram för alla länder eller alla sporter i ett svep
+
+        Varje rad får ett intervallnummer och en gruppkod, och en enda
+        bincount över (grupp, intervall) ger alla histogram. Med
+        resultatcachen påslagen lagras de också där, så age_histogram(noc)
+        och sport_age_histogram(sport) blir träffar.
+
+        Args:
+            by (str): 'NOC' eller 'Sport'
 
+        Returns:
+            pd.DataFrame: En rad per land/sport, en kolumn per intervall (vänstra gränsen)
+
+        Raises:
+            ValueError: Om by inte är 'NOC' eller 'Sport'
+        """
+        methods = {'NOC': 'age_histogram', 'Sport': 'sport_age_histogram'}
+        if by not in methods:
+            raise ValueError(f"Histogram kan delas upp på {' eller '.join(methods)}, inte {by}")
+
+        ages = self.df['Age'].to_numpy(dtype='float64', na_value=np.nan)
+        valid = ~np.isnan(ages)
+        codes, groups = pd.factorize(self.df[by], sort=True)
+        valid &= codes >= 0
+        nbins = len(self.age_bin_edges) - 1
+        counts = np.bincount(codes[valid] * nbins + self._age_bins(ages[valid]), minlength=len(groups) * nbins)
+        histograms = pd.DataFrame(counts.reshape(len(groups), nbins).astype('int64'),
+                                  index=pd.Index(list(groups), name=by),
+                                  columns=pd.Index(self.age_bin_edges[:-1], name='Age'))
+
+        if self._result_cache is not None:
+            for key, row in histograms.iterrows():
+                # Samma nyckel som @_cached ger age_histogram(noc) / sport_age_histogram(sport)
+                self._result_cache.put((methods[by], key), row.rename('count'))
+        return histograms
+
+    @_cached
     def gender_distribution(self, country_code: str) -> pd.Series:
         """
         Könsfördelning för ett lands idrottare
@@ -86,8 +908,9 @@ class OlympicAnalyzer:
         Returns:
             pd.Series: Serie med antal män och kvinnor
         """
-        return self.df[self.df['NOC'] == country_code]['Sex'].value_counts()
+        return self.backend.value_counts(self._country_slice(country_code), 'Sex')
     
+    @_cached
     def sport_analysis(self, sport_name: str) -> Dict[str, Union[pd.Series, pd.DataFrame]]:
         """
         Djupanalys för en specifik sport
@@ -99,18 +922,24 @@ class OlympicAnalyzer:
             dict: Dictionary med olika analyser:
                 - medal_countries: Medaljer per land
                 - age_distribution: Åldersfördelning
+                - age_histogram: Antal per åldersintervall (se sport_age_histogram)
                 - gender_split: Könsfördelning
                 - medal_types: Fördelning av medaljtyper
         """
-        sport_df = self.df[self.df['Sport'] == sport_name]
-        
+        backend = self.backend
+        rows = self._sport_selection(sport_name)
+        medal_rows = backend.select(rows, not_null=['Medal'])
+        ages = backend.values(backend.select(rows, not_null=['Age']), 'Age')
+
         return {
-            'medal_countries': sport_df[sport_df['Medal'].notna()]['NOC'].value_counts().head(8),
-            'age_distribution': sport_df[sport_df['Age'].notna()]['Age'],
-            'gender_split': sport_df['Sex'].value_counts(),
-            'medal_types': sport_df[sport_df['Medal'].notna()]['Medal'].value_counts()
+            'medal_countries': backend.value_counts(medal_rows, 'NOC').head(8),
+            'age_distribution': ages,
+            'age_histogram': self._age_histogram(ages),
+            'gender_split': backend.value_counts(rows, 'Sex'),
+            'medal_types': backend.value_counts(medal_rows, 'Medal')
         }
     
+    @_cached
     def get_medal_statistics(self, country_code: str) -> pd.Series:
         """
         Detaljerad medaljstatistik för ett land (guld, silver, brons)
@@ -121,12 +950,17 @@ class OlympicAnalyzer:
         Returns:
             pd.Series: Medaljtyper med antal
         """
+        result = _cube_counts(self._country_cells(country_code), 'Medal')
+        return self._check(result, lambda: self._scan_get_medal_statistics(country_code))
+
+    def _scan_get_medal_statistics(self, country_code: str) -> pd.Series:
         country_medals = self.df[
             (self.df['NOC'] == country_code) & 
             (self.df['Medal'].notna())
         ]
-        return country_medals['Medal'].value_counts()
+        return _value_counts(country_medals['Medal'])
     
+    @_cached
     def get_top_athletes_by_medals(self, country_code: str, top_n: int = 10) -> pd.Series:
         """
         Toppidrottare (baserat på hash) med flest medaljer för ett land
@@ -138,12 +972,198 @@ class OlympicAnalyzer:
         Returns:
             pd.Series: Idrottare (hashade namn) med medaljantal
         """
-        country_medals = self.df[
-            (self.df['NOC'] == country_code) & 
-            (self.df['Medal'].notna())
-        ]
-        return country_medals['Name_hash'].value_counts().head(top_n)
+        if 'Name_hash' in self.df.columns and top_n <= LEADERBOARD_MAX_TOP_N:
+            result = self.leaderboard('NOC', country_code, top_n=top_n)['Medals'].rename('count')
+            return self._check(result, lambda: self._scan_get_top_athletes_by_medals(country_code, top_n))
+        return self._scan_get_top_athletes_by_medals(country_code, top_n)
+
+    def _scan_get_top_athletes_by_medals(self, country_code: str, top_n: int = 10) -> pd.Series:
+        medal_rows = self.backend.select(self._country_slice(country_code), not_null=['Medal'])
+        return self.backend.value_counts(medal_rows, 'Name_hash').head(top_n)
+
+    def leaderboard(self, by: str = 'All', key: Optional[object] = None, medal: Optional[str] = None,
+                    top_n: int = 10) -> pd.DataFrame:
+        """
+        Topplista över idrottare (hashade namn) med flest medaljer
+
+        Listorna förberäknas vid första anropet för alla länder, sporter och
+        decennier samt totalt, upp till LEADERBOARD_MAX_TOP_N idrottare, så
+        ett uppslag är en dict-sökning och en slice. Större top_n räknas fram ur idrottarnas
+        medaljceller.
 
+        Args:
+            by (str): 'NOC', 'Sport', 'Decade' eller 'All'
+            key: NOC-kod, sport eller decennium (t.ex. 1990), ignoreras för 'All'
+            medal (str | None): Rangordna på 'Gold', 'Silver' eller 'Bronze',
+                None = totalt antal medaljer
+            top_n (int): Antal idrottare
+
+        Returns:
+            pd.DataFrame: Indexerad på Name_hash med kolumnerna Medals, Gold,
+                Silver och Bronze, flest först (lika antal: först att ta medaljen)
+
+        Raises:
+            ValueError: Om by eller medal är okänd
+            KeyError: Om datan saknar kolumnen Name_hash
+        """
+        if by not in LEADERBOARD_DIMENSIONS:
+            raise ValueError(f"Topplistor finns per {', '.join(LEADERBOARD_DIMENSIONS)}, inte {by}")
+        if medal is not None and medal not in MEDAL_TYPES:
+            raise ValueError(f"Okänd medaljtyp: {medal} (välj bland {', '.join(MEDAL_TYPES)})")
+        index = self._leaderboard_index()
+        key = 'All' if by == 'All' else key
+
+        if top_n <= LEADERBOARD_MAX_TOP_N:
+            table, offsets = index[by, medal]
+            start, stop = offsets.get(key, (0, 0))
+            return detach(table.iloc[start:min(stop, start + top_n)])
+
+        table = _rank_athletes(self._athlete_cells, by, top_n)[medal]
+        return table[table[by] == key].drop(columns=by).set_index('Name_hash')
+
+    @_cached
+    def country_report(self, country_code: str) -> CountryReport:
+        """
+        Alla landsaggregat för ett land i ett anrop
+
+        Landets rader väljs en gång (ett sammanhängande block) och medaljerna
+        läses ur medaljkuben, i stället för fem separata anrop per land.
+
+        Args:
+            country_code (str): NOC-kod för landet
+
+        Returns:
+            CountryReport: Toppsporter, medaljer per år, medaljtyper, åldrar,
+                åldershistogram, könsfördelning och längd/vikt-statistik
+        """
+        backend = self.backend
+        rows = self._country_slice(country_code)
+        cells = self._country_cells(country_code)
+        body_rows = backend.select(rows, not_null=['Height', 'Weight'])
+        ages = backend.values(backend.select(rows, not_null=['Age']), 'Age')
+        return CountryReport(
+            noc=country_code,
+            top_sports=_cube_counts(cells, 'Sport').head(10),
+            medals_per_year=_cube_counts(cells, 'Year', sort_index=True),
+            medal_types=_cube_counts(cells, 'Medal'),
+            ages=ages,
+            age_histogram=self._age_histogram(ages),
+            gender=backend.value_counts(rows, 'Sex'),
+            body=_body_stats(backend.values(body_rows, 'Height'), backend.values(body_rows, 'Weight')),
+        )
+
+    def country_reports(self, countries: Optional[Iterable[str]] = None) -> Dict[str, CountryReport]:
+        """
+        CountryReport för många länder på en gång, t.ex. för att förberäkna
+
+        Längd/vikt och kön aggregeras med en groupby över alla rader, åldrarna
+        med en mask över hela kolumnen som sedan delas upp per land, och
+        medaljerna kommer från medaljkuben. Med resultatcachen påslagen
+        lagras rapporterna också där, så country_report(noc) blir en träff.
+
+        Args:
+            countries (Iterable[str] | None): NOC-koder, None = alla länder
+
+        Returns:
+            Dict[str, CountryReport]: Rapport per NOC-kod
+        """
+        df = self.df
+        countries = self.countries if countries is None else list(countries)
+
+        # Längd och vikt: describe() per land med vektoriserade groupby-aggregat
+        # (groupby.describe anropar describe en gång per grupp)
+        both = (df['Height'].notna() & df['Weight'].notna()).to_numpy()
+        grouped = (
+            pd.DataFrame({'NOC': _plain(df['NOC'][both]), 'Height': df['Height'][both],
+                          'Weight': df['Weight'][both]})
+            .astype({'Height': 'float64', 'Weight': 'float64'})
+            .groupby('NOC', sort=False)
+        )
+        quantiles = grouped.quantile([0.25, 0.5, 0.75])
+        parts = [grouped.count(), grouped.mean(), grouped.std(), grouped.min()]
+        parts += [quantiles.xs(q, level=1) for q in (0.25, 0.5, 0.75)] + [grouped.max()]
+        body_nocs = parts[0].index
+        body = np.stack([part.reindex(body_nocs).to_numpy() for part in parts], axis=1)
+        body_row = {noc: i for i, noc in enumerate(body_nocs)}
+
+        # Kön: celler (NOC, Sex) med antal och första ursprungliga position, som medaljkuben
+        sex = df['Sex'].notna().to_numpy()
+        sex_cells = (
+            pd.DataFrame({'NOC': _plain(df['NOC'][sex]), 'Sex': _plain(df['Sex'][sex]),
+                          '_pos': self._source_position[sex]})
+            .groupby(['NOC', 'Sex'], sort=False)['_pos']
+            .agg(['size', 'min'])
+            .rename(columns={'size': 'count', 'min': 'first'})
+            .reset_index()
+            .sort_values('first', ignore_index=True)
+        )
+        codes, _ = pd.factorize(sex_cells['NOC'], sort=True)
+        sex_cells = sex_cells.take(_stable_argsort(codes))
+        sex_offsets = _group_offsets(sex_cells['NOC'])
+
+        # Åldrar: en mask över hela kolumnen, sedan ett block per land
+        age_positions = np.flatnonzero(df['Age'].notna().to_numpy())
+        ages = df['Age'].iloc[age_positions]
+        histograms = self.age_histograms('NOC')
+        empty_histogram = self._age_histogram(ages.iloc[:0])
+
+        reports = {}
+        for noc in countries:
+            cells = self._country_cells(noc)
+            start, stop = self._noc_offsets.get(noc, (0, 0))
+            age_start, age_stop = np.searchsorted(age_positions, [start, stop])
+            sex_start, sex_stop = sex_offsets.get(noc, (0, 0))
+            if noc in body_row:
+                body_stats = pd.DataFrame(body[body_row[noc]], index=BODY_STATS, columns=['Height', 'Weight'])
+            else:
+                body_stats = _body_stats(pd.Series(dtype='float64'), pd.Series(dtype='float64'))
+            reports[noc] = CountryReport(
+                noc=noc,
+                top_sports=_cube_counts(cells, 'Sport').head(10),
+                medals_per_year=_cube_counts(cells, 'Year', sort_index=True),
+                medal_types=_cube_counts(cells, 'Medal'),
+                ages=ages.iloc[age_start:age_stop],
+                age_histogram=histograms.loc[noc].rename('count') if noc in histograms.index else empty_histogram,
+                gender=_cube_counts(sex_cells.iloc[sex_start:sex_stop], 'Sex'),
+                body=body_stats,
+            )
+            if self._result_cache is not None:
+                # Samma nyckel som @_cached ger country_report(noc)
+                self._result_cache.put(('country_report', noc), reports[noc])
+                reports[noc] = detach(reports[noc])
+        return reports
+
+    def boxplot_stats(self, by: str = 'NOC') -> pd.DataFrame:
+        """
+        Boxplotstatistik för längd, vikt och ålder per land, sport eller säsong
+
+        Alla grupper och kolumner beräknas i ett grupperat svep första gången
+        och lagras tills datan ändras. Kolumnerna har samma namn som
+        matplotlibs Axes.bxp förväntar sig (q1, med, q3, whislo, whishi,
+        fliers, mean) och motsvarar q1, median, q3, lowerfence och
+        upperfence i Plotlys go.Box.
+
+        Args:
+            by (str): 'NOC', 'Sport' eller 'Season'
+
+        Returns:
+            pd.DataFrame: En rad per (grupp, kolumn), t.ex. boxplot_stats().loc['CAN']
+                ger en rad per kolumn i BOXPLOT_COLUMNS som har värden
+
+        Raises:
+            ValueError: Om by inte är 'NOC', 'Sport' eller 'Season'
+        """
+        if by not in ('NOC', 'Sport', 'Season'):
+            raise ValueError(f"Boxplotstatistik kan delas upp på NOC, Sport eller Season, inte {by}")
+        table = self._boxplot_tables.get(by)
+        if table is None:
+            keys = self.df[by]
+            parts = {col: _box_stats(keys, self.df[col]) for col in BOXPLOT_COLUMNS}
+            table = pd.concat(parts, names=['column', by]).swaplevel().sort_index(level=0, sort_remaining=False)
+            self._boxplot_tables[by] = table
+        return detach(table)
+
+    @_cached
     def country_athlete_profile(self, country_code: str = 'CAN', season: Optional[str] = None, medal_only: bool = False) -> pd.DataFrame:
         """
         Returnerar dataprofil för ett lands atleter (används för 3D-visualiseringar)
@@ -156,25 +1176,80 @@ class OlympicAnalyzer:
         Returns:
             pd.DataFrame: Filtrerad DataFrame med numeriska attribut bevarade
         """
-        data = self.df[self.df['NOC'] == country_code].copy()
+        numeric_cols = ['Age', 'Height', 'Weight']
+        rows = self.backend.select(
+            self._country_slice(country_code),
+            not_null=numeric_cols + (['Medal'] if medal_only else []),
+            equals={'Season': season} if season and season != 'All' else None,
+        )
+        data = self.df.take(rows)
 
-        if season and season != 'All':
-            data = data[data['Season'] == season]
+        # Raderna har redan värden i de numeriska kolumnerna; bara kolumner som
+        # inte är numeriska konverteras, så ingen extra kopia görs i normalfallet
+        converted = {col: pd.to_numeric(data[col], errors='coerce')
+                     for col in numeric_cols if not pd.api.types.is_numeric_dtype(data[col])}
+        if converted:
+            data = data.assign(**converted).dropna(subset=numeric_cols)
+        if data['Year'].dtype != np.dtype(int):
+            data = data.assign(Year=data['Year'].astype(int))
 
-        if medal_only:
-            data = data[data['Medal'].notna()]
+        return data
 
-        numeric_cols = ['Age', 'Height', 'Weight']
-        data = data.dropna(subset=numeric_cols).copy()
+    @_cached
+    def profile_partitions(self, country_code: str = 'CAN', medal_only: bool = False) -> Dict[tuple, pd.DataFrame]:
+        """
+        Delar upp ett lands atletprofil per (Year, Season) en gång, så att
+        tidsreglaget och säsongsfiltret bara väljer färdiga block.
+
+        Args:
+            country_code (str): NOC-kod för landet
+            medal_only (bool): Om endast medaljörer ska inkluderas
 
-        for col in numeric_cols:
-            data[col] = pd.to_numeric(data[col], errors='coerce')
+        Returns:
+            Dict[tuple, pd.DataFrame]: Profilrader per (Year, Season), sorterat på nyckeln
+        """
+        profile = self.country_athlete_profile(country_code, medal_only=medal_only)
+        return {
+            (int(year), str(season)): rows
+            for (year, season), rows in profile.groupby(['Year', 'Season'], observed=True, sort=True)
+        }
 
-        data = data.dropna(subset=numeric_cols)
-        data['Year'] = data['Year'].astype(int)
+    @_cached
+    def profile_frames(self, country_code: str = 'CAN', season: Optional[str] = None,
+                       medal_only: bool = False, max_points: Optional[int] = None,
+                       seed: int = 0) -> Dict[int, pd.DataFrame]:
+        """
+        Animationsrutor (ett år per ruta) för 3D-visualiseringen med punktbudget.
 
-        return data
+        Rutorna byggs av partitionerna från profile_partitions. Med max_points
+        gallras varje ruta med stratifierat urval per sport, där alla medaljörer
+        behålls, så att stora årgångar inte ger tunga figurer.
 
+        Args:
+            country_code (str): NOC-kod för landet
+            season (str | None): Filtrera på säsong ('Summer', 'Winter' eller None/'All')
+            medal_only (bool): Om endast medaljörer ska inkluderas
+            max_points (int | None): Max antal punkter per ruta, None = ingen gräns
+            seed (int): Seed för urvalet (samma seed ger samma punkter)
+
+        Returns:
+            Dict[int, pd.DataFrame]: Profilrader per år, sorterat på år
+        """
+        by_year: Dict[int, list] = {}
+        for (year, part_season), rows in self.profile_partitions(country_code, medal_only).items():
+            if season and season != 'All' and part_season != season:
+                continue
+            by_year.setdefault(year, []).append(rows)
+
+        frames = {}
+        for year, parts in by_year.items():
+            frame = parts[0] if len(parts) == 1 else pd.concat(parts)
+            if max_points is not None:
+                frame = _stratified_sample(frame, max_points, 'Sport', frame['Medal'].notna(), seed + year)
+            frames[year] = frame
+        return frames
+
+    @_cached
     def global_medal_race(self, season: Optional[str] = None, top_n: int = 10) -> pd.DataFrame:
         """
         Skapar en global medaljtabell per år för animerade visualiseringar.
@@ -186,17 +1261,29 @@ class OlympicAnalyzer:
         Returns:
             pd.DataFrame: DataFrame med kolumnerna Year, NOC och Medals
         """
-        data = self.df[self.df['Medal'].notna()].copy()
+        table = self._race_tables.get(season or 'All')
+        if table is not None and top_n <= RACE_MAX_TOP_N:
+            result = table[table['Rank'] <= top_n]
+        else:
+            result = self._race_table(season, top_n)
+        return self._check(result, lambda: self._scan_global_medal_race(season, top_n))
+
+    def _scan_global_medal_race(self, season: Optional[str] = None, top_n: int = 10) -> pd.DataFrame:
+        data = self.df[self.df['Medal'].notna()]
 
         if season and season != 'All':
             data = data[data['Season'] == season]
 
         medal_table = (
-            data.groupby(['Year', 'NOC'])
+            data.groupby(['Year', 'NOC'], observed=True)
             .size()
             .reset_index(name='Medals')
         )
+        medal_table['NOC'] = _plain(medal_table['NOC'])
+        return self._rank_medal_table(medal_table, top_n)
 
+    @staticmethod
+    def _rank_medal_table(medal_table: pd.DataFrame, top_n: int) -> pd.DataFrame:
         medal_table['Year'] = medal_table['Year'].astype(int)
         medal_table = medal_table.sort_values(['Year', 'Medals'], ascending=[True, False])
 
@@ -204,4 +1291,3 @@ class OlympicAnalyzer:
         top_table['Rank'] = top_table.groupby('Year')['Medals'].rank(method='first', ascending=False)
 
         return top_table
-
@@ -0,0 +1,118 @@
+# Plotly figure JSON
+# Documentation: https://plotly.com/python-api-reference/generated/plotly.io.to_json.html
+import json
+import threading
+from typing import Any, Callable, Hashable, Iterable, Optional, Tuple
+
+from .metrics import RENDER_SECONDS, timed
+from .response_encoding import compact_figure, record_bytes_saved
+from .result_cache import CacheInfo, ResultCache
+
+
+class FigureCache:
+    """
+    Serverside-cache för färdiga Plotly-figurer
+
+    Varje post är figurernas serialiserade JSON för ett anrop, nycklad på
+    (callback, indata, datasetversion). Att bygga figurer med Plotly Express
+    dominerar callback-tiden, en träff kostar bara en json.loads per figur.
+    Med compact=True lagras figurerna kompakta (se compact_figure).
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: Optional[int] = 256 * 1024 * 1024,
+                 compact: bool = False, precision: Optional[int] = 3):
+        """
+        Args:
+            max_entries (int): Max antal cachade callback-svar
+            max_bytes (int | None): Max total JSON-storlek i bytes
+            compact (bool): Avrunda spårens tal och ta bort upprepade data i animationsrutor
+            precision (int | None): Antal decimaler när compact=True, None avrundar inte
+        """
+        self._cache = ResultCache(max_entries, max_bytes)
+        self.compact = compact
+        self.precision = precision
+        self._warmup_thread: Optional[threading.Thread] = None
+
+    def get_or_render(self, callback: str, inputs: Tuple, version: Hashable,
+                      render: Callable[[], Any]) -> Any:
+        """
+        Returnerar cachade figurer eller renderar och cachar dem
+
+        Args:
+            callback (str): Callbackens namn
+            inputs (tuple): Callbackens indata
+            version: Datasetversion, nya versioner ger nya nycklar
+            render: Funktion som bygger en figur, en tuple av figurer eller
+                JSON-data (dict) för en dcc.Store
+
+        Returns:
+            Figur-dict eller tuple av figur-dicts (samma form som render)
+        """
+        key = (callback, inputs, version)
+        encoded = self._cache.get_or_compute(key, lambda: self._encode(callback, _build(render)))
+        if isinstance(encoded, tuple):
+            return tuple(json.loads(item) for item in encoded)
+        return json.loads(encoded)
+
+    def _encode(self, callback: str, figures: Any):
+        if not self.compact:
+            return _encode(figures)
+        return _encode(figures, lambda text: self._compact(callback, text))
+
+    def _compact(self, callback: str, text: str) -> str:
+        compact = json.dumps(compact_figure(json.loads(text), self.precision), separators=(',', ':'))
+        record_bytes_saved(callback, 'compact', len(text) - len(compact))
+        return compact
+
+    def warm_up(self, jobs: Iterable[Callable[[], Any]], background: bool = True) -> Optional[threading.Thread]:
+        """
+        Förrenderar figurer genom att anropa callbackarna i förväg
+
+        Args:
+            jobs: Anrop som fyller cachen, t.ex. lambda: update_country_plots('SWE')
+            background (bool): Kör i en daemon-tråd i stället för direkt
+
+        Returns:
+            threading.Thread | None: Tråden om background=True
+        """
+        def run():
+            for job in jobs:
+                try:
+                    job()
+                except Exception:
+                    # Uppvärmningen är en optimering, ett fel får inte stoppa resten
+                    continue
+
+        if not background:
+            run()
+            return None
+        self._warmup_thread = threading.Thread(target=run, name='figure-cache-warmup', daemon=True)
+        self._warmup_thread.start()
+        return self._warmup_thread
+
+    def info(self) -> CacheInfo:
+        """Räknare för cachen (träffar, missar, utkastade poster, bytes)."""
+        return self._cache.info()
+
+    def clear(self) -> None:
+        """Tömmer cachen."""
+        self._cache.clear()
+
+
+@timed(RENDER_SECONDS, "Tid att bygga och serialisera figurer", renderer='plotly', stage='build')
+def _build(render: Callable[[], Any]) -> Any:
+    return render()
+
+
+@timed(RENDER_SECONDS, "Tid att bygga och serialisera figurer", renderer='plotly', stage='serialize')
+def _encode(figures: Any, compact: Optional[Callable[[str], str]] = None):
+    if isinstance(figures, tuple):
+        return tuple(_encode_figure(figure, compact) for figure in figures)
+    if isinstance(figures, dict):
+        return json.dumps(figures, separators=(',', ':'))
+    return _encode_figure(figures, compact)
+
+
+def _encode_figure(figure, compact: Optional[Callable[[str], str]]) -> str:
+    text = figure.to_json()
+    return compact(text) if compact else text
@@ -0,0 +1,289 @@
+# Prometheus text exposition format (utan beroende på prometheus_client)
+# Documentation: https://prometheus.io/docs/instrumenting/exposition_formats/
+import bisect
+import functools
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+# Standardgränser för latens (sekunder) och storlek (bytes)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _escape(value: object) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[object], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, object] = {}
+
+    def _key(self, labels: Dict[str, object]) -> Tuple:
+        return tuple(labels.get(name, '') for name in self.labelnames)
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items(), key=lambda item: tuple(map(str, item[0])))
+            lines += self._samples(items)
+        return '\n'.join(lines)
+
+    def _samples(self, items):
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                for key, value in items]
+
+
+class Counter(_Metric):
+    """Monotont växande räknare."""
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Värde som kan sättas godtyckligt (t.ex. minnesanvändning)."""
+    kind = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+
+class Histogram(_Metric):
+    """Fördelning i fasta hinkar, plus summa och antal observationer."""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [antal per hink (sista = +Inf), summa, antal]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self, items):
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Samling av mätvärden som renderas i Prometheus textformat
+
+    När enabled är False gör instrumenteringen (timed, instrument_methods)
+    bara en attributkontroll och anropar funktionen direkt.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """Alla mätvärden i Prometheus textformat (version 0.0.4)."""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+    def clear(self) -> None:
+        with self._lock:
+            self._metrics.clear()
+
+
+# Processens gemensamma register. Slås på av dashboarden (DASHBOARD_METRICS).
+REGISTRY = MetricsRegistry(enabled=False)
+
+ANALYZER_SECONDS = 'olympics_analyzer_seconds'
+CALLBACK_SECONDS = 'olympics_callback_seconds'
+CALLBACK_REQUEST_SECONDS = 'olympics_callback_request_seconds'
+CALLBACK_RESPONSE_BYTES = 'olympics_callback_response_bytes'
+RENDER_SECONDS = 'olympics_render_seconds'
+RESPONSE_BYTES_SAVED = 'olympics_response_bytes_saved_total'
+ERRORS_TOTAL = 'olympics_errors_total'
+
+
+def timed(metric: str, documentation: str, registry: Optional[MetricsRegistry] = None, **labels):
+    """
+    Decorator som mäter anropstiden i ett histogram (antal anrop ingår som _count).
+    Undantag räknas i olympics_errors_total och kastas vidare.
+
+    Args:
+        metric (str): Histogrammets namn
+        documentation (str): Beskrivning (HELP-raden)
+        registry (MetricsRegistry | None): Register, standard är REGISTRY
+        **labels: Fasta etiketter, t.ex. method='age_distribution'
+    """
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            reg = registry or REGISTRY
+            if not reg.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                reg.counter(ERRORS_TOTAL, "Undantag per instrumenterad funktion", ('metric', 'target')).inc(
+                    metric=metric, target=','.join(map(str, labels.values())))
+                raise
+            finally:
+                reg.histogram(metric, documentation, tuple(labels)).observe(time.perf_counter() - start, **labels)
+        return wrapper
+    return decorate
+
+
+def instrument_methods(cls=None, *, metric: str = ANALYZER_SECONDS, registry: Optional[MetricsRegistry] = None):
+    """
+    Klassdecorator: mäter tiden för alla publika metoder som klassen definierar,
+    med metodnamnet som etikett (method="...").
+    """
+    def decorate(klass):
+        for name, value in list(vars(klass).items()):
+            if name.startswith('_') or not callable(value) or isinstance(value, (staticmethod, classmethod)):
+                continue
+            setattr(klass, name, timed(metric, "Tid per publik analysmetod", registry, method=name)(value))
+        return klass
+    return decorate(cls) if cls is not None else decorate
+
+
+def timed_callback(func: Callable) -> Callable:
+    """
+    Decorator för Dash-callbacks: mäter callbackens egen tid och märker
+    Flask-förfrågan så att install_flask kan mäta hela svaret (inklusive
+    JSON-serialisering) och svarsstorleken per callback.
+    """
+    timer = timed(CALLBACK_SECONDS, "Tid i callbackfunktionen", callback=func.__name__)(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if REGISTRY.enabled:
+            from flask import g, has_request_context
+            if has_request_context():
+                g.metrics_callback = func.__name__
+        return timer(*args, **kwargs)
+    return wrapper
+
+
+def install_flask(server, registry: Optional[MetricsRegistry] = None, path: str = '/metrics') -> None:
+    """
+    Mäter callback-förfrågningar på Flask-servern och lägger till `path`
+    som returnerar registret i Prometheus textformat (404 när avstängt).
+    """
+    from flask import Response, abort, g
+
+    reg = registry or REGISTRY
+
+    @server.before_request
+    def _metrics_start():
+        if reg.enabled:
+            g.metrics_start = time.perf_counter()
+
+    @server.after_request
+    def _metrics_finish(response):
+        name = g.pop('metrics_callback', None)
+        start = g.pop('metrics_start', None)
+        if reg.enabled and name and start is not None:
+            reg.histogram(CALLBACK_REQUEST_SECONDS, "Tid per callback-förfrågan inklusive serialisering",
+                          ('callback',)).observe(time.perf_counter() - start, callback=name)
+            size = response.calculate_content_length()
+            if size is not None:
+                reg.histogram(CALLBACK_RESPONSE_BYTES, "Svarsstorlek per callback-förfrågan",
+                              ('callback',), buckets=SIZE_BUCKETS).observe(size, callback=name)
+        return response
+
+    def metrics():
+        if not reg.enabled:
+            abort(404)
+        record_process_memory(reg)
+        return Response(reg.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+    server.add_url_rule(path, 'metrics', metrics)
+
+
+def record_process_memory(registry: Optional[MetricsRegistry] = None) -> None:
+    """Sätter process_resident_memory_bytes (Linux /proc, annars toppvärdet från resource)."""
+    reg = registry or REGISTRY
+    try:
+        with open('/proc/self/statm') as handle:
+            rss = int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    reg.gauge('process_resident_memory_bytes', "Processens residenta minne i bytes").set(rss)
+
+
+def record_dataset(df, load_seconds: float, source: str, registry: Optional[MetricsRegistry] = None) -> None:
+    """
+    Sätter mätvärden för den laddade datan: laddtid, antal rader och minnesavtryck.
+
+    Args:
+        df (pd.DataFrame): Den laddade ramen
+        load_seconds (float): Laddtid i sekunder
+        source (str): Varifrån datan kom ('csv', 'cache' eller 'shared')
+    """
+    reg = registry or REGISTRY
+    if not reg.enabled:
+        return
+    reg.gauge('olympics_data_load_seconds', "Tid att ladda datan", ('source',)).set(load_seconds, source=source)
+    reg.gauge('olympics_data_rows', "Antal rader i datan").set(len(df))
+    reg.gauge('olympics_data_memory_bytes', "Ramens minnesavtryck (memory_usage deep)").set(
+        int(df.memory_usage(deep=True).sum()))
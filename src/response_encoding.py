@@ -0,0 +1,206 @@
+# Kompakt figur-JSON och komprimering av svar (gzip, brotli om installerat)
+# Documentation: https://plotly.com/javascript/reference/
+# Documentation: https://flask.palletsprojects.com/en/latest/api/#flask.Flask.after_request
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence
+
+from .metrics import REGISTRY, RESPONSE_BYTES_SAVED, MetricsRegistry
+
+try:
+    import brotli  # valfritt beroende
+except ImportError:  # pragma: no cover - beror på miljön
+    brotli = None
+
+# Svarstyper som lönar sig att komprimera (JSON, skript, stilmallar, text)
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/javascript', 'text/javascript',
+                          'text/css', 'text/html', 'text/plain')
+
+# Statiska filer (Dash-bundlar, assets): samma URL ger samma bytes, så de
+# komprimeras en gång och återanvänds i stället för vid varje sidladdning
+STATIC_PATH_PREFIXES = ('/_dash-component-suites/', '/assets/')
+
+_MISSING = object()
+
+
+def _round(value: Any, precision: int) -> Any:
+    if isinstance(value, float):
+        value = round(value, precision)
+        # Heltal skrivs utan decimaler (25 i stället för 25.0)
+        return int(value) if value.is_integer() else value
+    if isinstance(value, list):
+        return [_round(item, precision) for item in value]
+    if isinstance(value, dict):
+        return {key: _round(item, precision) for key, item in value.items()}
+    return value
+
+
+def _dedupe_frames(figure: Dict[str, Any]) -> None:
+    # Plotly.animate slår ihop varje rutas spår med spåret på samma plats i
+    # data. En egenskap som har samma värde i alla rutor och i data ändras
+    # aldrig av animationen och behöver inte upprepas i rutorna.
+    frames = figure.get('frames') or []
+    base = figure.get('data') or []
+    for index, trace in enumerate(base):
+        frame_traces = [frame['data'][index] for frame in frames if index < len(frame.get('data') or [])]
+        if not frame_traces or len(frame_traces) != len(frames):
+            continue
+        for key, value in trace.items():
+            if key == 'type':
+                continue
+            if all(frame_trace.get(key, _MISSING) == value for frame_trace in frame_traces):
+                for frame_trace in frame_traces:
+                    del frame_trace[key]
+
+
+def compact_figure(figure: Dict[str, Any], precision: Optional[int] = 3) -> Dict[str, Any]:
+    """
+    Gör en figur-dict (plotly JSON) mindre utan att ändra hur den ritas
+
+    Numeriska värden i spåren avrundas till `precision` decimaler och
+    egenskaper som är lika i alla animationsrutor och i data tas bort ur
+    rutorna. Layouten lämnas orörd.
+
+    Args:
+        figure (dict): Figuren som dict (t.ex. json.loads(fig.to_json()))
+        precision (int | None): Antal decimaler, None avrundar inte
+
+    Returns:
+        dict: Den kompakta figuren (figure ändras på plats)
+    """
+    if precision is not None:
+        figure['data'] = _round(figure.get('data') or [], precision)
+        for frame in figure.get('frames') or []:
+            frame['data'] = _round(frame.get('data') or [], precision)
+    _dedupe_frames(figure)
+    return figure
+
+
+def record_bytes_saved(callback: str, encoding: str, saved: int,
+                       registry: Optional[MetricsRegistry] = None) -> None:
+    """
+    Räknar sparade bytes per callback och kodning i olympics_response_bytes_saved_total
+
+    Args:
+        callback (str): Callbackens namn
+        encoding (str): 'compact', 'gzip' eller 'br'
+        saved (int): Sparade bytes (original minus kodat)
+    """
+    reg = registry or REGISTRY
+    if reg.enabled:
+        reg.counter(RESPONSE_BYTES_SAVED, "Bytes sparade per callback och kodning",
+                    ('callback', 'encoding')).inc(saved, callback=callback, encoding=encoding)
+
+
+def choose_encoding(accept_encodings) -> Optional[str]:
+    """
+    Väljer kodning utifrån Accept-Encoding: brotli om klienten och servern
+    klarar det, annars gzip, annars ingen
+
+    Args:
+        accept_encodings: Flasks request.accept_encodings
+
+    Returns:
+        str | None: 'br', 'gzip' eller None
+    """
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """Komprimerar data med 'gzip' (standardnivå 6) eller 'br' (standardnivå 5)."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=5 if level is None else level)
+    return gzip.compress(data, compresslevel=6 if level is None else level, mtime=0)
+
+
+class CompressedCache:
+    """
+    Begränsad LRU-cache för komprimerade statiska filer
+
+    Nyckeln är innehållets CRC-32 och längd plus kodningen, så en fil som
+    ändras (t.ex. en ny Dash-version) komprimeras om i stället för att ett
+    gammalt svar lämnas ut.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Args:
+            max_bytes (int): Max totalt antal komprimerade bytes
+        """
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: 'OrderedDict[tuple, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compress(self, data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+        """Komprimerad data ur cachen, eller komprimerar och sparar den."""
+        key = (zlib.crc32(data), len(data), encoding, level)
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                return compressed
+        compressed = compress(data, encoding, level)
+        with self._lock:
+            if key not in self._entries and len(compressed) <= self.max_bytes:
+                self._entries[key] = compressed
+                self.bytes += len(compressed)
+                while self.bytes > self.max_bytes:
+                    self.bytes -= len(self._entries.popitem(last=False)[1])
+        return compressed
+
+
+def install_compression(server, min_size: int = 1024, level: Optional[int] = None,
+                        mimetypes: Sequence[str] = COMPRESSIBLE_MIMETYPES,
+                        static_prefixes: Sequence[str] = STATIC_PATH_PREFIXES,
+                        static_cache_bytes: int = 32 * 1024 * 1024,
+                        registry: Optional[MetricsRegistry] = None) -> None:
+    """
+    Komprimerar Flask-serverns svar enligt klientens Accept-Encoding
+
+    Installeras efter metrics.install_flask, så att callbackens namn finns
+    kvar (Flask kör after_request-krokarna i omvänd ordning) och svarsstorleken
+    i olympics_callback_response_bytes blir den komprimerade. Dynamiska svar
+    (callbacks) komprimeras vid varje anrop; statiska filer under
+    static_prefixes komprimeras en gång och hämtas sedan ur en CompressedCache.
+
+    Args:
+        server: Flask-appen (app.server)
+        min_size (int): Mindre svar skickas okomprimerade
+        level (int | None): Komprimeringsnivå, None ger standardnivån
+        mimetypes: Svarstyper som komprimeras
+        static_prefixes: Sökvägar vars svar är statiska filer
+        static_cache_bytes (int): Max storlek på cachen för statiska filer
+    """
+    from flask import g, request
+
+    static_cache = CompressedCache(static_cache_bytes)
+
+    @server.after_request
+    def _compress_response(response):
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers or response.mimetype not in mimetypes):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings)
+        data = response.get_data()
+        if encoding is None or len(data) < min_size:
+            return response
+        if request.path.startswith(tuple(static_prefixes)):
+            compressed = static_cache.get_or_compress(data, encoding, level)
+        else:
+            compressed = compress(data, encoding, level)
+        if len(compressed) >= len(data):
+            return response
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        name = g.get('metrics_callback')
+        if name:
+            record_bytes_saved(name, encoding, len(data) - len(compressed), registry)
+        return response
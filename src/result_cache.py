@@ -0,0 +1,152 @@
+# Python standard library - OrderedDict för LRU-ordning, Lock för trådade workers
+# Documentation: https://docs.python.org/3/library/collections.html#collections.OrderedDict
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+import pandas as pd
+
+
+class CacheInfo(NamedTuple):
+    """Räknare för ResultCache, i samma anda som functools.lru_cache.cache_info()."""
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+    max_entries: int
+    max_bytes: Optional[int]
+
+
+def copy_on_write() -> bool:
+    """Om pandas Copy-on-Write är aktivt (alltid i pandas >= 3, opt-in i 2.x)."""
+    if int(pd.__version__.split('.')[0]) >= 3:
+        return True
+    return pd.options.mode.copy_on_write is True
+
+
+def detach(value: Any) -> Any:
+    """
+    Returnerar ett objekt som anroparen kan ändra utan att påverka originalet
+
+    Med Copy-on-Write räcker en grund kopia (kostar O(1), datan kopieras först
+    vid skrivning). Utan Copy-on-Write görs en djup kopia.
+
+    Args:
+        value: Series, DataFrame, dict eller NamedTuple med sådana, eller ett
+            oföränderligt värde
+
+    Returns:
+        Frikopplad kopia av värdet
+    """
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        return value.copy(deep=not copy_on_write())
+    if isinstance(value, dict):
+        return {key: detach(item) for key, item in value.items()}
+    if isinstance(value, tuple) and hasattr(value, '_fields'):
+        return type(value)(*(detach(item) for item in value))
+    return value
+
+
+def estimate_bytes(value: Any) -> int:
+    """Ungefärlig minnesstorlek för ett cachat resultat i bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, dict):
+        return sum(estimate_bytes(item) for item in value.values())
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_bytes(item) for item in value)
+    return 64
+
+
+class ResultCache:
+    """
+    Begränsad LRU-cache för analysresultat
+
+    Cachen begränsas både av antal poster och av uppskattat antal bytes.
+    Lagrade värden lämnas aldrig ut direkt - varje träff returnerar en
+    frikopplad kopia (se detach), så anropare kan inte korrumpera cachen.
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: Optional[int] = None):
+        """
+        Args:
+            max_entries (int): Max antal poster innan äldsta används-posten kastas
+            max_bytes (int | None): Max totalt antal bytes, None = obegränsat
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Hämtar ett cachat värde eller beräknar och lagrar det
+
+        Args:
+            key: Hashbar nyckel, t.ex. (metodnamn, argument...)
+            compute: Funktion som beräknar värdet vid miss
+
+        Returns:
+            Frikopplad kopia av värdet
+        """
+        try:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return detach(entry[0])
+                self._misses += 1
+        except TypeError:
+            # Ohashbara argument - beräkna utan cache
+            return compute()
+
+        # Beräkna utanför låset så att långsamma anrop inte blockerar andra trådar
+        value = compute()
+        self._store(key, value)
+        return detach(value)
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Lagrar ett redan beräknat värde, t.ex. från en bulkberäkning."""
+        self._store(key, value)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        size = estimate_bytes(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def info(self) -> CacheInfo:
+        """Aktuella räknare: träffar, missar, utkastade poster, poster och bytes."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions,
+                             len(self._entries), self._bytes, self.max_entries, self.max_bytes)
+
+    def clear(self) -> None:
+        """Tömmer cachen (räknarna för träffar och missar behålls)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
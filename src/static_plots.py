@@ -0,0 +1,115 @@
+# Matplotlib objektorienterade API (Figure + Agg-canvas) - ingen global pyplot-state
+# Documentation: https://matplotlib.org/stable/gallery/user_interfaces/web_application_server_sgskip.html
+import io
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Optional
+
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from .metrics import RENDER_SECONDS, timed
+from .result_cache import CacheInfo, ResultCache
+
+
+# Kolumner i kroppsboxploten: etikett och färg
+BODY_BOXES = {'Height': ('Längd (cm)', '#2A9D8F'), 'Weight': ('Vikt (kg)', '#E9C46A')}
+
+
+@timed(RENDER_SECONDS, "Tid att bygga och serialisera figurer", renderer='matplotlib', stage='render')
+def render_body_boxplot(country: str, stats: pd.DataFrame) -> bytes:
+    """
+    Boxplot över längd och vikt för ett land, renderad till PNG
+
+    Ritar förberäknad statistik med Axes.bxp i stället för att låta
+    Axes.boxplot räkna kvartiler ur alla rader vid varje rendering.
+    Använder Figure/FigureCanvasAgg direkt i stället för pyplot, så att
+    flera trådar kan rendera samtidigt utan att dela global state.
+
+    Args:
+        country (str): NOC-kod, används i titeln
+        stats (pd.DataFrame): Landets rader ur OlympicAnalyzer.boxplot_stats,
+            indexerade på kolumn (Height, Weight)
+
+    Returns:
+        bytes: PNG-bilden
+    """
+    fig = Figure(figsize=(6, 5))
+    FigureCanvasAgg(fig)
+    ax1 = fig.add_subplot()
+
+    # Data to plot
+    columns = [col for col in BODY_BOXES if col in stats.index]
+    boxes = [dict(stats.loc[col, ['med', 'q1', 'q3', 'whislo', 'whishi', 'fliers']], label=BODY_BOXES[col][0])
+             for col in columns]
+
+    # Skapa en boxplot
+    parts = ax1.bxp(boxes, patch_artist=True)
+
+    # Styling (Matplotlib style)
+    for patch, col in zip(parts['boxes'], columns):
+        patch.set_facecolor(BODY_BOXES[col][1])
+
+    ax1.set_title(f'Fysisk fördelning: {country}')
+    ax1.grid(True, linestyle='--', alpha=0.7)
+
+    buf = io.BytesIO()
+    fig.tight_layout()
+    fig.savefig(buf, format='png')
+    return buf.getvalue()
+
+
+class StaticPlotRenderer:
+    """
+    Renderar statiska bilder i en begränsad trådpool och cachar PNG-bytes
+
+    max_workers sätter taket för samtidiga renderingar. Samtidiga förfrågningar
+    efter samma nyckel delar på en och samma rendering.
+    """
+
+    def __init__(self, max_workers: int = 2, max_entries: int = 512,
+                 max_bytes: Optional[int] = 64 * 1024 * 1024):
+        """
+        Args:
+            max_workers (int): Max antal samtidiga renderingar
+            max_entries (int): Max antal cachade bilder
+            max_bytes (int | None): Max total storlek på cachade bilder
+        """
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='static-plot')
+        self._cache = ResultCache(max_entries, max_bytes)
+        self._pending: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def get_png(self, key: Hashable, render: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+        """
+        Hämtar en cachad bild eller renderar den i poolen
+
+        Args:
+            key: Nyckel för bilden, t.ex. (land, datasetversion)
+            render: Funktion som returnerar PNG-bytes, eller None om data saknas
+
+        Returns:
+            bytes | None: PNG-bilden
+        """
+        return self._cache.get_or_compute(key, lambda: self._render_once(key, render))
+
+    def _render_once(self, key: Hashable, render: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+        with self._lock:
+            future = self._pending.get(key)
+            submitted = future is None
+            if submitted:
+                future = self._pool.submit(render)
+                self._pending[key] = future
+        if submitted:
+            # Utanför låset - callbacken körs direkt om renderingen redan är klar
+            future.add_done_callback(lambda _: self._forget(key))
+        return future.result()
+
+    def _forget(self, key: Hashable) -> None:
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def info(self) -> CacheInfo:
+        """Räknare för PNG-cachen."""
+        return self._cache.info()
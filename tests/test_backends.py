@@ -0,0 +1,88 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.backends import ArrowBackend, PandasBackend, make_backend
+from src.data_loader import anonymize_names, compact_frame
+from src.data_processor import OlympicAnalyzer, MEDAL_CUBE_KEYS
+from benchmarks.synthetic import make_athlete_events
+
+
+def _frame(raw, compact):
+    frame = raw.assign(Name_hash=anonymize_names(raw['Name'])).drop(columns=['Name'])
+    return compact_frame(frame) if compact else frame
+
+
+@pytest.fixture(params=['wide', 'compact'])
+def synthetic(request):
+    return _frame(make_athlete_events(scale=0.02, seed=3), request.param == 'compact')
+
+
+def _assert_same(expected, actual):
+    # Exakt jämförelse: samma värden, dtypes, index och ordning
+    if isinstance(expected, dict):
+        assert expected.keys() == actual.keys()
+        for key in expected:
+            _assert_same(expected[key], actual[key])
+    elif isinstance(expected, pd.DataFrame):
+        pd.testing.assert_frame_equal(expected, actual)
+    else:
+        pd.testing.assert_series_equal(expected, actual)
+
+
+def _assert_backends_agree(pandas_analyzer, arrow_analyzer, countries, sports):
+    _assert_same(pandas_analyzer._medal_cube, arrow_analyzer._medal_cube)
+    for country in countries:
+        for method in ['top_sports_by_medals', 'medals_per_olympics', 'age_distribution',
+                       'gender_distribution', 'get_medal_statistics', 'get_top_athletes_by_medals']:
+            _assert_same(getattr(pandas_analyzer, method)(country), getattr(arrow_analyzer, method)(country))
+        for season in [None, 'Summer', 'Winter']:
+            for medal_only in [False, True]:
+                _assert_same(pandas_analyzer.country_athlete_profile(country, season, medal_only),
+                             arrow_analyzer.country_athlete_profile(country, season, medal_only))
+    for sport in sports:
+        _assert_same(pandas_analyzer.sport_analysis(sport), arrow_analyzer.sport_analysis(sport))
+    for season in [None, 'Summer', 'Winter']:
+        _assert_same(pandas_analyzer.global_medal_race(season, 15), arrow_analyzer.global_medal_race(season, 15))
+
+
+def test_backends_agree_on_synthetic_data(synthetic):
+    pandas_analyzer = OlympicAnalyzer(synthetic)
+    arrow_analyzer = OlympicAnalyzer(synthetic, backend='arrow')
+    assert isinstance(arrow_analyzer.backend, ArrowBackend)
+
+    countries = list(synthetic['NOC'].value_counts().index[:5].astype(str)) + ['CAN', 'XXX']
+    sports = list(synthetic['Sport'].value_counts().index[::10].astype(str)) + ['Curling']
+    _assert_backends_agree(pandas_analyzer, arrow_analyzer, countries, sports)
+
+
+def test_backends_agree_on_sample_data_and_after_append(sample_data):
+    frame = _frame(sample_data, compact=False)
+    delta = frame.iloc[[0, 1]].assign(Year=2024, Games='2024 Summer', NOC=['NOR', 'CAN'])
+    pandas_analyzer = OlympicAnalyzer(frame)
+    arrow_analyzer = OlympicAnalyzer(frame, backend='arrow', check_cube=True)
+    countries, sports = ['CAN', 'USA', 'SWE', 'NOR'], ['Swimming', 'Athletics', 'Hockey']
+    _assert_backends_agree(pandas_analyzer, arrow_analyzer, countries, sports)
+
+    pandas_analyzer.append(delta)
+    arrow_analyzer.append(delta)
+    assert arrow_analyzer.backend.name == 'arrow'
+    _assert_backends_agree(pandas_analyzer, arrow_analyzer, countries, sports)
+
+
+def test_select_and_value_counts_on_selections(sample_data):
+    for backend in (PandasBackend(sample_data), ArrowBackend(sample_data)):
+        rows = backend.select(slice(0, 4), not_null=['Medal'], equals={'Season': 'Summer'})
+        assert list(rows) == [0, 1, 2]
+        assert backend.select(np.array([4, 0]), equals={'NOC': 'SWE'}).tolist() == [4]
+        assert backend.value_counts(np.array([4, 0, 2]), 'NOC').to_dict() == {'CAN': 2, 'SWE': 1}
+        assert list(backend.values(slice(1, 3), 'Age').index) == [1, 2]
+        cube = backend.cube_cells(slice(None), np.arange(5), MEDAL_CUBE_KEYS)
+        assert list(cube.columns) == MEDAL_CUBE_KEYS + ['count', 'first']
+        assert cube['count'].sum() == 4
+
+
+def test_unknown_backend(sample_data):
+    with pytest.raises(ValueError):
+        make_backend('duckdb', sample_data)
+    with pytest.raises(ValueError):
+        OlympicAnalyzer(sample_data, backend='duckdb')
@@ -0,0 +1,199 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budget för kall import av dashboarden (sekunder). Datan laddas i bakgrunden,
+# så importen ska bara kosta dash + flask (pandas importeras i laddningstråden).
+IMPORT_BUDGET_SECONDS = 3.0
+
+
+def _run(code, data_path, **extra_env):
+    env = dict(os.environ, OLYMPICS_DATA_PATH=data_path)
+    env.pop('DASHBOARD_EAGER_LOAD', None)
+    env.pop('DASHBOARD_WARM_CACHE', None)
+    env.pop('OLYMPICS_SHARED_STORE', None)
+    env.pop('DASHBOARD_METRICS', None)
+    env.update(extra_env)
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_cold_import_is_fast_and_lazy(tmp_path):
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        "import src.dashboard\n"
+        "elapsed = time.perf_counter() - start\n"
+        "heavy = [m for m in ('matplotlib', 'plotly.express', 'plotly.graph_objects', 'dash_bootstrap_components')\n"
+        "         if m in sys.modules]\n"
+        "print(json.dumps({'elapsed': elapsed, 'heavy': heavy}))\n"
+    )
+    # Filen saknas: laddningen misslyckas i bakgrunden innan matplotlib och
+    # plotly behövs, och importen påverkas inte
+    out = _run(code, str(tmp_path / 'missing.csv'))
+
+    assert out['heavy'] == []
+    assert out['elapsed'] < IMPORT_BUDGET_SECONDS
+
+
+def test_layout_is_built_on_first_request(sample_csv):
+    code = (
+        "import json, sys\n"
+        "from src import dashboard\n"
+        "dashboard.state.wait(60)\n"
+        "before = 'dash_bootstrap_components' in sys.modules\n"
+        "client = dashboard.app.server.test_client()\n"
+        "index = client.get('/').get_data(as_text=True)\n"
+        "layout = client.get('/_dash-layout')\n"
+        "print(json.dumps({'before': before, 'code': layout.status_code,\n"
+        "                  'bundle': 'dash_bootstrap_components' in index,\n"
+        "                  'theme': dashboard.BOOTSTRAP_THEME in index,\n"
+        "                  'graph': 'global-medal-race' in layout.get_data(as_text=True)}))\n"
+    )
+    out = _run(code, sample_csv)
+
+    assert out == {'before': False, 'code': 200, 'bundle': True, 'theme': True, 'graph': True}
+
+
+def test_ready_endpoint_and_placeholders(sample_csv):
+    code = (
+        "import json\n"
+        "from src import dashboard\n"
+        "client = dashboard.app.server.test_client()\n"
+        "early = dashboard.update_global_race(None, 10)\n"
+        "dashboard.state.wait(60)\n"
+        "resp = client.get('/ready')\n"
+        "country = dashboard.update_country_plots('CAN')\n"
+        "print(json.dumps({'code': resp.status_code, 'body': resp.get_json(),\n"
+        "                  'early_type': type(early).__name__, 'figures': len(country)}))\n"
+    )
+    out = _run(code, sample_csv)
+
+    assert out['code'] == 200
+    assert out['body']['status'] == 'ready'
+    assert out['body']['progress'] == 1.0
+    assert out['early_type'] == 'dict'
+    assert out['figures'] == 5
+
+
+def test_ready_endpoint_reports_error(tmp_path):
+    code = (
+        "import json\n"
+        "from src import dashboard\n"
+        "dashboard.state.wait(60)\n"
+        "resp = dashboard.app.server.test_client().get('/ready')\n"
+        "print(json.dumps({'code': resp.status_code, 'body': resp.get_json()}))\n"
+    )
+    out = _run(code, str(tmp_path / 'missing.csv'))
+
+    assert out['code'] == 503
+    assert out['body']['status'] == 'error'
+    assert 'FileNotFoundError' in out['body']['error']
+
+
+def test_canada_3d_is_filtered_client_side(sample_csv):
+    code = (
+        "import json\n"
+        "from src import dashboard\n"
+        "dashboard.state.wait(60)\n"
+        "deps = dashboard.app.server.test_client().get('/_dash-dependencies').get_json()\n"
+        "clientside = [d['output'] for d in deps if d.get('clientside_function')]\n"
+        "print(json.dumps({'clientside': clientside, 'data': dashboard.update_canada_profile_data()}))\n"
+    )
+    out = _run(code, sample_csv)
+
+    assert out['clientside'] == ['canada-3d-profile.figure']
+    data = out['data']
+    # Sample-datan har två kanadensiska rader, båda medaljörer
+    assert data['year'] == [2016, 2020]
+    assert [data['medals'][m] for m in data['medal']] == ['Bronze', 'Gold']
+    assert [data['events'][e] for e in data['event']] == ['200m Freestyle', '100m Freestyle']
+    assert data['age'] == [22, 25]
+    assert len({len(data[col]) for col in ['year', 'season', 'medal', 'age', 'height', 'weight', 'event']}) == 1
+
+
+def test_games_appended_elsewhere_reach_the_worker(tmp_path, sample_csv, sample_data):
+    delta_path = tmp_path / 'delta.csv'
+    sample_data.iloc[[0]].assign(NOC='NOR', Year=2024, Games='2024 Summer').to_csv(delta_path, index=False)
+    code = (
+        "import json\n"
+        "from src import dashboard\n"
+        "from src.data_loader import append_delta\n"
+        "dashboard.state.wait(60)\n"
+        "client = dashboard.app.server.test_client()\n"
+        "before = dashboard.state.fingerprint\n"
+        "client.get('/ready')\n"
+        "append_delta(dashboard.data_path, %r)  # som från en annan process\n"
+        "client.get('/ready')\n"
+        "print(json.dumps({'before': before, 'after': dashboard.state.fingerprint,\n"
+        "                  'countries': dashboard.state.noc_options,\n"
+        "                  'version': dashboard.update_data_status(1, before)[-1]}))\n"
+    ) % str(delta_path)
+    out = _run(code, sample_csv)
+
+    assert out['after'] != out['before']
+    assert 'NOR' in out['countries']
+    assert out['version'] == out['after']
+
+
+def test_static_plot_urls_use_the_dataset_fingerprint(sample_csv):
+    code = (
+        "import json\n"
+        "from src import dashboard\n"
+        "dashboard.state.wait(60)\n"
+        "client = dashboard.app.server.test_client()\n"
+        "url = dashboard.update_matplotlib_plot('CAN')\n"
+        "current = client.get(url)\n"
+        "stale = client.get('/static-plots/CAN.png?v=0')\n"
+        "unknown = client.get('/static-plots/XXX.png')\n"
+        "print(json.dumps({'url': url, 'fingerprint': dashboard.state.fingerprint,\n"
+        "                  'codes': [current.status_code, stale.status_code, unknown.status_code],\n"
+        "                  'cache': [current.headers['Cache-Control'], stale.headers['Cache-Control']],\n"
+        "                  'rendered': dashboard.state.static_plots.info().entries}))\n"
+    )
+    out = _run(code, sample_csv)
+
+    assert out['url'].endswith(f"/static-plots/CAN.png?v={out['fingerprint']}")
+    assert out['codes'] == [200, 200, 404]
+    assert 'immutable' in out['cache'][0]
+    assert out['cache'][1] == 'no-cache'
+    assert out['rendered'] == 1
+
+
+def test_shared_store_is_not_copied_without_copy_on_write(sample_csv):
+    from src.data_loader import build_shared_store
+
+    code = (
+        "import json\n"
+        "import src.result_cache as result_cache\n"
+        "result_cache.copy_on_write = lambda: False  # som pandas 2.x utan PANDAS_COPY_ON_WRITE\n"
+        "from src import dashboard\n"
+        "dashboard.state.wait(60)\n"
+        "analyzer = dashboard.state.analyzer\n"
+        "print(json.dumps({'status': dashboard.state.status, 'read_only': analyzer.read_only,\n"
+        "                  'writeable': bool(analyzer.df['Year'].to_numpy().flags.writeable)}))\n"
+    )
+    out = _run(code, sample_csv, OLYMPICS_SHARED_STORE=build_shared_store(sample_csv))
+
+    assert out['status'] == 'ready'
+    assert out['read_only'] is False
+    # Kolumnen är fortfarande den skrivskyddade minnesmappningen, ingen privat kopia
+    assert out['writeable'] is False
+
+
+def test_metrics_are_opt_in(tmp_path):
+    code = (
+        "import json\n"
+        "from src import dashboard\n"
+        "client = dashboard.app.server.test_client()\n"
+        "print(json.dumps({'code': client.get('/metrics').status_code}))\n"
+    )
+    missing = str(tmp_path / 'missing.csv')
+
+    assert _run(code, missing)['code'] == 404
+    assert _run(code, missing, DASHBOARD_METRICS='1')['code'] == 200
@@ -1,7 +1,12 @@
 import pytest
 import pandas as pd
 import os
-from src.data_loader import load_and_anonymize_data, get_country_stats
+import hashlib
+import numpy as np
+import src.data_loader as data_loader
+from src.data_loader import (load_and_anonymize_data, get_country_stats, cache_paths, anonymize_names,
+                             memory_report, DASHBOARD_COLUMNS,
+                             build_shared_store, attach_shared_store, ingest_csv, append_delta)
 
 def test_load_and_anonymize_data(sample_csv):
     df = load_and_anonymize_data(sample_csv)
@@ -26,3 +31,211 @@ def test_get_country_stats(sample_data):
     usa_stats = get_country_stats(sample_data, 'USA')
     assert len(usa_stats) == 2
     assert all(usa_stats['NOC'] == 'USA')
+
+def test_load_uses_cache_on_second_load(sample_csv):
+    first = load_and_anonymize_data(sample_csv)
+    assert first.attrs['load_source'] == 'csv'
+    assert os.path.exists(cache_paths(sample_csv)['data'])
+
+    second = load_and_anonymize_data(sample_csv)
+    assert second.attrs['load_source'] == 'cache'
+    pd.testing.assert_frame_equal(first, second)
+
+def test_cache_survives_touch_but_not_content_change(sample_csv):
+    load_and_anonymize_data(sample_csv)
+
+    # Ny mtime men samma innehåll - cachen gäller fortfarande
+    stat = os.stat(sample_csv)
+    os.utime(sample_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert load_and_anonymize_data(sample_csv).attrs['load_source'] == 'cache'
+
+    with open(sample_csv, 'a') as fh:
+        fh.write("6,Athlete Six,M,30,190,90,Team C,NOR,2018 Winter,2018,Winter,Pyeongchang,Biathlon,Sprint,\n")
+    df = load_and_anonymize_data(sample_csv)
+    assert df.attrs['load_source'] == 'csv'
+    assert len(df) == 6
+
+def test_load_without_cache(sample_csv):
+    df = load_and_anonymize_data(sample_csv, use_cache=False)
+    assert df.attrs['load_source'] == 'csv'
+    assert not os.path.exists(cache_paths(sample_csv)['data'])
+
+def _legacy_hash(series):
+    return series.apply(lambda x: hashlib.sha256(str(x).encode()).hexdigest()[:16])
+
+def test_anonymize_names_matches_apply():
+    names = pd.Series(['Anna', 'Bo', None, 'Anna', float('nan'), 'Bo'], name='Name')
+    pd.testing.assert_series_equal(anonymize_names(names), _legacy_hash(names))
+
+def test_anonymize_names_parallel(monkeypatch):
+    monkeypatch.setattr(data_loader, 'PARALLEL_HASH_MIN_UNIQUES', 0)
+    names = pd.Series([f'Athlete {i % 7}' for i in range(50)], name='Name')
+    pd.testing.assert_series_equal(anonymize_names(names, workers=2), _legacy_hash(names))
+
+def test_compact_load_from_csv_and_cache(sample_csv):
+    for expected_source in ('csv', 'cache'):
+        df = load_and_anonymize_data(sample_csv, compact=True, columns=DASHBOARD_COLUMNS)
+        assert df.attrs['load_source'] == expected_source
+        assert list(df.columns) == DASHBOARD_COLUMNS
+        assert df['NOC'].dtype == 'category'
+        assert df['Year'].dtype == 'int16'
+        assert df['Height'].dtype == 'float32'
+
+def test_wide_load_from_cache_matches_csv(sample_csv):
+    from_csv = load_and_anonymize_data(sample_csv)
+    from_cache = load_and_anonymize_data(sample_csv)
+    assert from_cache.attrs['load_source'] == 'cache'
+    pd.testing.assert_frame_equal(from_csv, from_cache)
+
+def test_load_unknown_column(sample_csv):
+    with pytest.raises(KeyError):
+        load_and_anonymize_data(sample_csv, columns=['NOC', 'Unknown'])
+
+def test_ingest_csv_matches_full_load(sample_csv):
+    calls = []
+    report = ingest_csv(sample_csv, chunksize=2, progress=lambda *args: calls.append(args))
+
+    assert (report.rows, report.chunks) == (5, 3)
+    assert [rows for rows, _, _ in calls] == [2, 4, 5]
+    assert calls[-1][1] == calls[-1][2] == os.path.getsize(sample_csv)
+
+    streamed = load_and_anonymize_data(sample_csv)
+    assert streamed.attrs['load_source'] == 'cache'
+    # Fast schema: Age/Height/Weight är alltid float64 (saknade värden kan komma i senare block)
+    pd.testing.assert_frame_equal(streamed, load_and_anonymize_data(sample_csv, use_cache=False), check_dtype=False)
+    assert streamed['Age'].dtype == 'float64'
+
+def test_load_with_chunksize_streams_into_cache(sample_csv):
+    df = load_and_anonymize_data(sample_csv, chunksize=2, compact=True, columns=DASHBOARD_COLUMNS)
+    assert df.attrs['load_source'] == 'stream'
+    assert list(df.columns) == DASHBOARD_COLUMNS
+    assert os.path.exists(cache_paths(sample_csv)['data'])
+
+    with pytest.raises(ValueError):
+        load_and_anonymize_data(sample_csv, use_cache=False, chunksize=2)
+
+def _write_delta(tmp_path, sample_data, name='delta.csv'):
+    delta = sample_data.iloc[[0, 4]].assign(Games='2024 Summer', Year=2024, Season='Summer', NOC=['CAN', 'NOR'])
+    path = tmp_path / name
+    delta.to_csv(path, index=False)
+    return str(path)
+
+def test_append_delta_is_persisted(tmp_path, sample_csv, sample_data):
+    base = load_and_anonymize_data(sample_csv)
+    delta_path = _write_delta(tmp_path, sample_data)
+
+    rows = append_delta(sample_csv, delta_path)
+    assert list(rows.columns) == list(base.columns)
+    assert list(rows['Name_hash']) == list(anonymize_names(sample_data['Name'].iloc[[0, 4]]))
+
+    reloaded = load_and_anonymize_data(sample_csv)
+    assert reloaded.attrs['load_source'] == 'cache'
+    assert len(reloaded) == 7
+    assert list(reloaded['Year'].tail(2)) == [2024, 2024]
+
+    # Samma fil två gånger läggs inte till igen
+    with pytest.raises(ValueError):
+        append_delta(sample_csv, delta_path)
+
+def test_append_delta_reads_parquet_without_loading_base(tmp_path, monkeypatch, sample_csv, sample_data):
+    load_and_anonymize_data(sample_csv)
+    delta_path = tmp_path / 'delta.parquet'
+    sample_data.iloc[[1]].assign(Games='2024 Summer', Year=2024).to_parquet(delta_path, index=False)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("basdatan ska inte laddas")
+    monkeypatch.setattr(data_loader, 'load_and_anonymize_data', fail)
+    rows = append_delta(sample_csv, str(delta_path))
+    assert list(rows['Year']) == [2024]
+    assert list(rows['Name_hash']) == list(anonymize_names(sample_data['Name'].iloc[[1]]))
+
+def test_shared_store_includes_deltas(tmp_path, sample_csv, sample_data):
+    store = build_shared_store(sample_csv)
+    before = attach_shared_store(store).attrs['fingerprint']
+    append_delta(sample_csv, _write_delta(tmp_path, sample_data))
+    assert build_shared_store(sample_csv) == store
+    shared = attach_shared_store(store)
+    assert set(shared['NOC']) == {'CAN', 'USA', 'SWE', 'NOR'}
+    # Samma fingeravtryck oavsett om datan läses från cachen eller lagret
+    assert shared.attrs['fingerprint'] == load_and_anonymize_data(sample_csv).attrs['fingerprint'] != before
+    assert shared.attrs['deltas'] == 1
+
+def test_memory_report(sample_data):
+    report = memory_report(sample_data)
+    assert list(report.columns) == ['before', 'after', 'saved', 'ratio']
+    assert 'Total' in report.index
+    assert report.loc['Year', 'after'] < report.loc['Year', 'before']
+    assert report.loc['Total', 'saved'] == report.loc['Total', 'before'] - report.loc['Total', 'after']
+
+def test_shared_store_roundtrip(sample_csv):
+    store = build_shared_store(sample_csv)
+    df = attach_shared_store(store)
+
+    expected = load_and_anonymize_data(sample_csv, compact=True)
+    expected = expected.sort_values('NOC', kind='stable', ignore_index=True)
+    pd.testing.assert_frame_equal(df, expected, check_categorical=False)
+    assert df.attrs['load_source'] == 'shared'
+    assert not df['Year'].to_numpy().flags.writeable
+
+    subset = attach_shared_store(store, columns=['NOC', 'Medal'])
+    assert list(subset.columns) == ['NOC', 'Medal']
+    with pytest.raises(KeyError):
+        attach_shared_store(store, columns=['Unknown'])
+
+def test_shared_store_rebuilds_when_source_changes(sample_csv):
+    store = build_shared_store(sample_csv)
+    with open(sample_csv, 'a') as fh:
+        fh.write("6,Athlete Six,M,30,190,90,Team C,NOR,2018 Winter,2018,Winter,Pyeongchang,Biathlon,Sprint,\n")
+    assert build_shared_store(sample_csv) == store
+    assert len(attach_shared_store(store)) == 6
+
+def _mapped_store_pages(store, barrier, results):
+    df = attach_shared_store(store)
+    # Rör alla sidor i alla kolumner
+    for col in df.columns:
+        values = df[col].array.codes if df[col].dtype == 'category' else df[col].to_numpy()
+        int(np.asarray(values).view(np.uint8).sum())
+    barrier.wait()
+
+    rss = shared = private = 0
+    mapping = None
+    with open('/proc/self/smaps') as fh:
+        for line in fh:
+            fields = line.split()
+            if '-' in fields[0] and len(fields) >= 5:
+                mapping = fields[-1] if len(fields) >= 6 else None
+            elif mapping and mapping.startswith(store):
+                if fields[0] == 'Rss:':
+                    rss += int(fields[1])
+                elif fields[0] in ('Shared_Clean:', 'Shared_Dirty:'):
+                    shared += int(fields[1])
+                elif fields[0] in ('Private_Clean:', 'Private_Dirty:'):
+                    private += int(fields[1])
+    results.put((rss, shared, private))
+    barrier.wait()
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/smaps'), reason="kräver Linux /proc")
+def test_shared_store_pages_are_shared_between_processes(tmp_path, sample_data):
+    import multiprocessing
+
+    big = pd.concat([sample_data] * 20000, ignore_index=True)
+    csv_path = str(tmp_path / "big.csv")
+    big.to_csv(csv_path, index=False)
+    store = os.path.realpath(build_shared_store(csv_path))
+
+    ctx = multiprocessing.get_context('fork')
+    barrier = ctx.Barrier(2)
+    results = ctx.Queue()
+    workers = [ctx.Process(target=_mapped_store_pages, args=(store, barrier, results)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    reports = [results.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=60)
+
+    # Varje mappad sida delas med den andra processen, ingen är privat.
+    # (Nyskrivna sidor kan räknas som Shared_Dirty tills de skrivits till disk.)
+    for rss, shared, private in reports:
+        assert rss > 0
+        assert shared == rss
+        assert private == 0
@@ -1,6 +1,11 @@
+import threading
+
 import pytest
+import numpy as np
 import pandas as pd
+from matplotlib import cbook
 from src.data_processor import OlympicAnalyzer
+from src.data_loader import compact_frame, anonymize_names
 
 @pytest.fixture
 def analyzer(sample_data):
@@ -64,3 +69,332 @@ def test_global_medal_race(analyzer):
     assert 'NOC' in race.columns
     assert 'Medals' in race.columns
     assert 'Rank' in race.columns
+
+def test_compact_frame_gives_same_results(sample_data):
+    frame = sample_data.assign(Name_hash=anonymize_names(sample_data['Name'])).drop(columns=['Name'])
+    wide = OlympicAnalyzer(frame)
+    compact = OlympicAnalyzer(compact_frame(frame))
+    loose = dict(check_dtype=False, check_index_type=False, check_categorical=False)
+
+    for country in ['CAN', 'USA', 'SWE', 'NOR']:
+        for method in ['top_sports_by_medals', 'medals_per_olympics', 'age_distribution',
+                       'gender_distribution', 'get_medal_statistics', 'get_top_athletes_by_medals']:
+            pd.testing.assert_series_equal(getattr(wide, method)(country), getattr(compact, method)(country), **loose)
+        pd.testing.assert_frame_equal(wide.country_athlete_profile(country), compact.country_athlete_profile(country), **loose)
+
+    for key, value in wide.sport_analysis('Swimming').items():
+        pd.testing.assert_series_equal(value, compact.sport_analysis('Swimming')[key], **loose)
+    pd.testing.assert_frame_equal(wide.global_medal_race(), compact.global_medal_race(), **loose)
+
+def test_medal_cube_matches_row_scan(sample_data):
+    checked = OlympicAnalyzer(sample_data, check_cube=True)
+    for country in ['CAN', 'USA', 'SWE', 'NOR']:
+        checked.top_sports_by_medals(country)
+        checked.medals_per_olympics(country)
+        checked.get_medal_statistics(country)
+    for season in [None, 'Summer', 'Winter']:
+        checked.global_medal_race(season=season, top_n=2)
+
+    assert checked.medals_per_olympics('NOR').empty
+
+def test_country_rows_is_contiguous_slice(analyzer, sample_data):
+    can = analyzer.country_rows('CAN')
+    assert list(can.index) == [0, 2]
+    assert all(can['NOC'] == 'CAN')
+    assert np.shares_memory(can['Year'].to_numpy(), analyzer.df['Year'].to_numpy())
+    assert analyzer.country_rows('NOR').empty
+
+def test_sport_rows_keep_original_order(analyzer):
+    swimming = analyzer.sport_rows('Swimming')
+    assert list(swimming.index) == [0, 2]
+    assert list(analyzer.sport_rows('Athletics').index) == [1, 3]
+    assert analyzer.sport_rows('Curling').empty
+
+def test_result_cache_is_opt_in(analyzer):
+    assert analyzer.cache_info() is None
+
+def test_result_cache_on_analyzer(sample_data):
+    cached = OlympicAnalyzer(sample_data, cache_entries=8)
+    first = cached.country_athlete_profile('CAN')
+    first['Size'] = 1  # som dashboarden gör
+
+    second = cached.country_athlete_profile('CAN', None, False)
+    assert 'Size' not in second.columns
+    cached.sport_analysis('Swimming')
+
+    info = cached.cache_info()
+    assert (info.hits, info.misses, info.entries) == (1, 2, 2)
+
+    cached.cache_clear()
+    assert cached.cache_info().entries == 0
+
+def test_analyzer_without_copy_uses_sorted_frame(sample_data):
+    clustered = sample_data.sort_values('NOC', kind='stable')
+    shared = OlympicAnalyzer(clustered, copy=False)
+    assert shared.df is clustered
+    assert shared.top_sports_by_medals('CAN')['Swimming'] == 2
+
+def test_profile_partitions_by_year_and_season(analyzer):
+    parts = analyzer.profile_partitions('CAN')
+    assert list(parts) == [(2016, 'Summer'), (2020, 'Summer')]
+    assert sum(len(rows) for rows in parts.values()) == len(analyzer.country_athlete_profile('CAN'))
+    assert analyzer.profile_frames('CAN', season='Winter') == {}
+
+def test_profile_frames_point_budget_keeps_medalists():
+    rng = np.random.default_rng(1)
+    rows = 300
+    df = pd.DataFrame({
+        'Name_hash': [f'h{i}' for i in range(rows)],
+        'Sex': 'M', 'NOC': 'CAN', 'Year': 2000, 'Season': 'Summer',
+        'Age': rng.integers(18, 35, rows).astype(float),
+        'Height': rng.integers(160, 200, rows).astype(float),
+        'Weight': rng.integers(50, 100, rows).astype(float),
+        'Sport': np.where(np.arange(rows) < 200, 'Athletics', 'Rowing'),
+        'Event': 'Event',
+        'Medal': [None] * (rows - 10) + ['Gold'] * 10,
+    })
+    analyzer = OlympicAnalyzer(df)
+
+    frame = analyzer.profile_frames('CAN', max_points=60)[2000]
+    assert len(frame) == 60
+    assert frame['Medal'].notna().sum() == 10
+    # Proportionellt per sport: 200/290 respektive 80/290 av 50 platser
+    non_medal = frame[frame['Medal'].isna()]
+    assert non_medal['Sport'].value_counts().to_dict() == {'Athletics': 34, 'Rowing': 16}
+    assert frame.equals(analyzer.profile_frames('CAN', max_points=60)[2000])
+    assert len(analyzer.profile_frames('CAN', max_points=5)[2000]) == 10
+
+def test_global_medal_race_uses_precomputed_ranking(sample_data, monkeypatch):
+    analyzer = OlympicAnalyzer(sample_data, check_cube=True)
+    monkeypatch.setattr(analyzer, '_race_table', lambda *args: pytest.fail("ska inte aggregera"))
+    for season in [None, 'All', 'Summer', 'Winter']:
+        for top_n in [1, 2, 15]:
+            analyzer.global_medal_race(season=season, top_n=top_n)
+
+def test_global_medal_race_beyond_precomputed_top_n(sample_data):
+    analyzer = OlympicAnalyzer(sample_data, check_cube=True)
+    assert len(analyzer.global_medal_race(top_n=50)) == len(analyzer.global_medal_race(top_n=15))
+
+def test_append_matches_fresh_analyzer(sample_data):
+    frame = sample_data.assign(Name_hash=anonymize_names(sample_data['Name'])).drop(columns=['Name'])
+    delta = frame.iloc[[0, 1, 4]].assign(Games='2024 Summer', Year=2024, Season='Summer',
+                                         NOC=['CAN', 'NOR', 'CAN'], Sport=['Swimming', 'Rowing', 'Rowing'])
+    for prepare in (lambda f: f, compact_frame):
+        analyzer = OlympicAnalyzer(prepare(frame), check_cube=True)
+        analyzer.top_sports_by_medals('CAN')
+        analyzer.append(prepare(delta))
+        fresh = OlympicAnalyzer(prepare(pd.concat([frame, delta], ignore_index=True)))
+
+        assert analyzer.data_version == 1
+        assert analyzer.year_range == (2016, 2024)
+        assert analyzer.countries == ['CAN', 'NOR', 'SWE', 'USA']
+        assert analyzer.sports == fresh.sports
+        pd.testing.assert_frame_equal(analyzer.df, fresh.df, check_categorical=False)
+        # Offset-tabellerna uppdateras utan ombyggnad men blir desamma
+        assert analyzer._noc_offsets == fresh._noc_offsets
+        assert analyzer._sport_offsets == fresh._sport_offsets
+        assert analyzer._sport_positions.tolist() == fresh._sport_positions.tolist()
+        for country in ['CAN', 'NOR', 'USA']:
+            pd.testing.assert_series_equal(analyzer.top_sports_by_medals(country), fresh.top_sports_by_medals(country))
+            pd.testing.assert_series_equal(analyzer.medals_per_olympics(country), fresh.medals_per_olympics(country))
+            pd.testing.assert_frame_equal(analyzer.country_athlete_profile(country),
+                                          fresh.country_athlete_profile(country))
+        pd.testing.assert_series_equal(analyzer.sport_analysis('Rowing')['age_distribution'],
+                                       fresh.sport_analysis('Rowing')['age_distribution'])
+        pd.testing.assert_frame_equal(analyzer.global_medal_race(), fresh.global_medal_race())
+
+    with pytest.raises(KeyError):
+        analyzer.append(delta.drop(columns=['Medal']))
+
+@pytest.mark.parametrize('backend', ['pandas', 'arrow'])
+def test_append_to_snapshot_while_reading(sample_data, backend):
+    frame = pd.concat([sample_data.assign(NOC=f'N{i:02d}') for i in range(40)], ignore_index=True)
+    analyzer = OlympicAnalyzer(frame, cache_entries=64, backend=backend)
+    expected = {noc: (analyzer.country_rows(noc), analyzer.top_sports_by_medals(noc)) for noc in ['N05', 'N20', 'N39']}
+    delta = frame.assign(NOC=np.resize(['N00', 'N10', 'N25', 'N39', 'N40'], len(frame)), Year=2024)
+    errors, done = [], threading.Event()
+
+    def read():
+        while not done.is_set():
+            for noc, (rows, top) in expected.items():
+                try:
+                    pd.testing.assert_frame_equal(analyzer.country_rows(noc), rows)
+                    pd.testing.assert_series_equal(analyzer.top_sports_by_medals(noc), top)
+                except AssertionError as exc:
+                    errors.append(exc)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    updated = analyzer.snapshot()
+    for _ in range(5):
+        updated.append(delta)
+    done.set()
+    for reader in readers:
+        reader.join()
+
+    # Läsarna såg bara originalet, som inte ändrades
+    assert errors == []
+    assert analyzer.data_version == 0 and updated.data_version == 5
+    fresh = OlympicAnalyzer(pd.concat([frame] + [delta] * 5, ignore_index=True), backend=backend)
+    for noc in ['N05', 'N39', 'N40']:
+        pd.testing.assert_frame_equal(updated.country_rows(noc), fresh.country_rows(noc), check_categorical=False)
+        pd.testing.assert_series_equal(updated.top_sports_by_medals(noc), fresh.top_sports_by_medals(noc))
+
+def test_append_widens_age_bins_only_when_needed(sample_data):
+    analyzer = OlympicAnalyzer(sample_data)
+    edges = analyzer.age_bin_edges
+    analyzer.append(sample_data.iloc[[0]].assign(Age=edges[1]))
+    assert analyzer.age_bin_edges is edges
+
+    analyzer.append(sample_data.iloc[[0, 1]].assign(Age=[edges[0] - 1, edges[-1] + 5]))
+    widened = analyzer.age_bin_edges
+    assert set(edges) <= set(widened)
+    assert widened[0] <= edges[0] - 1 and widened[-1] > edges[-1] + 5
+    assert (np.diff(widened) == edges[1] - edges[0]).all()
+    assert analyzer.age_histogram('CAN').sum() == len(analyzer.age_distribution('CAN'))
+
+def test_country_report_matches_separate_methods(sample_data):
+    analyzer = OlympicAnalyzer(sample_data)
+    report = analyzer.country_report('CAN')
+    pd.testing.assert_series_equal(report.top_sports, analyzer.top_sports_by_medals('CAN'))
+    pd.testing.assert_series_equal(report.medals_per_year, analyzer.medals_per_olympics('CAN'))
+    pd.testing.assert_series_equal(report.medal_types, analyzer.get_medal_statistics('CAN'))
+    pd.testing.assert_series_equal(report.ages, analyzer.age_distribution('CAN'))
+    pd.testing.assert_series_equal(report.age_histogram, analyzer.age_histogram('CAN'))
+    pd.testing.assert_series_equal(report.gender, analyzer.gender_distribution('CAN'))
+    assert report.body.loc['count'].tolist() == [2, 2]
+    assert report.body.loc['max', 'Height'] == 180
+    assert analyzer.country_report('XXX').body.loc['count', 'Weight'] == 0
+
+def test_country_reports_bulk_matches_single(sample_data):
+    frame = compact_frame(sample_data.assign(Name_hash=anonymize_names(sample_data['Name'])).drop(columns=['Name']))
+    analyzer = OlympicAnalyzer(frame, cache_entries=16)
+    reports = analyzer.country_reports(['CAN', 'USA', 'SWE', 'XXX'])
+    # Fyra rapporter plus ett åldershistogram per land i datan
+    assert analyzer.cache_info().entries == 4 + len(analyzer.countries)
+
+    fresh = OlympicAnalyzer(frame)
+    for noc, report in reports.items():
+        expected = fresh.country_report(noc)
+        for field in ['top_sports', 'medals_per_year', 'medal_types', 'ages', 'age_histogram', 'gender']:
+            pd.testing.assert_series_equal(getattr(report, field), getattr(expected, field))
+        pd.testing.assert_frame_equal(report.body, expected.body)
+        # Förberäknad: country_report blir en cacheträff
+        pd.testing.assert_frame_equal(analyzer.country_report(noc).body, expected.body)
+    assert analyzer.cache_info().hits == 4
+
+def test_age_histograms_use_fixed_bins(sample_data):
+    analyzer = OlympicAnalyzer(sample_data, cache_entries=16)
+    edges = analyzer.age_bin_edges
+    assert edges[0] <= sample_data['Age'].min() and edges[-1] > sample_data['Age'].max()
+
+    histogram = analyzer.age_histogram('CAN')
+    assert list(histogram.index) == list(edges[:-1])
+    assert histogram.sum() == len(analyzer.age_distribution('CAN'))
+    assert histogram[edges[edges <= 25][-1]] >= 1
+    assert analyzer.age_histogram('XXX').sum() == 0
+
+    by_sport = analyzer.age_histograms('Sport')
+    assert by_sport.sum().sum() == sample_data['Age'].notna().sum()
+    for sport in analyzer.sports:
+        pd.testing.assert_series_equal(by_sport.loc[sport].rename('count'), analyzer.sport_age_histogram(sport))
+    assert analyzer.sport_analysis('Swimming')['age_histogram'].sum() == by_sport.loc['Swimming'].sum()
+    with pytest.raises(ValueError):
+        analyzer.age_histograms('Year')
+
+def test_boxplot_stats_match_matplotlib(sample_data):
+    frame = pd.concat([sample_data.assign(Height=sample_data['Height'] + shift) for shift in range(0, 60, 3)],
+                      ignore_index=True)
+    frame.loc[0, 'Height'] = 400  # extremvärde
+    analyzer = OlympicAnalyzer(frame)
+    for by in ['NOC', 'Sport', 'Season']:
+        table = analyzer.boxplot_stats(by)
+        for (key, column), row in table.iterrows():
+            values = frame.loc[frame[by] == key, column].dropna().to_numpy(dtype='float64')
+            expected = cbook.boxplot_stats(values)[0]
+            assert row['count'] == len(values)
+            for stat in ['mean', 'q1', 'med', 'q3', 'whislo', 'whishi']:
+                assert row[stat] == pytest.approx(expected[stat])
+            assert list(row['fliers']) == sorted(set(expected['fliers']))
+    assert 400 in analyzer.boxplot_stats('NOC').loc[('CAN', 'Height'), 'fliers']
+    assert ('NOR', 'Height') not in analyzer.boxplot_stats('NOC').index
+
+    analyzer.append(frame.iloc[[1]].assign(NOC='NOR', Year=2024))
+    assert analyzer.boxplot_stats('NOC').loc[('NOR', 'Height'), 'count'] == 1
+    with pytest.raises(ValueError):
+        analyzer.boxplot_stats('Year')
+
+def test_shared_arrays_are_read_only(sample_data):
+    frame = pd.concat([sample_data.assign(Height=sample_data['Height'] + shift) for shift in range(0, 30, 3)],
+                      ignore_index=True)
+    frame.loc[0, 'Height'] = 400
+    analyzer = OlympicAnalyzer(frame)
+    fliers = analyzer.boxplot_stats('Sport')['fliers']
+    assert 400 in fliers.loc[('Swimming', 'Height')]
+    expected = [part.copy() for part in fliers]
+    for part in fliers:
+        with pytest.raises(ValueError):
+            part[:] = -1
+    assert all((a == b).all() for a, b in zip(analyzer.boxplot_stats('Sport')['fliers'], expected))
+
+    with pytest.raises(ValueError):
+        analyzer.age_bin_edges[0] = -1
+    analyzer.append(sample_data.iloc[[0]].assign(Age=90, Year=2024))
+    with pytest.raises(ValueError):
+        analyzer.age_bin_edges[-1] = -1
+
+def test_leaderboards_per_country_sport_decade_and_after_append(sample_data):
+    frame = sample_data.assign(Name_hash=['a', 'b', 'a', 'c', 'a'])
+    analyzer = OlympicAnalyzer(frame, check_cube=True)
+
+    top = analyzer.leaderboard()
+    assert list(top.index) == ['a', 'b']  # c har ingen medalj
+    assert top.loc['a'].tolist() == [3, 2, 0, 1]  # Medals, Gold, Silver, Bronze
+    assert list(analyzer.leaderboard('NOC', 'USA').index) == ['b']
+    assert list(analyzer.leaderboard(medal='Silver').index) == ['b']
+    assert list(analyzer.leaderboard('Decade', 2020, top_n=1).index) == ['a']
+    assert analyzer.leaderboard('NOC', 'NOR').empty
+    analyzer.get_top_athletes_by_medals('CAN')  # check_cube jämför med value_counts
+
+    delta = frame.iloc[[1, 1, 1]].assign(Year=2024, Games='2024 Summer', Medal='Gold')
+    analyzer.append(delta)
+    fresh = OlympicAnalyzer(pd.concat([frame, delta], ignore_index=True))
+    for by, key in [('All', None), ('NOC', 'CAN'), ('Sport', 'Swimming'), ('Decade', 2020)]:
+        for medal in [None, 'Gold', 'Silver', 'Bronze']:
+            pd.testing.assert_frame_equal(analyzer.leaderboard(by, key, medal), fresh.leaderboard(by, key, medal))
+    assert analyzer.leaderboard().index[0] == 'b'
+    pd.testing.assert_frame_equal(analyzer.leaderboard(top_n=40), fresh.leaderboard(top_n=40))
+
+    with pytest.raises(ValueError):
+        analyzer.leaderboard('Year', 2016)
+    with pytest.raises(KeyError):
+        OlympicAnalyzer(sample_data).leaderboard()
+
+def test_read_only_mode_shares_data_without_copying(sample_data, monkeypatch):
+    frame = sample_data.assign(Name_hash=anonymize_names(sample_data['Name'])).sort_values('NOC', kind='stable')
+    analyzer = OlympicAnalyzer(frame, read_only=True, cache_entries=16)
+    assert np.shares_memory(analyzer.df['Height'].to_numpy(), frame['Height'].to_numpy())
+
+    # Ändringar syns varken från anroparen in i analysern eller från resultaten tillbaka
+    frame.loc[frame['NOC'] == 'CAN', 'Height'] = 0
+    assert analyzer.country_rows('CAN')['Height'].min() > 0
+    profile = analyzer.country_athlete_profile('CAN')
+    profile['Size'] = 1
+    profile.loc[:, 'Age'] = 0
+    assert 'Size' not in analyzer.country_athlete_profile('CAN').columns
+    assert analyzer.age_distribution('CAN').min() > 0
+
+    stats = analyzer.boxplot_stats('NOC')
+    stats.loc[('CAN', 'Height'), 'med'] = -1
+    leaders = analyzer.leaderboard('NOC', 'CAN')
+    leaders.loc[:, 'Medals'] = 0
+    reports = analyzer.country_reports(['CAN'])
+    reports['CAN'].top_sports.iloc[0] = 100
+    assert analyzer.boxplot_stats('NOC').loc[('CAN', 'Height'), 'med'] > 0
+    assert analyzer.leaderboard('NOC', 'CAN')['Medals'].min() > 0
+    assert analyzer.country_report('CAN').top_sports.iloc[0] == 2
+
+    monkeypatch.setattr('src.data_processor.copy_on_write', lambda: False)
+    with pytest.raises(ValueError):
+        OlympicAnalyzer(frame, read_only=True)
@@ -0,0 +1,47 @@
+import plotly.graph_objects as go
+from src.figure_cache import FigureCache
+
+def _bar(values):
+    return go.Figure(go.Bar(y=values))
+
+def test_render_once_per_key():
+    cache = FigureCache()
+    calls = []
+
+    def render():
+        calls.append(1)
+        return _bar([1, 2]), _bar([3])
+
+    first = cache.get_or_render('country', ('CAN',), 0, render)
+    second = cache.get_or_render('country', ('CAN',), 0, render)
+
+    assert len(calls) == 1
+    assert first == second
+    assert list(second[0]['data'][0]['y']) == [1, 2]
+
+def test_dataset_version_is_part_of_key():
+    cache = FigureCache()
+    cache.get_or_render('sport', ('Swimming',), 0, lambda: _bar([1]))
+    updated = cache.get_or_render('sport', ('Swimming',), 1, lambda: _bar([2]))
+    assert list(updated['data'][0]['y']) == [2]
+    assert cache.info().misses == 2
+
+def test_warm_up_fills_cache():
+    cache = FigureCache()
+
+    def failing():
+        raise ValueError("trasig figur")
+
+    jobs = [lambda noc=noc: cache.get_or_render('country', (noc,), 0, lambda: _bar([1])) for noc in ['CAN', 'SWE']]
+    thread = cache.warm_up([failing] + jobs)
+    thread.join(timeout=10)
+
+    assert cache.info().entries == 2
+    cache.get_or_render('country', ('SWE',), 0, failing)
+    assert cache.info().hits == 1
+
+def test_compact_cache_rounds_trace_values():
+    cache = FigureCache(compact=True, precision=1)
+    figure = cache.get_or_render('sport', ('Swimming',), 0, lambda: _bar([1.26, 2.0]))
+    assert figure['data'][0]['y'] == [1.3, 2]
+    assert cache.get_or_render('sport', ('Swimming',), 0, lambda: _bar([9.0])) == figure
@@ -0,0 +1,87 @@
+import pytest
+from flask import Flask
+
+from src import metrics
+from src.metrics import MetricsRegistry, instrument_methods, timed
+
+
+def test_histogram_text_format():
+    registry = MetricsRegistry(enabled=True)
+    histogram = registry.histogram('demo_seconds', "Demo", ('method',), buckets=(0.1, 1.0))
+    histogram.observe(0.05, method='a')
+    histogram.observe(0.5, method='a')
+    histogram.observe(5, method='a')
+
+    text = registry.render()
+    assert '# TYPE demo_seconds histogram' in text
+    assert 'demo_seconds_bucket{method="a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{method="a",le="1"} 2' in text
+    assert 'demo_seconds_bucket{method="a",le="+Inf"} 3' in text
+    assert 'demo_seconds_sum{method="a"} 5.55' in text
+    assert 'demo_seconds_count{method="a"} 3' in text
+
+
+def test_timed_is_noop_when_disabled():
+    registry = MetricsRegistry(enabled=False)
+
+    @timed('calls_seconds', "Anrop", registry, name='f')
+    def f(x):
+        return x + 1
+
+    assert f(1) == 2
+    assert registry.render().strip() == ''
+
+    registry.enabled = True
+    f(1)
+    assert 'calls_seconds_count{name="f"} 1' in registry.render()
+
+
+def test_instrument_methods_counts_public_methods_and_errors():
+    registry = MetricsRegistry(enabled=True)
+
+    @instrument_methods(registry=registry)
+    class Demo:
+        def ok(self):
+            return 1
+
+        def broken(self):
+            raise ValueError("fel")
+
+        def _private(self):
+            return 2
+
+    demo = Demo()
+    demo.ok()
+    demo._private()
+    with pytest.raises(ValueError):
+        demo.broken()
+
+    text = registry.render()
+    assert 'olympics_analyzer_seconds_count{method="ok"} 1' in text
+    assert 'olympics_analyzer_seconds_count{method="broken"} 1' in text
+    assert '_private' not in text
+    assert 'olympics_errors_total{metric="olympics_analyzer_seconds",target="broken"} 1' in text
+
+
+def test_metrics_route_and_callback_timing(monkeypatch):
+    registry = MetricsRegistry(enabled=True)
+    monkeypatch.setattr(metrics, 'REGISTRY', registry)
+    server = Flask(__name__)
+    metrics.install_flask(server)
+
+    @server.route('/_dash-update-component', methods=['POST'])
+    @metrics.timed_callback
+    def update_plot():
+        return 'x' * 2000
+
+    client = server.test_client()
+    client.post('/_dash-update-component')
+    text = client.get('/metrics').get_data(as_text=True)
+
+    assert 'olympics_callback_seconds_count{callback="update_plot"} 1' in text
+    assert 'olympics_callback_request_seconds_count{callback="update_plot"} 1' in text
+    assert 'olympics_callback_response_bytes_bucket{callback="update_plot",le="4096"} 1' in text
+    assert 'process_resident_memory_bytes' in text
+
+    registry.enabled = False
+    assert client.get('/metrics').status_code == 404
@@ -0,0 +1,100 @@
+import copy
+import gzip
+import json
+
+import pandas as pd
+import plotly.express as px
+from flask import Flask, jsonify
+
+from src import metrics, response_encoding
+from src.metrics import MetricsRegistry
+from src.response_encoding import compact_figure, install_compression
+
+
+def _animate(figure):
+    # Som Plotly.animate: varje ruta slås ihop med spåret på samma plats
+    traces = copy.deepcopy(figure['data'])
+    states = []
+    for frame in figure['frames']:
+        for index, trace in enumerate(frame['data']):
+            traces[index].update(trace)
+        states.append(copy.deepcopy(traces))
+    return states
+
+
+def test_compact_figure_rounds_and_keeps_animation():
+    df = pd.DataFrame({'Year': [2000, 2000, 2004, 2004, 2008, 2008],
+                       'NOC': ['CAN', 'SWE', 'CAN', 'SWE', 'CAN', 'SWE'],
+                       'Medals': [3.14159, 2.0, 5.5, 1.25, 3.14159, 2.0]})
+    figure = json.loads(px.bar(df, x='Medals', y='NOC', color='NOC', animation_frame='Year',
+                               orientation='h').to_json())
+    compact = compact_figure(copy.deepcopy(figure), precision=2)
+
+    assert compact['data'][0]['x'] == [3.14]
+    assert compact['data'][1]['x'] == [2]
+    # Oförändrade egenskaper upprepas inte i rutorna, men animationen blir densamma
+    assert 'marker' not in compact['frames'][1]['data'][0]
+    assert compact['frames'][1]['data'][0]['x'] == [5.5]
+    assert len(json.dumps(compact)) < len(json.dumps(figure))
+    rounded = dict(figure, data=response_encoding._round(figure['data'], 2),
+                   frames=[dict(frame, data=response_encoding._round(frame['data'], 2)) for frame in figure['frames']])
+    assert _animate(compact) == _animate(rounded)
+    assert compact['layout'] == figure['layout']
+
+
+def test_compression_follows_accept_encoding(monkeypatch):
+    registry = MetricsRegistry(enabled=True)
+    monkeypatch.setattr(metrics, 'REGISTRY', registry)
+    monkeypatch.setattr(response_encoding, 'REGISTRY', registry)
+    server = Flask(__name__)
+    metrics.install_flask(server)
+    install_compression(server, min_size=100)
+
+    @server.route('/_dash-update-component', methods=['POST'])
+    @metrics.timed_callback
+    def update_plot():
+        return jsonify({'x': list(range(500))})
+
+    @server.route('/small')
+    def small():
+        return jsonify({'x': 1})
+
+    client = server.test_client()
+    plain = client.post('/_dash-update-component')
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.headers['Vary'] == 'Accept-Encoding'
+
+    compressed = client.post('/_dash-update-component', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+    assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+
+    saved = len(plain.get_data()) - len(compressed.get_data())
+    text = client.get('/metrics').get_data(as_text=True)
+    assert f'olympics_response_bytes_saved_total{{callback="update_plot",encoding="gzip"}} {saved}' in text
+    assert f'olympics_callback_response_bytes_sum{{callback="update_plot"}} {len(plain.get_data()) + len(compressed.get_data())}' in text
+
+
+def test_static_files_are_compressed_once(monkeypatch):
+    calls = []
+    compress = response_encoding.compress
+    monkeypatch.setattr(response_encoding, 'compress', lambda *args: calls.append(args[1]) or compress(*args))
+    server = Flask(__name__)
+    install_compression(server, min_size=100)
+    bundle = 'var x = 1;\n' * 500
+
+    @server.route('/_dash-component-suites/dash/bundle.js')
+    def static_bundle():
+        return server.response_class(bundle, mimetype='application/javascript')
+
+    @server.route('/_dash-update-component', methods=['POST'])
+    def update_plot():
+        return jsonify({'x': list(range(500))})
+
+    client = server.test_client()
+    for _ in range(3):
+        response = client.get('/_dash-component-suites/dash/bundle.js', headers={'Accept-Encoding': 'gzip'})
+        assert gzip.decompress(response.get_data()).decode() == bundle
+        client.post('/_dash-update-component', headers={'Accept-Encoding': 'gzip'})
+    # Bundlen komprimeras en gång, callbacksvaren varje gång
+    assert len(calls) == 4
@@ -0,0 +1,70 @@
+import pandas as pd
+from src.result_cache import ResultCache, estimate_bytes
+
+def test_hit_and_miss_counters():
+    cache = ResultCache(max_entries=4)
+    calls = []
+    compute = lambda: calls.append(1) or pd.Series([1, 2, 3])
+
+    cache.get_or_compute(('a',), compute)
+    cache.get_or_compute(('a',), compute)
+
+    info = cache.info()
+    assert len(calls) == 1
+    assert (info.hits, info.misses, info.entries) == (1, 1, 1)
+    assert info.bytes > 0
+
+def test_lru_eviction_by_entries():
+    cache = ResultCache(max_entries=2)
+    cache.get_or_compute('a', lambda: 1)
+    cache.get_or_compute('b', lambda: 2)
+    cache.get_or_compute('a', lambda: 1)  # 'a' senast använd
+    cache.get_or_compute('c', lambda: 3)  # kastar ut 'b'
+
+    assert cache.info().evictions == 1
+    assert cache.get_or_compute('b', lambda: 'recomputed') == 'recomputed'
+
+def test_byte_budget():
+    value = pd.Series(range(100))
+    size = estimate_bytes(value)
+    cache = ResultCache(max_entries=10, max_bytes=size * 2)
+    for key in 'abc':
+        cache.get_or_compute(key, lambda: pd.Series(range(100)))
+
+    info = cache.info()
+    assert info.entries == 2
+    assert info.bytes <= size * 2
+    assert info.evictions == 1
+
+def test_callers_cannot_corrupt_cached_values():
+    cache = ResultCache()
+    first = cache.get_or_compute('k', lambda: {'s': pd.Series([1, 2, 3])})
+    first['s'].iloc[0] = 100
+    first['extra'] = 'x'
+
+    second = cache.get_or_compute('k', lambda: None)
+    assert list(second) == ['s']
+    assert second['s'].tolist() == [1, 2, 3]
+
+def test_put_and_named_tuples_are_detached():
+    from collections import namedtuple
+    Report = namedtuple('Report', ['noc', 'counts'])
+    cache = ResultCache()
+    cache.put('k', Report('CAN', pd.Series([1, 2])))
+
+    first = cache.get_or_compute('k', lambda: None)
+    assert isinstance(first, Report)
+    first.counts.iloc[0] = 100
+    assert cache.get_or_compute('k', lambda: None).counts.tolist() == [1, 2]
+
+def test_unhashable_key_bypasses_cache():
+    cache = ResultCache()
+    assert cache.get_or_compute(['unhashable'], lambda: 5) == 5
+    assert cache.info().entries == 0
+
+def test_clear():
+    cache = ResultCache()
+    cache.get_or_compute('a', lambda: pd.Series([1]))
+    cache.clear()
+    assert cache.info().entries == 0
+    assert cache.info().bytes == 0
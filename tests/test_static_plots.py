@@ -0,0 +1,36 @@
+import threading
+import time
+from src.data_processor import OlympicAnalyzer
+from src.static_plots import StaticPlotRenderer, render_body_boxplot
+
+def test_render_body_boxplot_returns_png(sample_data):
+    stats = OlympicAnalyzer(sample_data).boxplot_stats('NOC')
+    png = render_body_boxplot('CAN', stats.loc['CAN'])
+    assert png.startswith(b'\x89PNG')
+
+def test_renderer_caches_and_shares_concurrent_renders():
+    renderer = StaticPlotRenderer(max_workers=2)
+    calls = []
+
+    def render():
+        calls.append(1)
+        time.sleep(0.05)
+        return b'png-bytes'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(renderer.get_png(('CAN', 0), render)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [b'png-bytes'] * 8
+    assert len(calls) == 1
+    assert renderer.get_png(('CAN', 0), render) == b'png-bytes'
+    assert renderer.info().entries == 1
+
+def test_renderer_caches_missing_images():
+    renderer = StaticPlotRenderer()
+    assert renderer.get_png(('NOR', 0), lambda: None) is None
+    assert renderer.get_png(('NOR', 0), lambda: b'unexpected') is None